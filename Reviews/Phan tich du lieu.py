@@ -1,14 +1,25 @@
 # Import thư viện pymongo
 from pymongo import MongoClient
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import os
-import math
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from foody_common.stats import refresh_restaurant_stats, STATS_COL
 
 
 OUTPUT_DIR = r"C:\Users\User\OneDrive\Desktop\Ma Nguon Mo\DO AN CUOI KY\mongoDB-test"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# "classic" = mỗi câu 1 lần quét (cũ) | "facet" = gom bằng $facet | "compare" = chạy cả 2 vào OUTPUT_DIR/classic, /facet
+ANALYTICS_MODE = "facet"
+# facet: Q1/Q8/Q9/Q10 đọc bảng restaurant_stats (cập nhật dần theo scraped_at) thay vì group lại toàn bộ review
+USE_RESTAURANT_STATS = True
+FULL_STATS_REBUILD = False   # True = tính lại restaurant_stats từ đầu
+
 # Bước 1: Kết nối đến MongoDB
 client = MongoClient('mongodb://localhost:27017/') # ket noi den server mongoDB
 
@@ -26,102 +37,345 @@ print("Bảng 3 (review_user_all):", b3.count_documents({}))
 
 
 # Bước 4: TRUY VẤN
-# Q1: Đếm số review theo từng quán
-pipeline = [
-    {
-        "$group": {
+# Q7: các tiêu chí chấm điểm trên bảng 2
+CRITERIA_MAP = {
+    "vi_tri": "tieu_chi_1_vi_tri",
+    "gia_ca": "tieu_chi_2_gia_ca",
+    "chat_luong": "tieu_chi_3_chat_luong",
+    "phuc_vu": "tieu_chi_4_phuc_vu",
+    "khong_gian": "tieu_chi_5_khong_gian"
+}
+
+# Q6 (bảng 2, 1 aggregation) dùng chung cho cả 2 chế độ
+def export_q6(out_dir):
+    # Q6 : Thể loại quán nào (full chuỗi the_loai_quan) có diem_tb_tieu_chi > 8.0?
+    pipeline = [
+        {"$match": {"diem_tb_tieu_chi": {"$gt": 8.0}, "the_loai_quan": {"$nin": [None, ""]}}}
+    ,
+
+        # giữ nguyên full chuỗi the_loai_quan
+        {"$group": {
+            "_id": "$the_loai_quan",
+            "restaurant_count": {"$sum": 1}
+        }},
+        {"$sort": {"restaurant_count": -1}}
+    ]
+
+    df = pd.DataFrame(list(b2.aggregate(pipeline))).rename(columns={"_id": "the_loai_quan"})
+
+    df.to_csv(os.path.join(out_dir, "Q6_full_category_over_8.csv"),
+              index=False, encoding="utf-8-sig")
+
+    print(" Q6_full_category_over_8.csv")
+
+
+# Q10: Top quán “đáng tin” để đề xuất, dùng chung cho cả 2 chế độ
+# score = user_rating_mean * log1p(review_count), tính ngay trong aggregation ($ln, $round)
+# -> $sort/$limit trên server, chỉ k dòng về Python dù bảng lớn cỡ nào.
+Q10_TOP_K = 10
+Q10_TOP_K_PER_DISTRICT = 0   # > 0: ghi thêm Q10_recommended_by_district.csv, top-k mỗi quận ($setWindowFields, MongoDB 5.0+)
+
+def q10_score_stages(use_stats):
+    if use_stats:
+        # restaurant_stats đã có sẵn mean/count theo quán
+        stages = [
+            {"$match": {"rated_count": {"$gt": 0}}},
+            {"$project": {
+                "restaurant_name": 1, "district": 1,
+                "user_rating_mean": "$rating_mean",
+                "review_count": "$rated_count"
+            }}
+        ]
+    else:
+        stages = [
+            {"$match": {"user_rating": {"$ne": None}}},
+            {"$group": {
+                "_id": "$restaurant_url",
+                "restaurant_name": {"$first": "$restaurant_name"},
+                "district": {"$first": "$district"},
+                "user_rating_mean": {"$avg": "$user_rating"},
+                "review_count": {"$sum": 1}
+            }}
+        ]
+    return stages + [
+        {"$match": {"user_rating_mean": {"$ne": None}}},
+        {"$addFields": {"recommend_score": {"$round": [
+            {"$multiply": ["$user_rating_mean", {"$ln": {"$add": [1, "$review_count"]}}]}, 3
+        ]}}}
+    ]
+
+Q10_COLS = ["restaurant_url", "restaurant_name", "district", "user_rating_mean", "review_count", "recommend_score"]
+
+def export_q10(out_dir, use_stats):
+    source = db[STATS_COL] if use_stats else b3
+    pipeline = q10_score_stages(use_stats) + [
+        {"$sort": {"recommend_score": -1, "_id": 1}},
+        {"$limit": Q10_TOP_K}
+    ]
+    df = pd.DataFrame(list(source.aggregate(pipeline, allowDiskUse=True))).rename(columns={"_id": "restaurant_url"})
+    df = df.reindex(columns=Q10_COLS)
+    df.to_csv(os.path.join(out_dir, "Q10_recommended_restaurants.csv"), index=False, encoding="utf-8-sig")
+    print(" Q10_recommended_restaurants.csv")
+
+    if Q10_TOP_K_PER_DISTRICT > 0:
+        pipeline = q10_score_stages(use_stats) + [
+            {"$setWindowFields": {
+                "partitionBy": "$district",
+                "sortBy": {"recommend_score": -1},
+                "output": {"rank_in_district": {"$documentNumber": {}}}
+            }},
+            {"$match": {"rank_in_district": {"$lte": Q10_TOP_K_PER_DISTRICT}}},
+            {"$sort": {"district": 1, "rank_in_district": 1}}
+        ]
+        df = pd.DataFrame(list(source.aggregate(pipeline, allowDiskUse=True))).rename(columns={"_id": "restaurant_url"})
+        df = df.reindex(columns=["district", "rank_in_district"] + [c for c in Q10_COLS if c != "district"])
+        df.to_csv(os.path.join(out_dir, "Q10_recommended_by_district.csv"), index=False, encoding="utf-8-sig")
+        print(" Q10_recommended_by_district.csv")
+
+def export_q10_from_frame(out_dir, rated):
+    """
+    Như export_q10 nhưng tính từ bảng 1 dòng / quán đã có trong RAM (chế độ facet) -> không quét lại Mongo.
+    rated: các quán có rated_count > 0, cột restaurant_url / restaurant_name / district / user_rating_mean / rated_count.
+    """
+    df = rated[rated["user_rating_mean"].notna()].rename(columns={"rated_count": "review_count"})
+    df = df.assign(recommend_score=(df["user_rating_mean"] * np.log1p(df["review_count"])).round(3))
+    # cùng thứ tự $sort của bản aggregation: điểm giảm dần, hoà thì theo url
+    df = df.sort_values(["recommend_score", "restaurant_url"], ascending=[False, True], kind="stable")
+    df.head(Q10_TOP_K).reindex(columns=Q10_COLS).to_csv(
+        os.path.join(out_dir, "Q10_recommended_restaurants.csv"), index=False, encoding="utf-8-sig")
+    print(" Q10_recommended_restaurants.csv")
+
+    if Q10_TOP_K_PER_DISTRICT > 0:
+        df = df.assign(rank_in_district=df.groupby("district", dropna=False).cumcount() + 1)
+        df = df[df["rank_in_district"] <= Q10_TOP_K_PER_DISTRICT].sort_values(
+            ["district", "rank_in_district"], kind="stable", na_position="first")   # Mongo xếp null lên đầu
+        df = df.reindex(columns=["district", "rank_in_district"] + [c for c in Q10_COLS if c != "district"])
+        df.to_csv(os.path.join(out_dir, "Q10_recommended_by_district.csv"), index=False, encoding="utf-8-sig")
+        print(" Q10_recommended_by_district.csv")
+
+
+# ---------- Chế độ classic: mỗi câu 1 lần quét (cách làm ban đầu) ----------
+def run_classic(out_dir):
+    # Q1: Đếm số review theo từng quán
+    pipeline = [
+        {
+            "$group": {
+                "_id": "$restaurant_url",
+                "restaurant_name": {"$first": "$restaurant_name"},
+                "review_count": {"$sum": 1}
+            }
+        },
+        {"$sort": {"review_count": -1}}
+    ]
+
+    data = list(b3.aggregate(pipeline))
+    df = pd.DataFrame(data)
+
+    df.to_csv(f"{out_dir}/Q1_restaurant_review_count.csv", index=False, encoding="utf-8-sig")
+    print(" ==================Đã xuất thành công file==================")
+
+    # Q2: Missing values
+    fields = ["user_rating", "review_text", "media_urls", "review_time"]
+
+    rows = []
+    total = b3.count_documents({})
+
+    for f in fields:
+        missing = b3.count_documents({"$or": [
+        {f: {"$in": [None, ""]}},
+        {f: {"$exists": False}}
+    ]})
+        rows.append({
+            "field": f,
+            "missing_count": missing,
+            "missing_ratio": round(missing / total, 4)
+        })
+
+    df = pd.DataFrame(rows)
+    df.to_csv(f"{out_dir}/Q2_missing_report.csv", index=False, encoding="utf-8-sig")
+    print("==================Đã xuất thành công file Q2==================")
+
+    # Q3: Review trùng lặp
+    pipeline = [
+        {"$group": {"_id": "$review_id", "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ]
+
+    data = list(b3.aggregate(pipeline))
+    df = pd.DataFrame(data)
+
+    df.to_csv(f"{out_dir}/Q3_duplicate_reviews.csv", index=False, encoding="utf-8-sig")
+    print(" Xuất Q3_duplicate_reviews.csv")
+
+    # Q4: Phân phối user_rating
+    pipeline = [
+        {"$group": {"_id": "$user_rating", "count": {"$sum": 1}}},
+        {"$sort": {"_id": 1}}
+    ]
+
+    data = list(b3.aggregate(pipeline))
+    df = pd.DataFrame(data).rename(columns={"_id": "user_rating"})
+
+    df.to_csv(f"{out_dir}/Q4_rating_distribution.csv", index=False, encoding="utf-8-sig")
+    print(" Xuất Q4_rating_distribution.csv")
+
+    # Q5 : Rating bias - bỏ user_rating missing trước khi phân nhóm
+    pipeline = [
+        # 1) Convert user_rating -> số (double). Nếu lỗi/Null => None
+        {"$project": {
+            "rating_num": {
+                "$convert": {
+                    "input": "$user_rating",
+                    "to": "double",
+                    "onError": None,
+                    "onNull": None
+                }
+            }
+        }},
+
+        # 2) Lọc bỏ missing / convert lỗi
+        {"$match": {"rating_num": {"$ne": None}}},
+
+        # 3) Phân nhóm Thấp / Trung bình / Cao
+        {"$project": {
+            "rating_group": {
+                "$cond": [
+                    {"$lt": ["$rating_num", 4]}, "Thấp",
+                    {"$cond": [
+                        {"$lt": ["$rating_num", 8]}, "Trung bình", "Cao"
+                    ]}
+                ]
+            }
+        }},
+
+        # 4) Đếm số lượng mỗi nhóm
+        {"$group": {"_id": "$rating_group", "count": {"$sum": 1}}},
+
+        # (Tuỳ chọn) sắp xếp cho đẹp: Cao -> Trung bình -> Thấp
+        {"$addFields": {
+            "order": {
+                "$switch": {
+                    "branches": [
+                        {"case": {"$eq": ["$_id", "Cao"]}, "then": 1},
+                        {"case": {"$eq": ["$_id", "Trung bình"]}, "then": 2},
+                        {"case": {"$eq": ["$_id", "Thấp"]}, "then": 3}
+                    ],
+                    "default": 99
+                }
+            }
+        }},
+        {"$sort": {"order": 1}},
+        {"$project": {"order": 0}}
+    ]
+
+    data = list(b3.aggregate(pipeline))
+    df = pd.DataFrame(data).rename(columns={"_id": "rating_group"})
+
+    df.to_csv(os.path.join(out_dir, "Q5_rating_bias.csv"), index=False, encoding="utf-8-sig")
+    print(" Đã xuất Q5_rating_bias.csv")
+
+
+    export_q6(out_dir)
+
+
+    # Q7: Top 10 quán theo từng tiêu chí 
+    for short_name, field in CRITERIA_MAP.items():
+        pipeline = [
+            {"$match": {field: {"$ne": None}}},
+            {"$sort": {field: -1}},
+            {"$limit": 100},
+            {"$project": {
+                "_id": 0,
+                "restaurant_url": 1,
+                "restaurant_name": 1,
+                "district": 1,
+                "the_loai_quan": 1,
+                field: 1
+            }}
+        ]
+
+        df = pd.DataFrame(list(b2.aggregate(pipeline)))
+        out_name = f"Q7_top_{short_name}.csv"
+        df.to_csv(os.path.join(out_dir, out_name), index=False, encoding="utf-8-sig")
+        print(f" {out_name}")
+
+
+    # Q8: Quán điểm cao nhưng ít review (nguy cơ “ảo điểm”)
+
+    pipeline = [
+        {"$match": {"user_rating": {"$ne": None}}},
+        {"$group": {
             "_id": "$restaurant_url",
             "restaurant_name": {"$first": "$restaurant_name"},
+            "avg_rating": {"$avg": "$user_rating"},
             "review_count": {"$sum": 1}
-        }
-    },
-    {"$sort": {"review_count": -1}}
-]
+        }},
+        {"$match": {"avg_rating": {"$gte": 9}, "review_count": {"$lte": 5}}},
+        {"$sort": {"avg_rating": -1}}
+    ]
+    df = pd.DataFrame(list(b3.aggregate(pipeline))).rename(columns={"_id": "restaurant_url"})
+    df.to_csv(os.path.join(out_dir, "Q8_high_rating_low_review.csv"), index=False, encoding="utf-8-sig")
+    print(" Q8_high_rating_low_review.csv")
+
+    # Q9: diem_tb_tieu_chi (B2) có liên quan user_rating_mean (B3) không?
 
-data = list(b3.aggregate(pipeline))
-df = pd.DataFrame(data)
-
-df.to_csv(f"{OUTPUT_DIR}/Q1_restaurant_review_count.csv", index=False, encoding="utf-8-sig")
-print(" ==================Đã xuất thành công file==================")
-
-# Q2: Missing values
-fields = ["user_rating", "review_text", "media_urls", "review_time"]
-
-rows = []
-total = b3.count_documents({})
-
-for f in fields:
-    missing = b3.count_documents({"$or": [
-    {f: {"$in": [None, ""]}},
-    {f: {"$exists": False}}
-]})
-    rows.append({
-        "field": f,
-        "missing_count": missing,
-        "missing_ratio": round(missing / total, 4)
-    })
-
-df = pd.DataFrame(rows)
-df.to_csv(f"{OUTPUT_DIR}/Q2_missing_report.csv", index=False, encoding="utf-8-sig")
-print("==================Đã xuất thành công file Q2==================")
-
-# Q3: Review trùng lặp
-pipeline = [
-    {"$group": {"_id": "$review_id", "count": {"$sum": 1}}},
-    {"$match": {"count": {"$gt": 1}}}
-]
 
-data = list(b3.aggregate(pipeline))
-df = pd.DataFrame(data)
+    pipeline = [
+        {"$match": {"user_rating": {"$ne": None}}},
+        {"$lookup": {
+            "from": "review_restaurants_all",
+            "localField": "restaurant_url",
+            "foreignField": "restaurant_url",
+            "as": "r"
+        }},
+        {"$unwind": "$r"},
+        {"$match": {"r.diem_tb_tieu_chi": {"$ne": None}}},
+        {"$group": {
+            "_id": "$restaurant_url",
+            "restaurant_name": {"$first": "$restaurant_name"},
+            "district": {"$first": "$district"},
+            "user_rating_mean": {"$avg": "$user_rating"},
+            "diem_tb_tieu_chi": {"$first": "$r.diem_tb_tieu_chi"}
+        }},
+        {"$sort": {"user_rating_mean": -1}}
+    ]
+    df = pd.DataFrame(list(b3.aggregate(pipeline))).rename(columns={"_id": "restaurant_url"})
+    df.to_csv(os.path.join(out_dir, "Q9_rating_vs_criteria.csv"), index=False, encoding="utf-8-sig")
+    print(" Q9_rating_vs_criteria.csv")
 
-df.to_csv(f"{OUTPUT_DIR}/Q3_duplicate_reviews.csv", index=False, encoding="utf-8-sig")
-print(" Xuất Q3_duplicate_reviews.csv")
 
-# Q4: Phân phối user_rating
-pipeline = [
-    {"$group": {"_id": "$user_rating", "count": {"$sum": 1}}},
-    {"$sort": {"_id": 1}}
-]
+    # Q10: Top quán “đáng tin” để đề xuất
+    export_q10(out_dir, use_stats=False)
+
 
-data = list(b3.aggregate(pipeline))
-df = pd.DataFrame(data).rename(columns={"_id": "user_rating"})
+# ---------- Chế độ facet: gom các câu trên bảng 3 lại, mỗi bảng quét 1-2 lần ----------
+# Bảng 3 chỉ quét 2 lần:
+#   (a) 1 $facet cho các câu trả về ít dòng: Q2, Q3, Q4, Q5
+#   (b) 1 $group theo quán (+ $lookup bảng 2 theo từng QUÁN thay vì từng review), rồi tách Q1/Q8/Q9/Q10 bằng pandas.
+#       Không nhét (b) vào $facet vì kết quả $facet là 1 document (tối đa 16MB) mà danh sách quán có thể rất dài.
+# Q7: 5 câu top-100 trên bảng 2 gộp thành 1 $facet.
+Q2_FIELDS = ["user_rating", "review_text", "media_urls", "review_time"]
 
-df.to_csv(f"{OUTPUT_DIR}/Q4_rating_distribution.csv", index=False, encoding="utf-8-sig")
-print(" Xuất Q4_rating_distribution.csv")
+def _missing_expr(field):
+    # giống count_documents({"$or": [{f: {"$in": [None, ""]}}, {f: {"$exists": False}}]})
+    return {"$cond": [{"$in": [{"$ifNull": [f"${field}", None]}, [None, ""]]}, 1, 0]}
 
-# Q5 : Rating bias - bỏ user_rating missing trước khi phân nhóm
-pipeline = [
-    # 1) Convert user_rating -> số (double). Nếu lỗi/Null => None
+RATING_GROUP_STAGES = [
     {"$project": {
         "rating_num": {
-            "$convert": {
-                "input": "$user_rating",
-                "to": "double",
-                "onError": None,
-                "onNull": None
-            }
+            "$convert": {"input": "$user_rating", "to": "double", "onError": None, "onNull": None}
         }
     }},
-
-    # 2) Lọc bỏ missing / convert lỗi
     {"$match": {"rating_num": {"$ne": None}}},
-
-    # 3) Phân nhóm Thấp / Trung bình / Cao
     {"$project": {
         "rating_group": {
             "$cond": [
                 {"$lt": ["$rating_num", 4]}, "Thấp",
-                {"$cond": [
-                    {"$lt": ["$rating_num", 8]}, "Trung bình", "Cao"
-                ]}
+                {"$cond": [{"$lt": ["$rating_num", 8]}, "Trung bình", "Cao"]}
             ]
         }
     }},
-
-    # 4) Đếm số lượng mỗi nhóm
     {"$group": {"_id": "$rating_group", "count": {"$sum": 1}}},
-
-    # (Tuỳ chọn) sắp xếp cho đẹp: Cao -> Trung bình -> Thấp
     {"$addFields": {
         "order": {
             "$switch": {
@@ -138,131 +392,185 @@ pipeline = [
     {"$project": {"order": 0}}
 ]
 
-data = list(b3.aggregate(pipeline))
-df = pd.DataFrame(data).rename(columns={"_id": "rating_group"})
-
-df.to_csv(os.path.join(OUTPUT_DIR, "Q5_rating_bias.csv"), index=False, encoding="utf-8-sig")
-print(" Đã xuất Q5_rating_bias.csv")
-
-
-# Q6 : Thể loại quán nào (full chuỗi the_loai_quan) có diem_tb_tieu_chi > 8.0?
-pipeline = [
-    {"$match": {"diem_tb_tieu_chi": {"$gt": 8.0}, "the_loai_quan": {"$nin": [None, ""]}}}
-,
-
-    # giữ nguyên full chuỗi the_loai_quan
-    {"$group": {
-        "_id": "$the_loai_quan",
-        "restaurant_count": {"$sum": 1}
-    }},
-    {"$sort": {"restaurant_count": -1}}
-]
-
-df = pd.DataFrame(list(b2.aggregate(pipeline))).rename(columns={"_id": "the_loai_quan"})
-
-df.to_csv(os.path.join(OUTPUT_DIR, "Q6_full_category_over_8.csv"),
-          index=False, encoding="utf-8-sig")
-
-print(" Q6_full_category_over_8.csv")
+PER_RES_COLS = ["_id", "restaurant_name", "district", "review_count", "rated_count", "user_rating_mean", "diem_tb_tieu_chi"]
 
-
-# Q7: Top 10 quán theo từng tiêu chí 
-criteria_map = {
-    "vi_tri": "tieu_chi_1_vi_tri",
-    "gia_ca": "tieu_chi_2_gia_ca",
-    "chat_luong": "tieu_chi_3_chat_luong",
-    "phuc_vu": "tieu_chi_4_phuc_vu",
-    "khong_gian": "tieu_chi_5_khong_gian"
-}
-
-for short_name, field in criteria_map.items():
+def group_reviews_by_restaurant():
     pipeline = [
-        {"$match": {field: {"$ne": None}}},
-        {"$sort": {field: -1}},
-        {"$limit": 100},
+        {"$group": {
+            "_id": "$restaurant_url",
+            "restaurant_name": {"$first": "$restaurant_name"},
+            "district": {"$first": "$district"},
+            "review_count": {"$sum": 1},
+            "rated_count": {"$sum": {"$cond": [{"$ne": [{"$ifNull": ["$user_rating", None]}, None]}, 1, 0]}},
+            "user_rating_mean": {"$avg": "$user_rating"}
+        }},
+        {"$lookup": {
+            "from": "review_restaurants_all",
+            "localField": "_id",
+            "foreignField": "restaurant_url",
+            "as": "r"
+        }},
         {"$project": {
-            "_id": 0,
-            "restaurant_url": 1,
-            "restaurant_name": 1,
-            "district": 1,
-            "the_loai_quan": 1,
-            field: 1
+            "restaurant_name": 1, "district": 1, "review_count": 1, "rated_count": 1, "user_rating_mean": 1,
+            "diem_tb_tieu_chi": {"$arrayElemAt": [
+                {"$filter": {"input": "$r.diem_tb_tieu_chi", "cond": {"$ne": ["$$this", None]}}}, 0
+            ]}
         }}
     ]
-
-    df = pd.DataFrame(list(b2.aggregate(pipeline)))
-    out_name = f"Q7_top_{short_name}.csv"
-    df.to_csv(os.path.join(OUTPUT_DIR, out_name), index=False, encoding="utf-8-sig")
-    print(f" {out_name}")
-
-
-# Q8: Quán điểm cao nhưng ít review (nguy cơ “ảo điểm”)
-
-pipeline = [
-    {"$match": {"user_rating": {"$ne": None}}},
-    {"$group": {
-        "_id": "$restaurant_url",
-        "restaurant_name": {"$first": "$restaurant_name"},
-        "avg_rating": {"$avg": "$user_rating"},
-        "review_count": {"$sum": 1}
-    }},
-    {"$match": {"avg_rating": {"$gte": 9}, "review_count": {"$lte": 5}}},
-    {"$sort": {"avg_rating": -1}}
-]
-df = pd.DataFrame(list(b3.aggregate(pipeline))).rename(columns={"_id": "restaurant_url"})
-df.to_csv(os.path.join(OUTPUT_DIR, "Q8_high_rating_low_review.csv"), index=False, encoding="utf-8-sig")
-print(" Q8_high_rating_low_review.csv")
-
-# Q9: diem_tb_tieu_chi (B2) có liên quan user_rating_mean (B3) không?
-
-
-pipeline = [
-    {"$match": {"user_rating": {"$ne": None}}},
-    {"$lookup": {
-        "from": "review_restaurants_all",
-        "localField": "restaurant_url",
-        "foreignField": "restaurant_url",
-        "as": "r"
-    }},
-    {"$unwind": "$r"},
-    {"$match": {"r.diem_tb_tieu_chi": {"$ne": None}}},
-    {"$group": {
-        "_id": "$restaurant_url",
-        "restaurant_name": {"$first": "$restaurant_name"},
-        "district": {"$first": "$district"},
-        "user_rating_mean": {"$avg": "$user_rating"},
-        "diem_tb_tieu_chi": {"$first": "$r.diem_tb_tieu_chi"}
-    }},
-    {"$sort": {"user_rating_mean": -1}}
-]
-df = pd.DataFrame(list(b3.aggregate(pipeline))).rename(columns={"_id": "restaurant_url"})
-df.to_csv(os.path.join(OUTPUT_DIR, "Q9_rating_vs_criteria.csv"), index=False, encoding="utf-8-sig")
-print(" Q9_rating_vs_criteria.csv")
-
-
-# Q10: Top quán “đáng tin” để đề xuất
-# score = user_rating_mean * log1p(review_count)
-pipeline = [
-    {"$match": {"user_rating": {"$ne": None}}},
-    {"$group": {
-        "_id": "$restaurant_url",
-        "restaurant_name": {"$first": "$restaurant_name"},
-        "district": {"$first": "$district"},
-        "user_rating_mean": {"$avg": "$user_rating"},
-        "review_count": {"$sum": 1}
-    }}
-]
-
-rows = []
-for d in b3.aggregate(pipeline):
-    mean_rating = d.get("user_rating_mean")
-    if mean_rating is None:
-        continue
-    d["recommend_score"] = round(mean_rating * math.log1p(d["review_count"]), 3)
-    rows.append(d)
-
-df = pd.DataFrame(rows).rename(columns={"_id": "restaurant_url"})
-df = df.sort_values("recommend_score", ascending=False).head(10)
-
-df.to_csv(os.path.join(OUTPUT_DIR, "Q10_recommended_restaurants.csv"), index=False, encoding="utf-8-sig")
-print(" Q10_recommended_restaurants.csv")
+    per_res = pd.DataFrame(
+        list(b3.aggregate(pipeline, allowDiskUse=True)),
+        columns=PER_RES_COLS
+    )
+
+    return per_res
+
+def load_restaurant_stats():
+    # bảng nhỏ: 1 dòng / quán, đã có sẵn count/mean/diem_tb_tieu_chi
+    proj = {c: 1 for c in PER_RES_COLS}
+    proj["rating_mean"] = 1
+    rows = list(db[STATS_COL].find({}, proj))
+    for r in rows:
+        r["user_rating_mean"] = r.pop("rating_mean", None)
+    return pd.DataFrame(rows, columns=PER_RES_COLS)
+
+def run_facet(out_dir):
+    # (a) Q2, Q3, Q4, Q5 trong 1 lần quét
+    missing_group = {"_id": None, "total": {"$sum": 1}}
+    for f in Q2_FIELDS:
+        missing_group[f] = {"$sum": _missing_expr(f)}
+
+    res = next(b3.aggregate([{"$facet": {
+        "q2": [{"$group": missing_group}],
+        "q3": [
+            {"$group": {"_id": "$review_id", "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}}
+        ],
+        "q4": [
+            {"$group": {"_id": "$user_rating", "count": {"$sum": 1}}},
+            {"$sort": {"_id": 1}}
+        ],
+        "q5": RATING_GROUP_STAGES,
+    }}], allowDiskUse=True))
+
+    miss = res["q2"][0] if res["q2"] else {"total": 0}
+    total = miss["total"]
+    rows = []
+    for f in Q2_FIELDS:
+        missing = miss.get(f, 0)
+        rows.append({
+            "field": f,
+            "missing_count": missing,
+            "missing_ratio": round(missing / total, 4)
+        })
+    pd.DataFrame(rows).to_csv(os.path.join(out_dir, "Q2_missing_report.csv"), index=False, encoding="utf-8-sig")
+    pd.DataFrame(res["q3"]).to_csv(os.path.join(out_dir, "Q3_duplicate_reviews.csv"), index=False, encoding="utf-8-sig")
+    pd.DataFrame(res["q4"]).rename(columns={"_id": "user_rating"}).to_csv(
+        os.path.join(out_dir, "Q4_rating_distribution.csv"), index=False, encoding="utf-8-sig")
+    pd.DataFrame(res["q5"]).rename(columns={"_id": "rating_group"}).to_csv(
+        os.path.join(out_dir, "Q5_rating_bias.csv"), index=False, encoding="utf-8-sig")
+    print(" Xuất Q2, Q3, Q4, Q5 (1 $facet)")
+
+    # (b) 1 dòng / quán: đủ số liệu cho Q1, Q8, Q9, Q10 (không quét lại reviews cho Q10)
+    if USE_RESTAURANT_STATS:
+        per_res = load_restaurant_stats()
+    else:
+        per_res = group_reviews_by_restaurant()
+
+    # Q1
+    q1 = per_res.sort_values("review_count", ascending=False, kind="stable")[["_id", "restaurant_name", "review_count"]]
+    q1.to_csv(os.path.join(out_dir, "Q1_restaurant_review_count.csv"), index=False, encoding="utf-8-sig")
+
+    rated = per_res[per_res["rated_count"] > 0].rename(columns={"_id": "restaurant_url"})
+
+    # Q8
+    q8 = rated[(rated["user_rating_mean"] >= 9) & (rated["rated_count"] <= 5)]
+    q8 = q8.sort_values("user_rating_mean", ascending=False, kind="stable")
+    q8 = q8[["restaurant_url", "restaurant_name", "user_rating_mean", "rated_count"]].rename(
+        columns={"user_rating_mean": "avg_rating", "rated_count": "review_count"})
+    q8.to_csv(os.path.join(out_dir, "Q8_high_rating_low_review.csv"), index=False, encoding="utf-8-sig")
+
+    # Q9
+    q9 = rated[rated["diem_tb_tieu_chi"].notna()].sort_values("user_rating_mean", ascending=False, kind="stable")
+    q9 = q9[["restaurant_url", "restaurant_name", "district", "user_rating_mean", "diem_tb_tieu_chi"]]
+    q9.to_csv(os.path.join(out_dir, "Q9_rating_vs_criteria.csv"), index=False, encoding="utf-8-sig")
+
+    # Q10
+    export_q10_from_frame(out_dir, rated)
+
+    print(" Xuất Q1, Q8, Q9, Q10 (1 lần group theo quán)")
+
+    export_q6(out_dir)
+
+    # Q7: 5 tiêu chí -> 1 $facet
+    facets = {}
+    for short_name, field in CRITERIA_MAP.items():
+        facets[short_name] = [
+            {"$match": {field: {"$ne": None}}},
+            {"$sort": {field: -1}},
+            {"$limit": 100},
+            {"$project": {
+                "_id": 0,
+                "restaurant_url": 1,
+                "restaurant_name": 1,
+                "district": 1,
+                "the_loai_quan": 1,
+                field: 1
+            }}
+        ]
+    res = next(b2.aggregate([{"$facet": facets}]))
+    for short_name in CRITERIA_MAP:
+        out_name = f"Q7_top_{short_name}.csv"
+        pd.DataFrame(res[short_name]).to_csv(os.path.join(out_dir, out_name), index=False, encoding="utf-8-sig")
+        print(f" {out_name}")
+
+
+# ---------- So sánh 2 chế độ ----------
+def _csv_rows(path):
+    # so theo tập cột + tập dòng: các quán bằng điểm/bằng số review có thể ra thứ tự khác nhau giữa 2 cách
+    df = pd.read_csv(path, encoding="utf-8-sig", dtype=str, keep_default_na=False)
+    cols = sorted(df.columns)
+    return cols, sorted(map(tuple, df[cols].values.tolist()))
+
+def compare_outputs(dir_a, dir_b):
+    diff = []
+    for name in sorted(os.listdir(dir_a)):
+        if not name.endswith(".csv"):
+            continue
+        path_b = os.path.join(dir_b, name)
+        if not os.path.exists(path_b) or _csv_rows(os.path.join(dir_a, name)) != _csv_rows(path_b):
+            diff.append(name)
+    return diff
+
+
+# Bước 5: CHẠY
+t_start = time.perf_counter()
+t_refresh = 0.0
+if ANALYTICS_MODE != "classic" and USE_RESTAURANT_STATS:
+    st = refresh_restaurant_stats(db, full=FULL_STATS_REBUILD)
+    t_refresh = time.perf_counter() - t_start
+    print(f" restaurant_stats ({st['mode']}): {st['restaurants']} quán, {st['seconds']:.2f}s, mốc scraped_at = {st['watermark']}")
+# bấm giờ sau khi refresh: so sánh classic vs facet chỉ tính phần phân tích
+t0 = time.perf_counter()
+if ANALYTICS_MODE == "classic":
+    run_classic(OUTPUT_DIR)
+elif ANALYTICS_MODE == "facet":
+    run_facet(OUTPUT_DIR)
+else:
+    dir_classic = os.path.join(OUTPUT_DIR, "classic")
+    dir_facet = os.path.join(OUTPUT_DIR, "facet")
+    os.makedirs(dir_classic, exist_ok=True)
+    os.makedirs(dir_facet, exist_ok=True)
+
+    run_classic(dir_classic)
+    t_classic = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    run_facet(dir_facet)
+    t_facet = time.perf_counter() - t1
+
+    print(" ==================SO SÁNH==================")
+    print(f" classic: {t_classic:.2f}s | facet: {t_facet:.2f}s | x{t_classic / t_facet if t_facet else 0:.1f}")
+    if t_refresh:
+        print(f" refresh restaurant_stats (không tính vào so sánh): {t_refresh:.2f}s")
+    diff = compare_outputs(dir_classic, dir_facet)
+    print(" CSV giống nhau" if not diff else f" CSV khác: {', '.join(diff)}")
+print(f" Tổng thời gian ({ANALYTICS_MODE}): {time.perf_counter() - t_start:.2f}s")
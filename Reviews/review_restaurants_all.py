@@ -7,19 +7,32 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from pymongo import MongoClient
 import pandas as pd
-import os, re, time, random
+import os, re, sys
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from foody_common.drivers import apply_lean_firefox
+from foody_common.export import export_xlsx_streaming, export_parquet_streaming, read_parquet_table
+from foody_common.ratelimit import AdaptiveRateLimiter
+from foody_common.htmlcache import HtmlCache
+from foody_common.page_selectors import CATEGORY_BOX, CATEGORY_LINKS, SCORE_ROWS, SCORE_LABELS
+
 # ================== 2. CONFIG ==================
 IN_XLSX  = r"restaurants_all_districts_from_home_1.xlsx"   
 OUT_XLSX = r"review_quan_restaurants_all.xlsx"            
+IN_PARQUET = None        # vd "restaurants_all_districts_from_home_1.parquet" -> đọc link từ Parquet thay cho Excel
+OUT_PARQUET_DIR = None   # vd "review_quan_restaurants_all.parquet" -> ghi thêm Parquet chia thư mục theo district
 
 GECKO_PATH = r"C:/Users/User/OneDrive/Desktop/Ma Nguon Mo/DO AN CUOI KY/geckodriver.exe"
 FIREFOX_BINARY = r"C:/Program Files/Mozilla Firefox/firefox.exe"
 HEADLESS = False
+LEAN_PROFILE = False   # True = headless + chặn ảnh/font/media/host ngoài foody
 WAIT_SEC = 25
-SLEEP_MIN = 0.8
-SLEEP_MAX = 1.5
+SCORE_WAIT_SEC = 2      # chờ bảng điểm tiêu chí hiện ra sau khi cuộn (quán chưa có điểm thì hết giờ là đi tiếp)
+ADAPTIVE_RATE = True    # True = tốc độ tự chỉnh theo latency/lỗi (AIMD) thay cho nghỉ ngẫu nhiên 0.8-1.5s
+RATE_START = 0.7        # request / giây lúc đầu
+RATE_METRICS_CSV = "rate_review_restaurants_all.csv"   # None = không ghi
+HTML_CACHE_DIR = None   # vd "html_cache" -> lưu HTML trang quán (gzip) để parse lại offline: python -m foody_common.reparse
 
 # ================== 3. KẾT NỐI MONGODB ==================
 client = MongoClient("mongodb://localhost:27017/")
@@ -50,32 +63,21 @@ def safe_sheet_name(name: str) -> str:
     name = " ".join(name.split()).strip()
     return name[:31] if name else "Unknown"
 
-def tiny_sleep():
-    time.sleep(random.uniform(SLEEP_MIN, SLEEP_MAX))
-
 def scrape_the_loai_quan(driver):
     parts = []
-    try:
-        els = driver.find_elements(By.CSS_SELECTOR, "div.category div.category-items a")
-        for e in els:
-            t = (e.text or "").strip()
-            if t:
-                parts.append(t)
-    except:
-        pass
-
-    try:
-        els = driver.find_elements(By.CSS_SELECTOR, "div.category div.category-cuisines a")
-        for e in els:
-            t = (e.text or "").strip()
-            if t:
-                parts.append(t)
-    except:
-        pass
+    for sel in CATEGORY_LINKS:
+        try:
+            els = driver.find_elements(By.CSS_SELECTOR, sel)
+            for e in els:
+                t = (e.text or "").strip()
+                if t:
+                    parts.append(t)
+        except:
+            pass
 
     if not parts:
         try:
-            box = driver.find_element(By.CSS_SELECTOR, "div.category")
+            box = driver.find_element(By.CSS_SELECTOR, CATEGORY_BOX)
             t = re.sub(r"\s+", " ", (box.text or "").strip())
             if t:
                 parts.append(t)
@@ -102,7 +104,7 @@ def scrape_scores(driver):
     }
 
     try:
-        rows = driver.find_elements(By.CSS_SELECTOR, "div.micro-home-point div.micro-home-static table tbody tr")
+        rows = driver.find_elements(By.CSS_SELECTOR, SCORE_ROWS)
         for r in rows:
             tds = r.find_elements(By.TAG_NAME, "td")
             if len(tds) < 2:
@@ -117,16 +119,10 @@ def scrape_scores(driver):
             except:
                 val = safe_float(tds[-1].text)
 
-            if "vị trí" in label or "vi tri" in label:
-                result["tieu_chi_1_vi_tri"] = val
-            elif "giá cả" in label or "gia ca" in label:
-                result["tieu_chi_2_gia_ca"] = val
-            elif "chất lượng" in label or "chat luong" in label:
-                result["tieu_chi_3_chat_luong"] = val
-            elif "phục vụ" in label or "phuc vu" in label:
-                result["tieu_chi_4_phuc_vu"] = val
-            elif "không gian" in label or "khong gian" in label:
-                result["tieu_chi_5_khong_gian"] = val
+            for keys, field in SCORE_LABELS:
+                if any(k in label for k in keys):
+                    result[field] = val
+                    break
     except:
         pass
 
@@ -143,8 +139,11 @@ def scrape_scores(driver):
     return result
 
 # ================== 5. ĐỌC FILE LINK ==================
-df_in = pd.read_excel(IN_XLSX, sheet_name="ALL")
 need_cols = ["restaurant_url", "restaurant_name", "address", "district"]
+if IN_PARQUET:
+    df_in = read_parquet_table(IN_PARQUET, need_cols)
+else:
+    df_in = pd.read_excel(IN_XLSX, sheet_name="ALL")
 for c in need_cols:
     if c not in df_in.columns:
         raise ValueError(f"Thiếu cột '{c}' trong sheet ALL")
@@ -158,34 +157,48 @@ service = Service(GECKO_PATH)
 options = webdriver.firefox.options.Options()
 options.binary_location = FIREFOX_BINARY
 options.headless = HEADLESS
+if LEAN_PROFILE:
+    apply_lean_firefox(options)
 
 driver = webdriver.Firefox(service=service, options=options)
 wait = WebDriverWait(driver, WAIT_SEC)
+limiter = AdaptiveRateLimiter(start_rate=RATE_START, adaptive=ADAPTIVE_RATE)
+html_cache = HtmlCache(HTML_CACHE_DIR) if HTML_CACHE_DIR else None
 
 
 # ================== 7. CÀO + LƯU MONGO ==================
+# quán "đã đủ" = cả 7 trường dưới đây khác null -> lấy 1 lần bằng 1 cursor thay vì find_one từng dòng
+DONE_FIELDS = [
+    "the_loai_quan",
+    "tieu_chi_1_vi_tri",
+    "tieu_chi_2_gia_ca",
+    "tieu_chi_3_chat_luong",
+    "tieu_chi_4_phuc_vu",
+    "tieu_chi_5_khong_gian",
+    "diem_tb_tieu_chi",
+]
+
+def is_done(rec) -> bool:
+    return all(rec.get(f) is not None for f in DONE_FIELDS)
+
+done_urls = set(
+    d["restaurant_url"]
+    for d in col.find({f: {"$ne": None} for f in DONE_FIELDS}, {"_id": 0, "restaurant_url": 1})
+    if d.get("restaurant_url")
+)
+print(f" Đã có đủ dữ liệu: {len(done_urls)} quán")
+
 for idx, row in df_in.iterrows():
     url = str(row["restaurant_url"]).strip()
     name = str(row["restaurant_name"]).strip()
     address = str(row["address"]).strip()
     district = str(row["district"]).strip()
 
-    existed = col.find_one({"restaurant_url": url}, {"_id": 0})
-    if existed:
-        ok = (
-            existed.get("the_loai_quan") is not None and
-            existed.get("tieu_chi_1_vi_tri") is not None and
-            existed.get("tieu_chi_2_gia_ca") is not None and
-            existed.get("tieu_chi_3_chat_luong") is not None and
-            existed.get("tieu_chi_4_phuc_vu") is not None and
-            existed.get("tieu_chi_5_khong_gian") is not None and
-            existed.get("diem_tb_tieu_chi") is not None
-        )
-        if ok:
-            print(f"[{idx+1}/{len(df_in)}]  Skip (đã có): {name}")
-            continue
-
-    print(f"[{idx+1}/{len(df_in)}]  {name}")
+    if url in done_urls:
+        print(f"[{idx+1}/{len(df_in)}]  Skip (đã có): {name}")
+        continue
+
+    print(f"[{idx+1}/{len(df_in)}]  {name} | {limiter.rate(url):.2f} req/s")
     rec = {
         "restaurant_url": url,
         "restaurant_name": name,
@@ -202,7 +215,7 @@ for idx, row in df_in.iterrows():
     }
 
     try:
-        driver.get(url)
+        limiter.get(driver, url)
         wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
         #vùng category xuất hiện
         try:
@@ -212,10 +225,17 @@ for idx, row in df_in.iterrows():
           
         # để table tiêu chí xuất hiện
         driver.execute_script("window.scrollBy(0, 900);")
-        tiny_sleep()
+        try:
+            WebDriverWait(driver, SCORE_WAIT_SEC).until(EC.presence_of_element_located(
+                (By.CSS_SELECTOR, "div.micro-home-point div.micro-home-static table tbody tr")))
+        except TimeoutException:
+            pass
 
         rec["the_loai_quan"] = scrape_the_loai_quan(driver)
         rec.update(scrape_scores(driver))
+        if html_cache:
+            html_cache.put(url, driver.page_source, "restaurant",
+                           meta={"restaurant_name": name, "address": address, "district": district})
 
     except Exception as e:
         print("  Lỗi:", str(e)[:120])
@@ -225,20 +245,20 @@ for idx, row in df_in.iterrows():
         {"$set": rec},
         upsert=True
     )
+    if is_done(rec):
+        done_urls.add(url)
 
-    tiny_sleep()
 driver.quit()
+print(f" Tốc độ: {limiter.summary()}")
+if RATE_METRICS_CSV:
+    limiter.append_metrics_csv(RATE_METRICS_CSV)
 print(" Đã cào xong, bắt đầu export Excel...")
 
 # ================== 8. EXPORT EXCEL ==================
-docs = list(col.find({}, {"_id": 0}))
-df = pd.DataFrame(docs)
-if df.empty:
+# đọc cursor đã sort theo lô + openpyxl write-only -> không nạp cả collection vào RAM
+if col.find_one({}, {"_id": 1}) is None:
     raise ValueError("MongoDB chưa có dữ liệu để export.")
 
-if "district" in df.columns and "restaurant_name" in df.columns:
-    df = df.sort_values(["district", "restaurant_name"], na_position="last").reset_index(drop=True)
-
 OUTPUT_COLS = [
     "restaurant_url",
     "restaurant_name",
@@ -253,13 +273,18 @@ OUTPUT_COLS = [
     "scraped_at",
 ]
 
-with pd.ExcelWriter(OUT_XLSX, engine="openpyxl") as writer:
-    df[OUTPUT_COLS].to_excel(writer, sheet_name="ALL", index=False)
-
-    if "district" in df.columns:
-        for district, g in df.groupby("district", dropna=False):
-            sheet = safe_sheet_name(district)
-            g[OUTPUT_COLS].to_excel(writer, sheet_name=sheet, index=False)
+export_xlsx_streaming(
+    col, OUT_XLSX, OUTPUT_COLS,
+    sort_keys=["district", "restaurant_name"],
+    sheet_name_fn=safe_sheet_name,
+)
 
 print(f" Đã export ra file: {OUT_XLSX}")
 
+if OUT_PARQUET_DIR:
+    score_cols = [c for c in OUTPUT_COLS if c.startswith("tieu_chi_") or c == "diem_tb_tieu_chi"]
+    n_rows = export_parquet_streaming(
+        col, OUT_PARQUET_DIR, OUTPUT_COLS,
+        column_types={c: "float" for c in score_cols},
+    )
+    print(f" Đã export Parquet: {OUT_PARQUET_DIR} ({n_rows} dòng)")
@@ -7,17 +7,38 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 import time
 import re
-import hashlib
-from urllib.parse import urljoin
+import os
+import sys
+import queue
+import threading
 import pandas as pd
 from pymongo import MongoClient
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from foody_common.waits import prepare_growth_wait, wait_for_growth
+from foody_common.sinks import BulkUpsertSink
+from foody_common.drivers import apply_lean_firefox
+from foody_common.export import export_xlsx_streaming, export_parquet_streaming, read_parquet_table
+from foody_common.stats import refresh_restaurant_stats
+from foody_common.schedule import sync_schedule, due_restaurants, mark_crawled
+from foody_common.ratelimit import AdaptiveRateLimiter
+from foody_common.supervisor import SupervisedDriver, RestartLimitError
+from foody_common.reviews import parse_rating, build_review_record
+from foody_common.page_selectors import (
+    REVIEW_ITEM, REVIEW_POINTS, REVIEW_USER, REVIEW_RATING, REVIEW_TIME, REVIEW_TEXT, REVIEW_PHOTOS,
+    REVIEW_VIDEOS, PHOTO_ATTRS, REVIEW_JS_SELECTORS,
+)
+from foody_common.htmlcache import HtmlCache
+from foody_common.memory import memory_snapshot, fmt_mb
+
 # ================== 2. CẤU HÌNH  ==================
 IN_XLSX = "restaurants_all_districts_from_home_1.xlsx"   
 IN_SHEET = "ALL"                                         
+IN_PARQUET = None            # vd "restaurants_all_districts_from_home_1.parquet" -> đọc list quán từ Parquet thay cho Excel
 
 OUT_XLSX = "review_user_all.xlsx"                        
+OUT_PARQUET_DIR = None       # vd "review_user_all.parquet" -> ghi thêm Parquet chia thư mục theo district
 
 MONGO_URI = "mongodb://localhost:27017/"
 MONGO_DB = "review_quan_db"                                 
@@ -27,19 +48,51 @@ TEST_LIMIT_RESTAURANTS = 0   # 0 = chạy hết quán
 MAX_LOADMORE = 400           # số lần bấm "Xem thêm bình luận"
 WAIT_GROW_SECONDS = 25       # chờ tăng số review sau mỗi lần bấm
 
-# ================== 3. FIREFOX CONFIG ==================
-gecko_path = r"C:/Users/User/OneDrive/Desktop/Ma Nguon Mo/DO AN CUOI KY/geckodriver.exe"
-service = Service(gecko_path)
+BULK_SIZE = 500              # số review gom lại rồi bulk_write 1 lần
+BULK_FLUSH_SECONDS = 5       # hoặc ghi sau mỗi ngần này giây
 
-options = webdriver.firefox.options.Options()
-options.binary_location = r"C:/Program Files/Mozilla Firefox/firefox.exe"
-options.headless = False
+LEAN_PROFILE = False         # True = headless + chặn ảnh/font/media/host ngoài foody
 
-driver = webdriver.Firefox(service=service, options=options)
-wait = WebDriverWait(driver, 25)
+NUM_WORKERS = 1              # số Firefox chạy song song (1 = như cũ, mỗi worker 1 browser)
+THROUGHPUT_CSV = "throughput_review_user_all.csv"   # ghi thông lượng mỗi lần chạy để chọn NUM_WORKERS
+
+EXTRACT_MODE = "js"          # "js" = 1 execute_script cho cả trang, "element" = find_element từng review (cách cũ)
+BENCHMARK_EXTRACT = False    # True = mỗi quán parse bằng cả 2 cách, in thời gian + số record lệch
+INCREMENTAL_RECRAWL = False  # True = quán đã có review trong Mongo: dừng bấm "Xem thêm" khi cả lô mới tải đều đã biết (review cũ không được cập nhật lại)
+USE_SCHEDULE = False         # True = chỉ cào các quán đến hạn trong crawl_schedule (quán nhiều review mới ghé thường hơn)
+CRAWL_BUDGET = 200           # số quán tối đa mỗi lần chạy khi USE_SCHEDULE (0 = mọi quán đến hạn)
+ADAPTIVE_RATE = True         # True = tốc độ tự chỉnh theo latency/lỗi (AIMD), False = nhịp cố định RATE_START
+RATE_START = 0.7             # request / giây lúc đầu cho foody.vn (dùng chung mọi worker)
+RATE_METRICS_CSV = "rate_review_user_all.csv"   # rate cuối mỗi lần chạy theo host (None = không ghi)
+STREAM_HARVEST = False       # True = sau mỗi lần "Xem thêm": lấy + lưu ngay lô review mới rồi xoá nội dung lô đó khỏi DOM
+MEM_LOG_EVERY = 20           # STREAM_HARVEST: đo bộ nhớ (node DOM, RSS browser/Python) sau mỗi ngần này lô
+HTML_CACHE_DIR = None        # vd "html_cache" -> lưu HTML trang bình luận (gzip) để parse lại offline: python -m foody_common.reparse
+REFRESH_STATS = True         # cào xong -> cập nhật restaurant_stats (chỉ các quán có review mới) cho báo cáo
+
+# ================== 3. FIREFOX CONFIG ==================
+gecko_path = r"C:/Users/User/OneDrive/Desktop/Ma Nguon Mo/DO AN CUOI KY/geckodriver.exe"
+firefox_binary = r"C:/Program Files/Mozilla Firefox/firefox.exe"
+
+def new_firefox():
+    options = webdriver.firefox.options.Options()
+    options.binary_location = firefox_binary
+    options.headless = False
+    if LEAN_PROFILE:
+        apply_lean_firefox(options)
+    return webdriver.Firefox(service=Service(gecko_path), options=options)
+
+def make_driver(name="driver"):
+    # mỗi worker tự mở 1 Firefox riêng; treo/crash -> SupervisedDriver mở Firefox mới, worker chạy tiếp
+    driver = SupervisedDriver(new_firefox, name=name)
+    wait = WebDriverWait(driver, 25)
+    return driver, wait
 
 # ================== 4. HÀM PHỤ ==================
-def js_click(el):
+FOODY_HOST = "https://www.foody.vn"
+limiter = AdaptiveRateLimiter(start_rate=RATE_START, adaptive=ADAPTIVE_RATE)   # 1 limiter cho mọi worker
+html_cache = HtmlCache(HTML_CACHE_DIR) if HTML_CACHE_DIR else None
+
+def js_click(driver, el):
     driver.execute_script("arguments[0].click();", el)
 
 def safe_sheet_name(name: str) -> str:
@@ -58,12 +111,32 @@ def to_comment_url(base_url: str) -> str:
         return u
     return u.rstrip("/") + "/binh-luan"
 
-def get_review_count() -> int:
-    return len(driver.find_elements(By.CSS_SELECTOR, "li.review-item"))
-
-def load_all_reviews():
-    last = get_review_count()
+def get_review_count(driver) -> int:
+    return len(driver.find_elements(By.CSS_SELECTOR, REVIEW_ITEM))
+
+def load_all_reviews(driver, comment_url=None, known_ids=None, on_batch=None):
+    """
+    Bấm "Xem thêm bình luận" đến khi hết.
+    known_ids: set review_id quán này đã có trong Mongo -> sau mỗi lần tải, nếu cả lô mới
+    đều đã biết thì dừng (review mới nằm trên cùng, phần cũ hơn chắc chắn đã cào).
+    on_batch(records): chế độ STREAM_HARVEST -> mỗi lô mới được lấy ra (và xoá nội dung khỏi DOM) ngay,
+    không đợi tải hết.
+    Trả về (số lần bấm, tổng giây tiết kiệm so với poll sleep(1), có dừng sớm không).
+    """
+    def batch_done(start):
+        # True = dừng sớm
+        if on_batch:
+            records = harvest_new_reviews(driver, comment_url)
+            on_batch(records)
+            return bool(known_ids) and bool(records) and all(r["review_id"] in known_ids for r in records)
+        return bool(known_ids) and batch_all_known(driver, comment_url, start, known_ids)
+
+    last = get_review_count(driver)
     clicks = 0
+    saved = 0.0
+    if batch_done(0):
+        return clicks, saved, True
+    prepare_growth_wait(driver)
 
     while clicks < MAX_LOADMORE:
         btns = driver.find_elements(By.CSS_SELECTOR, "div.pn-loadmore a.fd-btn-more")
@@ -73,29 +146,35 @@ def load_all_reviews():
         btn = btns[0]
         try:
             driver.execute_script("arguments[0].scrollIntoView({block:'center'});", btn)
-            time.sleep(0.8)
-            js_click(btn)
+            # mỗi lần bấm là 1 request XHR tới foody -> lấy token thay cho sleep(0.8) cố định
+            limiter.acquire(comment_url or FOODY_HOST)
+            js_click(driver, btn)
             clicks += 1
         except:
             break
 
-        start = time.time()
-        grown = False
-        while time.time() - start < WAIT_GROW_SECONDS:
-            now = get_review_count()
-            if now > last:
-                last = now
-                grown = True
-                break
-            time.sleep(1)
-
-        if not grown:
+        res = wait_for_growth(driver, REVIEW_ITEM, last, WAIT_GROW_SECONDS,
+                              more_selector="div.pn-loadmore a.fd-btn-more")
+        limiter.report(comment_url or FOODY_HOST, res["waited"], ok=res["status"] != "timeout")
+        saved += res["saved"]
+        if res["status"] != "grown":
             break
+        if batch_done(last):
+            return clicks, saved, True
+        last = res["count"]
 
-def norm_text(s: str) -> str:
-    s = (s or "").strip()
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    if on_batch:
+        # review về muộn sau lần chờ cuối (timeout) vẫn được lấy
+        on_batch(harvest_new_reviews(driver, comment_url))
+    return clicks, saved, False
+
+def batch_all_known(driver, comment_url, start, known_ids):
+    # lô = các li.review-item từ vị trí `start`; review_id tính y như lúc lưu (kể cả hash_ khi thiếu id)
+    records = parse_all_reviews_js(driver, comment_url, start)
+    return bool(records) and all(r["review_id"] in known_ids for r in records)
+
+def load_known_review_ids(base_url):
+    return set(col.distinct("review_id", {"restaurant_url": base_url}))
 
 def pick_attr(el, attrs):
     for a in attrs:
@@ -104,90 +183,154 @@ def pick_attr(el, attrs):
             return v
     return ""
 
-def make_hash_id(*parts) -> str:
-    raw = "||".join([norm_text(p) for p in parts if p is not None])
-    return hashlib.md5(raw.encode("utf-8", errors="ignore")).hexdigest()
-
 def parse_one_review(li, restaurant_url):
     # review_id để chống trùng 
     review_id = ""
     try:
-        rp = li.find_element(By.CSS_SELECTOR, "div.review-points")
+        rp = li.find_element(By.CSS_SELECTOR, REVIEW_POINTS)
         review_id = pick_attr(rp, ["data-review"])  # ví dụ: review_3976939
     except:
         review_id = ""
     # user_name
     user_name = ""
     try:
-        user_name = li.find_element(By.CSS_SELECTOR, "a.ru-username").text
+        user_name = li.find_element(By.CSS_SELECTOR, REVIEW_USER).text
     except:
         user_name = ""
     # user_rating
     user_rating = None
     try:
-        t = li.find_element(By.CSS_SELECTOR, "div.review-points span.ng-binding").text
-        t = norm_text(t).replace(",", ".")
-        user_rating = float(t) if t else None
+        t = li.find_element(By.CSS_SELECTOR, REVIEW_RATING).text
+        user_rating = parse_rating(t)
     except:
         user_rating = None
     # review_time
     review_time = None
     try:
-        rt = li.find_element(By.CSS_SELECTOR, "span.ru-time")
+        rt = li.find_element(By.CSS_SELECTOR, REVIEW_TIME)
         review_time = rt.get_attribute("title") or rt.text
-        review_time = norm_text(review_time)
-        if not review_time:
-            review_time = None
     except:
         review_time = None
     # review_text
     review_text = ""
     try:
-        review_text = li.find_element(By.CSS_SELECTOR, "div.review-des").text
+        review_text = li.find_element(By.CSS_SELECTOR, REVIEW_TEXT).text
     except:
         review_text = ""
-    review_text = norm_text(review_text)
-    # media_urls: lưu URL của  ảnh & video 
-    media = []
     # ảnh
+    imgs = []
     try:
-        imgs = li.find_elements(By.CSS_SELECTOR, "ul.review-photos img")
-        for im in imgs:
-            src = pick_attr(im, ["data-original", "data-src", "src"])
-            src = (src or "").strip()
-            if src:
-                media.append(src)
+        for im in li.find_elements(By.CSS_SELECTOR, REVIEW_PHOTOS):
+            imgs.append(pick_attr(im, PHOTO_ATTRS))
     except:
         pass
     # video
+    vids = []
     try:
-        vids = li.find_elements(By.CSS_SELECTOR, "a.foody-video")
-        for v in vids:
-            u = (v.get_attribute("data-video-url") or "").strip()
-            if u:
-                u = urljoin(restaurant_url, u)
-                media.append(u)
+        for v in li.find_elements(By.CSS_SELECTOR, REVIEW_VIDEOS):
+            vids.append(v.get_attribute("data-video-url"))
     except:
         pass
 
-    media_urls = "|".join(list(dict.fromkeys(media)))  # mỗi link cách nhau dấu |
-
-    # fallback review_id nếu thiếu
-    if not review_id:
-        review_id = "hash_" + make_hash_id(restaurant_url, user_name, str(user_rating), review_time or "", review_text)
-
-    return {
-        "review_id": review_id,
-        "user_name": norm_text(user_name),
-        "user_rating": user_rating,
-        "review_text": review_text,
-        "media_urls": media_urls,
-        "review_time": review_time
+    return build_review_record(restaurant_url, review_id, user_name, user_rating, review_time, review_text, imgs, vids)
+
+# 1 lần execute_script lấy hết li.review-item (thay cho ~8 round trip/review)
+# pickAttr giống get_attribute của Selenium: ưu tiên property (src -> URL tuyệt đối) rồi mới tới attribute
+# harvest=true (STREAM_HARVEST): chỉ lấy li chưa đánh dấu, rồi đánh dấu + xoá hết nội dung bên trong.
+# Giữ lại thẻ li rỗng (vài chục byte) làm mốc cho ng-repeat chèn lô sau và để wait_for_growth vẫn đếm được.
+# Selector truyền vào qua arguments[2] (REVIEW_JS_SELECTORS, dùng chung với foody_common/reparse.py).
+EXTRACT_REVIEWS_JS = """
+var start = arguments[0] || 0, harvest = arguments[1] || false, SEL = arguments[2];
+function pickAttr(el, names) {
+    for (var i = 0; i < names.length; i++) {
+        var v = el[names[i]];
+        if (v === undefined || v === null || typeof v !== 'string') v = el.getAttribute(names[i]);
+        if (v) return v;
     }
+    return '';
+}
+function txt(root, sel) {
+    var el = root.querySelector(sel);
+    return el ? (el.innerText || '') : null;
+}
+var lis = document.querySelectorAll(harvest ? SEL.item + ':not([data-fd-done])' : SEL.item);
+var out = [];
+for (var i = start; i < lis.length; i++) {
+    var li = lis[i];
+    var rp = li.querySelector(SEL.points);
+    var rt = li.querySelector(SEL.time);
+    var imgs = [], vids = [];
+    li.querySelectorAll(SEL.photos).forEach(function (im) {
+        imgs.push(pickAttr(im, SEL.photo_attrs));
+    });
+    li.querySelectorAll(SEL.videos).forEach(function (a) {
+        vids.push(a.getAttribute('data-video-url') || '');
+    });
+    out.push({
+        review_id: rp ? pickAttr(rp, ['data-review']) : '',
+        user_name: txt(li, SEL.user) || '',
+        rating_text: txt(li, SEL.rating),
+        review_time: rt ? (rt.title || rt.innerText || '') : null,
+        review_text: txt(li, SEL.text) || '',
+        imgs: imgs,
+        vids: vids
+    });
+    if (harvest) {
+        li.setAttribute('data-fd-done', '1');
+        while (li.firstChild) li.removeChild(li.firstChild);
+    }
+}
+return out;
+"""
+
+def parse_all_reviews_js(driver, restaurant_url, start=0, harvest=False):
+    """
+    Bản bulk của parse_one_review: trả về list record cùng shape,
+    lấy từ li.review-item thứ `start` trở đi bằng 1 round trip.
+    harvest=True: lấy các li chưa lấy rồi xoá nội dung của chúng khỏi DOM (cùng round trip).
+    """
+    rows = driver.execute_script(EXTRACT_REVIEWS_JS, start, harvest, REVIEW_JS_SELECTORS) or []
+    out = []
+    for r in rows:
+        user_rating = parse_rating(r["rating_text"]) if r.get("rating_text") is not None else None
+        out.append(build_review_record(
+            restaurant_url,
+            r.get("review_id") or "",
+            r.get("user_name") or "",
+            user_rating,
+            r.get("review_time"),
+            r.get("review_text") or "",
+            r.get("imgs") or [],
+            r.get("vids") or [],
+        ))
+    return out
+
+def harvest_new_reviews(driver, comment_url):
+    return parse_all_reviews_js(driver, comment_url, 0, harvest=True)
+
+def benchmark_extract(driver, restaurant_url):
+    """
+    So sánh 2 cách parse trên cùng 1 trang đã load: element (cũ) vs js (bulk).
+    Trả về (n_review, giây element, giây js, số record lệch).
+    """
+    t0 = time.perf_counter()
+    lis = driver.find_elements(By.CSS_SELECTOR, REVIEW_ITEM)
+    by_element = [parse_one_review(li, restaurant_url) for li in lis]
+    t_element = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    by_js = parse_all_reviews_js(driver, restaurant_url)
+    t_js = time.perf_counter() - t0
+
+    mismatch = sum(1 for a, b in zip(by_element, by_js) if a != b) + abs(len(by_element) - len(by_js))
+    return len(by_element), t_element, t_js, mismatch
 
 # ================== 5. ĐỌC LIST QUÁN  ==================
-df_in = pd.read_excel(IN_XLSX, sheet_name=IN_SHEET)
 need_cols = ["restaurant_url", "restaurant_name", "district"]
+if IN_PARQUET:
+    df_in = read_parquet_table(IN_PARQUET, need_cols)
+else:
+    df_in = pd.read_excel(IN_XLSX, sheet_name=IN_SHEET)
 for c in need_cols:
     if c not in df_in.columns:
         raise ValueError(f"Thiếu cột {c} trong {IN_XLSX} / sheet {IN_SHEET}")
@@ -199,89 +342,342 @@ df_in["district"] = df_in["district"].astype(str).str.strip()
 if TEST_LIMIT_RESTAURANTS and TEST_LIMIT_RESTAURANTS > 0:
     df_in = df_in.head(TEST_LIMIT_RESTAURANTS).copy()
 
-print(f" Đọc {len(df_in)} quán từ {IN_XLSX} / sheet {IN_SHEET}")
+print(f" Đọc {len(df_in)} quán từ {IN_PARQUET or IN_XLSX + ' / sheet ' + IN_SHEET}")
 
 # ================== 6. KẾT NỐI MONGODB ==================
 client = MongoClient(MONGO_URI)
 db = client[MONGO_DB]
 col = db[MONGO_COL]
 col.create_index("review_id", unique=True)
+col.create_index("restaurant_url")   # lấy review_id đã biết theo quán khi INCREMENTAL_RECRAWL
 print(" Đã kết nối MongoDB:", MONGO_DB, "/", MONGO_COL)
 
-# ================== 7. CÀO REVIEW_USER ==================
+if USE_SCHEDULE:
+    # file link quán chỉ để thêm quán mới vào lịch; thứ tự cào theo hàng đợi đến hạn
+    df_ok = df_in[(df_in["restaurant_url"] != "") & (df_in["restaurant_url"].str.lower() != "nan")]
+    n_sched = sync_schedule(db, zip(df_ok["restaurant_url"], df_ok["restaurant_name"], df_ok["district"]))
+    due = due_restaurants(db, CRAWL_BUDGET)
+    df_in = pd.DataFrame(
+        [{"restaurant_url": d["_id"], "restaurant_name": d.get("restaurant_name"), "district": d.get("district")} for d in due],
+        columns=need_cols
+    )
+    print(f" Lịch cào: {n_sched} quán, {len(df_in)} quán đến hạn được cào lần này (ngân sách {CRAWL_BUDGET or 'không giới hạn'})")
+
+# ================== 7. CÀO REVIEW_USER (WORKER POOL) ==================
+def make_docs(records, base_url, restaurant_name, district):
+    docs = []
+    for data in records:
+        docs.append({
+            "review_id": data["review_id"],
+            "restaurant_url": base_url,
+            "restaurant_name": restaurant_name,
+            "district": district,
+            "user_name": data["user_name"],
+            "user_rating": data["user_rating"],
+            "review_text": data["review_text"],
+            "media_urls": data["media_urls"],
+            "review_time": data["review_time"],
+            "scraped_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "source": "foody.vn"
+        })
+    return docs
+
+def harvest_restaurant(driver, comment_url, base_url, restaurant_name, district, known_ids, emit):
+    """
+    STREAM_HARVEST: mỗi lô review mới tải -> lấy ra, emit(docs) cho writer lưu ngay, xoá nội dung lô khỏi DOM.
+    Python chỉ giữ 1 lô, DOM chỉ còn li rỗng -> bộ nhớ không tăng theo số review của quán.
+    Trả về ([], số review mới) giống crawl_one_restaurant.
+    """
+    st = {"batches": 0, "loaded": 0, "new": 0, "peak_dom": 0, "peak_browser": None, "peak_python": None}
+
+    def sample():
+        snap = memory_snapshot(driver)
+        st["peak_dom"] = max(st["peak_dom"], snap["dom_nodes"] or 0)
+        for k, key in (("browser_mb", "peak_browser"), ("python_mb", "peak_python")):
+            if snap[k] is not None:
+                st[key] = max(st[key] or 0, snap[k])
+
+    def on_batch(records):
+        st["batches"] += 1
+        st["loaded"] += len(records)
+        fresh = [r for r in records if r["review_id"] not in known_ids] if known_ids else records
+        st["new"] += len(fresh)
+        if INCREMENTAL_RECRAWL:
+            records = fresh
+        if records:
+            emit(make_docs(records, base_url, restaurant_name, district))
+        if st["batches"] % MEM_LOG_EVERY == 1:
+            sample()
+
+    stop_ids = known_ids if INCREMENTAL_RECRAWL else None
+    clicks, saved, stopped_early = load_all_reviews(driver, comment_url, stop_ids, on_batch)
+    sample()
+    wait_rows.append((clicks, saved))
+    if INCREMENTAL_RECRAWL and known_ids:
+        incr_rows.append((stopped_early, st["loaded"], st["new"]))
+    mem_rows.append((st["loaded"], st["peak_dom"], st["peak_browser"], st["peak_python"]))
+    print(f"   [stream] {st['batches']} lô, {st['loaded']} review | DOM tối đa {st['peak_dom']} node"
+          f" | browser {fmt_mb(st['peak_browser'])} | python {fmt_mb(st['peak_python'])}")
+    return [], (st["new"] if known_ids is not None else None)
+
+def crawl_one_restaurant(driver, wait, base_url, restaurant_name, district, emit=None):
+    """
+    Cào toàn bộ review của 1 quán trên driver của worker.
+    Trả về (list doc để writer lưu Mongo / None nếu quán không có bình luận, số review mới).
+    Số review mới = review_id chưa có trong Mongo (None nếu không tra, tức là tắt cả
+    INCREMENTAL_RECRAWL lẫn USE_SCHEDULE) -> mark_crawled của lịch cào dùng số này.
+    emit: có khi STREAM_HARVEST -> doc được gửi dần theo lô qua emit, list doc trả về rỗng.
+    """
+    comment_url = to_comment_url(base_url)
+
+    # driver.run đã thử lại cả quán -> get của driver thật, không lồng thêm retry của SupervisedDriver.get
+    limiter.get(driver.raw, comment_url)
+
+    # chờ có review list 
+    try:
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "ul.review-list, " + REVIEW_ITEM)))
+    except TimeoutException:
+        # có thể quán không có bình luận
+        return None, 0
+    # review_id đã có: INCREMENTAL_RECRAWL dùng để dừng sớm + bỏ review cũ,
+    # USE_SCHEDULE dùng để đếm đúng số review mới (không thì quán nào cũng như "nóng")
+    known_ids = load_known_review_ids(base_url) if (INCREMENTAL_RECRAWL or USE_SCHEDULE) else None
+    if STREAM_HARVEST and emit:
+        # DOM bị xoá dần -> không lưu HTML cache / benchmark được ở chế độ này
+        return harvest_restaurant(driver, comment_url, base_url, restaurant_name, district, known_ids, emit)
+    # load thêm đến khi hết (hoặc đến khi gặp lô toàn review đã có)
+    stop_ids = known_ids if INCREMENTAL_RECRAWL else None
+    clicks, saved, stopped_early = load_all_reviews(driver, comment_url, stop_ids)
+    wait_rows.append((clicks, saved))
+    if html_cache:
+        html_cache.put(comment_url, driver.page_source, "comments",
+                       meta={"restaurant_url": base_url, "restaurant_name": restaurant_name, "district": district})
+
+    if BENCHMARK_EXTRACT:
+        n, t_el, t_js, mismatch = benchmark_extract(driver, comment_url)
+        bench_rows.append((n, t_el, t_js, mismatch))
+        speedup = t_el / t_js if t_js > 0 else 0
+        print(f"   [bench] {n} review | element {t_el:.2f}s (~{8 * n} round trip) | js {t_js:.2f}s (1 round trip) | x{speedup:.1f} | lệch={mismatch}")
+
+    if EXTRACT_MODE == "js":
+        records = parse_all_reviews_js(driver, comment_url)
+    else:
+        lis = driver.find_elements(By.CSS_SELECTOR, REVIEW_ITEM)
+        records = [parse_one_review(li, comment_url) for li in lis]
+    n_new = None
+    if known_ids is not None:
+        fresh = [r for r in records if r["review_id"] not in known_ids]
+        n_new = len(fresh)
+        if INCREMENTAL_RECRAWL:
+            if known_ids:
+                incr_rows.append((stopped_early, len(records), n_new))
+            records = fresh
+    if not records:
+        return None, n_new or 0
+    return make_docs(records, base_url, restaurant_name, district), n_new
+
+def worker(wid, task_q, result_q, stats):
+    """
+    Mỗi worker 1 Firefox, lấy quán từ task_q (None = hết việc),
+    đẩy kết quả sang result_q cho writer (luồng chính) lưu Mongo.
+    """
+    driver = None
+    try:
+        driver, wait = make_driver(f"w{wid}")
+        while True:
+            task = task_q.get()
+            if task is None:
+                break
+            idx, base_url, restaurant_name, district = task
+            t0 = time.time()
+
+            def emit(docs, idx=idx, restaurant_name=restaurant_name, district=district):
+                # result_q có giới hạn -> worker chờ nếu writer chưa kịp ghi, RAM không phình
+                result_q.put(("batch", wid, idx, restaurant_name, district, docs))
+
+            try:
+                # lỗi browser -> chạy lại cả quán (mở Firefox mới nếu cần), hết lượt mới báo lỗi
+                res = driver.run(crawl_one_restaurant, wait, base_url, restaurant_name, district, emit=emit)
+                result_q.put(("ok", wid, idx, restaurant_name, district, res))
+            except RestartLimitError as e:
+                # hết lượt khởi động lại -> quán nào sau cũng lỗi ngay, dừng worker này (quán còn lại để worker khác)
+                result_q.put(("err", wid, idx, restaurant_name, district, str(e)))
+                raise
+            except Exception as e:
+                result_q.put(("err", wid, idx, restaurant_name, district, str(e)))
+            stats[wid]["restaurants"] += 1
+            stats[wid]["busy_seconds"] += time.time() - t0
+            stats[wid].update(driver.stats())
+    except Exception as e:
+        # không mở được browser / hết lượt khởi động lại -> các worker khác vẫn chạy tiếp
+        print(f" Worker {wid} dừng: {e}")
+    finally:
+        if driver is not None:
+            try:
+                driver.quit()
+            except:
+                pass
+        result_q.put(("done", wid, None, None, None, None))
+
 total_new = 0
 total_upd = 0
 total_skip = 0
+bench_rows = []   # (n_review, giây element, giây js, lệch) khi BENCHMARK_EXTRACT
+wait_rows = []    # (số lần bấm "Xem thêm", giây tiết kiệm) mỗi quán
+incr_rows = []    # (dừng sớm?, số review đã tải, số review mới) mỗi quán cào lại khi INCREMENTAL_RECRAWL
+mem_rows = []     # (số review đã tải, node DOM tối đa, MB browser tối đa, MB Python tối đa) mỗi quán khi STREAM_HARVEST
+streamed = {}     # idx -> set review_id đã nhận theo lô của quán đang cào (STREAM_HARVEST), xoá khi quán xong
+
+task_q = queue.Queue()
+result_q = queue.Queue(maxsize=NUM_WORKERS * 2)   # giới hạn để RAM không phình nếu Mongo chậm
 
 for idx, row in df_in.iterrows():
     base_url = row["restaurant_url"]
-    restaurant_name = row["restaurant_name"]
-    district = row["district"]
-
     if not base_url or base_url.lower() == "nan":
         total_skip += 1
         continue
-
-    comment_url = to_comment_url(base_url)
-
-    try:
-        driver.get(comment_url)
-        time.sleep(2)
-
-        # chờ có review list 
+    task_q.put((idx, base_url, row["restaurant_name"], row["district"]))
+
+n_workers = max(1, NUM_WORKERS)
+for _ in range(n_workers):
+    task_q.put(None)
+
+stats = {wid: {"restaurants": 0, "reviews": 0, "busy_seconds": 0.0, "restarts": 0, "retries": 0}
+         for wid in range(1, n_workers + 1)}
+threads = [threading.Thread(target=worker, args=(wid, task_q, result_q, stats), daemon=True) for wid in stats]
+print(f" Chạy {n_workers} worker")
+
+t_start = time.time()
+for t in threads:
+    t.start()
+
+# writer: luồng chính nhận kết quả và lưu Mongo theo lô
+# with: worker lỗi / Ctrl+C giữa chừng vẫn ghi nốt lô đang gom trong sink
+with BulkUpsertSink(col, batch_size=BULK_SIZE, flush_seconds=BULK_FLUSH_SECONDS) as sink:
+    done_workers = 0
+    while done_workers < n_workers:
         try:
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "ul.review-list, li.review-item")))
-        except TimeoutException:
-            # có thể quán không có bình luận
+            kind, wid, idx, restaurant_name, district, payload = result_q.get(timeout=1)
+        except queue.Empty:
+            sink.flush_if_due()
             continue
-        # load thêm đến khi hết
-        load_all_reviews()
-        time.sleep(1)
 
-        lis = driver.find_elements(By.CSS_SELECTOR, "li.review-item")
-        if not lis:
+        if kind == "done":
+            done_workers += 1
             continue
 
-        for li in lis:
-            data = parse_one_review(li, comment_url)
-
-            doc = {
-                "review_id": data["review_id"],
-                "restaurant_url": base_url,
-                "restaurant_name": restaurant_name,
-                "district": district,
-                "user_name": data["user_name"],
-                "user_rating": data["user_rating"],
-                "review_text": data["review_text"],
-                "media_urls": data["media_urls"],
-                "review_time": data["review_time"],
-                "scraped_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "source": "foody.vn"
-            }
-
-            res = col.update_one({"review_id": doc["review_id"]}, {"$set": doc}, upsert=True)
-            if res.upserted_id is not None:
-                total_new += 1
-            else:
-                if res.matched_count > 0:
-                    total_upd += 1
-
-        print(f"[{idx+1}/{len(df_in)}]  {district} | {restaurant_name} | reviews={len(lis)}")
+        if kind == "batch":
+            # STREAM_HARVEST: 1 lô review của quán đang cào -> ghi ngay, không đợi cả quán.
+            # Quán bị chạy lại sau lỗi sẽ gửi lại lô cũ -> chỉ ghi + đếm review_id chưa nhận của quán này.
+            seen = streamed.setdefault(idx, set())
+            fresh = [doc for doc in payload if doc["review_id"] not in seen]
+            for doc in fresh:
+                seen.add(doc["review_id"])
+                sink.add({"review_id": doc["review_id"]}, {"$set": doc})
+            stats[wid]["reviews"] += len(fresh)
+            continue
 
-    except Exception as e:
-        total_skip += 1
-        print(f"[{idx+1}/{len(df_in)}]  Lỗi: {e}")
+        if kind == "err":
+            total_skip += 1
+            streamed.pop(idx, None)
+            print(f"[{idx+1}/{len(df_in)}] [w{wid}]  Lỗi: {payload}")
+            if USE_SCHEDULE:
+                mark_crawled(db, df_in.at[idx, "restaurant_url"], 0, ok=False)
+            continue
+
+        docs, n_new = payload
+        docs = docs or []
+        n_docs = len(docs) + len(streamed.pop(idx, ()))
+        if USE_SCHEDULE:
+            # số review chưa có trong Mongo trước lần cào này (không phải số review đã tải)
+            mark_crawled(db, df_in.at[idx, "restaurant_url"], n_new if n_new is not None else n_docs)
+        if not n_docs:
+            continue
 
+        for doc in docs:
+            sink.add({"review_id": doc["review_id"]}, {"$set": doc})
+
+        stats[wid]["reviews"] += len(docs)
+        print(f"[{idx+1}/{len(df_in)}] [w{wid}]  {district} | {restaurant_name} | reviews={n_docs} | {limiter.rate(FOODY_HOST):.2f} req/s")
+
+total_new += sink.inserted
+total_upd += sink.updated
+total_skip += sink.skipped
+
+for t in threads:
+    t.join()
+elapsed = time.time() - t_start
+
+if bench_rows:
+    b_n = sum(r[0] for r in bench_rows)
+    b_el = sum(r[1] for r in bench_rows)
+    b_js = sum(r[2] for r in bench_rows)
+    b_bad = sum(r[3] for r in bench_rows)
+    print("========== BENCHMARK PARSE ==========")
+    print(f" {len(bench_rows)} quán | {b_n} review | lệch: {b_bad}")
+    if b_n:
+        print(f" element: {b_el:.2f}s ({b_n / b_el if b_el else 0:.0f} review/s) | js: {b_js:.2f}s ({b_n / b_js if b_js else 0:.0f} review/s)")
+
+# ====== THÔNG LƯỢNG THEO SỐ WORKER ======
+n_rest = sum(s["restaurants"] for s in stats.values())
+n_rev = sum(s["reviews"] for s in stats.values())
+rest_per_min = n_rest / elapsed * 60 if elapsed > 0 else 0
+rev_per_sec = n_rev / elapsed if elapsed > 0 else 0
+
+print("========== THÔNG LƯỢNG ==========")
+for wid, s in stats.items():
+    per_min = s["restaurants"] / s["busy_seconds"] * 60 if s["busy_seconds"] > 0 else 0
+    print(f" Worker {wid}: {s['restaurants']} quán | {s['reviews']} review | {per_min:.2f} quán/phút"
+          f" | khởi động lại {s['restarts']} | thử lại {s['retries']}")
+print(f" {n_workers} worker: {n_rest} quán trong {elapsed:.1f}s -> {rest_per_min:.2f} quán/phút | {rev_per_sec:.2f} review/s")
+
+n_clicks = sum(r[0] for r in wait_rows)
+t_saved = sum(r[1] for r in wait_rows)
+if n_clicks:
+    print(f" Xem thêm: {n_clicks} lần bấm | tiết kiệm ~{t_saved:.1f}s so với poll sleep(1) ({t_saved / n_clicks:.2f}s/lần bấm)")
+
+if incr_rows:
+    n_stop = sum(1 for r in incr_rows if r[0])
+    n_loaded = sum(r[1] for r in incr_rows)
+    n_fresh = sum(r[2] for r in incr_rows)
+    print(f" Cào lại: {len(incr_rows)} quán đã có dữ liệu, {n_stop} quán dừng sớm | tải {n_loaded} review, {n_fresh} review mới")
+
+if mem_rows:
+    big = max(mem_rows, key=lambda r: r[0])
+    peak_b = max((r[2] for r in mem_rows if r[2] is not None), default=None)
+    peak_p = max((r[3] for r in mem_rows if r[3] is not None), default=None)
+    print(f" Stream: quán lớn nhất {big[0]} review -> DOM tối đa {big[1]} node"
+          f" | browser tối đa {fmt_mb(peak_b)} | python tối đa {fmt_mb(peak_p)}")
+
+print(f" Tốc độ: {limiter.summary()}")
+if RATE_METRICS_CSV:
+    limiter.append_metrics_csv(RATE_METRICS_CSV, label=f"workers={n_workers}")
+
+if THROUGHPUT_CSV:
+    row_tp = pd.DataFrame([{
+        "run_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "workers": n_workers,
+        "restaurants": n_rest,
+        "reviews": n_rev,
+        "seconds": round(elapsed, 1),
+        "restaurants_per_min": round(rest_per_min, 2),
+        "reviews_per_sec": round(rev_per_sec, 2),
+    }])
+    row_tp.to_csv(THROUGHPUT_CSV, mode="a", index=False, header=not os.path.exists(THROUGHPUT_CSV), encoding="utf-8")
+    print(f" Đã ghi thông lượng vào {THROUGHPUT_CSV}")
 
 print("========== TỔNG KẾT ==========")
 print(" Insert mới:", total_new)
 print(" Update:", total_upd)
 print(" Lỗi:", total_skip)
 
+if REFRESH_STATS:
+    st = refresh_restaurant_stats(db)
+    print(f" restaurant_stats ({st['mode']}): cập nhật {st['restaurants']} quán trong {st['seconds']:.2f}s")
+
 # ================== 8. EXPORT FILE XLSX: ==================
-docs = list(col.find({}, {"_id": 0, "review_id": 0, "source": 0}))  
-df_out = pd.DataFrame(docs)
-if df_out.empty:
+# đọc cursor đã sort theo lô + openpyxl write-only -> không nạp cả collection vào RAM
+if col.find_one({}, {"_id": 1}) is None:
     print(" Chưa có dữ liệu để export.")
 else:
     order_cols = [
@@ -289,26 +685,16 @@ else:
         "user_name", "user_rating", "review_text",
         "media_urls", "review_time", "scraped_at"
     ]
-    for c in order_cols:
-        if c not in df_out.columns:
-            df_out[c] = None
-    df_out = df_out[order_cols]
-
-    df_out = df_out.sort_values(["district", "restaurant_name", "scraped_at"], na_position="last").reset_index(drop=True)
-
-    with pd.ExcelWriter(OUT_XLSX, engine="openpyxl") as writer:
-        df_out.to_excel(writer, sheet_name="ALL", index=False)
-
-        used = set(["ALL"])
-        for d, g in df_out.groupby("district", dropna=False):
-            sheet = safe_sheet_name(d)
-            base = sheet
-            i = 2
-            while sheet in used:
-                suffix = f"_{i}"
-                sheet = (base[:31-len(suffix)] + suffix) if len(base) + len(suffix) > 31 else base + suffix
-                i += 1
-            used.add(sheet)
-            g.to_excel(writer, sheet_name=sheet, index=False)
-    print(f" Đã xuất Excel: {OUT_XLSX}")
-
+    n_rows = export_xlsx_streaming(
+        col, OUT_XLSX, order_cols,
+        sort_keys=["district", "restaurant_name", "scraped_at"],
+        sheet_name_fn=safe_sheet_name,
+    )
+    print(f" Đã xuất Excel: {OUT_XLSX} ({n_rows} dòng)")
+
+    if OUT_PARQUET_DIR:
+        n_rows = export_parquet_streaming(
+            col, OUT_PARQUET_DIR, order_cols,
+            column_types={"user_rating": "float"},
+        )
+        print(f" Đã xuất Parquet: {OUT_PARQUET_DIR} ({n_rows} dòng)")
@@ -0,0 +1,115 @@
+# ================== BENCHMARK: PROFILE HIỆN TẠI vs LEAN ==================
+# Chạy từ thư mục gốc repo:
+#   python bench/bench_driver_profile.py record <url> [<url> ...]   -> lưu trang thật vào bench/pages
+#   python bench/bench_driver_profile.py                            -> đo thời gian load các trang đã lưu
+import os
+import sys
+import time
+import statistics
+
+from selenium import webdriver
+from selenium.webdriver.firefox.service import Service
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from foody_common.drivers import apply_lean_firefox, apply_lean_chrome, enable_lean_chrome_cdp
+from pages import serve_pages, list_pages, record_pages
+
+# ================== CẤU HÌNH ==================
+BROWSER = "firefox"   # "firefox" | "chrome"
+GECKO_PATH = r"C:/Users/User/OneDrive/Desktop/Ma Nguon Mo/DO AN CUOI KY/geckodriver.exe"
+FIREFOX_BINARY = r"C:/Program Files/Mozilla Firefox/firefox.exe"
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+ROUNDS = 3            # số lần load mỗi trang / mỗi profile
+
+PERF_JS = """
+var t = performance.timing;
+var res = performance.getEntriesByType('resource');
+var bytes = 0;
+for (var i = 0; i < res.length; i++) bytes += res[i].transferSize || 0;
+return {
+    dom_ms: t.domContentLoadedEventEnd - t.navigationStart,
+    load_ms: t.loadEventEnd - t.navigationStart,
+    resources: res.length,
+    bytes: bytes
+};
+"""
+
+def make_driver(lean: bool):
+    # lean=False: giống cấu hình các script hiện tại (có giao diện, tải đủ)
+    if BROWSER == "chrome":
+        opts = webdriver.ChromeOptions()
+        if lean:
+            apply_lean_chrome(opts)
+        driver = webdriver.Chrome(options=opts)
+        if lean:
+            enable_lean_chrome_cdp(driver)
+    else:
+        options = webdriver.firefox.options.Options()
+        options.binary_location = FIREFOX_BINARY
+        if lean:
+            apply_lean_firefox(options)
+        driver = webdriver.Firefox(service=Service(GECKO_PATH), options=options)
+    driver.set_page_load_timeout(60)
+    return driver
+
+def bench_profile(lean: bool, urls):
+    rows = []
+    driver = make_driver(lean)
+    try:
+        for url in urls:
+            for _ in range(ROUNDS):
+                driver.get("about:blank")
+                t0 = time.perf_counter()
+                driver.get(url)
+                wall = time.perf_counter() - t0
+                perf = driver.execute_script(PERF_JS) or {}
+                rows.append({"url": url, "wall": wall, **perf})
+    finally:
+        driver.quit()
+    return rows
+
+def summarize(rows, url):
+    rs = [r for r in rows if r["url"] == url]
+    return (
+        statistics.median(r["wall"] for r in rs),
+        statistics.median(r.get("resources", 0) for r in rs),
+        statistics.median(r.get("bytes", 0) for r in rs) / 1024,
+    )
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "record":
+        driver = make_driver(lean=False)
+        try:
+            record_pages(driver, sys.argv[2:], PAGES_DIR)
+        finally:
+            driver.quit()
+        return
+
+    files = list_pages(PAGES_DIR)
+    if not files:
+        print(f" Chưa có trang nào trong {PAGES_DIR}. Chạy: python bench/bench_driver_profile.py record <url> ...")
+        return
+
+    server, base = serve_pages(PAGES_DIR)
+    try:
+        urls = [base + f for f in files]
+        full = bench_profile(False, urls)
+        lean = bench_profile(True, urls)
+    finally:
+        server.shutdown()
+
+    print(f"========== {BROWSER}: {len(urls)} trang x {ROUNDS} lần (median) ==========")
+    print(f"{'trang':40} {'full s':>8} {'lean s':>8} {'x':>6} {'res full/lean':>14} {'KB full/lean':>16}")
+    tot_full = tot_lean = 0.0
+    for f, url in zip(files, urls):
+        w_full, r_full, kb_full = summarize(full, url)
+        w_lean, r_lean, kb_lean = summarize(lean, url)
+        tot_full += w_full
+        tot_lean += w_lean
+        speedup = w_full / w_lean if w_lean > 0 else 0
+        print(f"{f[:40]:40} {w_full:8.2f} {w_lean:8.2f} {speedup:6.1f} {r_full:>6.0f}/{r_lean:<7.0f} {kb_full:>7.0f}/{kb_lean:<8.0f}")
+    if tot_lean > 0:
+        print(f" Tổng: full {tot_full:.2f}s | lean {tot_lean:.2f}s | x{tot_full / tot_lean:.1f}")
+
+if __name__ == "__main__":
+    main()
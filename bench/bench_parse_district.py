@@ -0,0 +1,119 @@
+# ================== BENCHMARK: TÁCH QUẬN/HUYỆN ==================
+# Chạy từ thư mục gốc repo:
+#   python bench/bench_parse_district.py            -> 1.000.000 địa chỉ giả lập
+#   python bench/bench_parse_district.py 200000     -> số lượng tuỳ chọn
+# So sánh bản cũ (regex biên dịch lại mỗi lần, apply từng dòng) với engine foody_common.district,
+# đồng thời kiểm tra 2 bên cho cùng kết quả trên toàn bộ dữ liệu.
+import os
+import re
+import sys
+import time
+import random
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from foody_common.district import parse_district, parse_district_series
+
+N_ADDRESSES = 1_000_000
+N_UNIQUE = 50_000      # địa chỉ thật lặp lại nhiều (chi nhánh, cùng toà nhà...) -> tỉ lệ trùng ~ dữ liệu crawl
+SEED = 42
+
+# ================== BẢN CŨ (crawl_all_restaurants.py trước khi gom về foody_common) ==================
+def legacy_normalize_area_text(s: str) -> str:
+    s = re.sub(r"\s+", " ", (s or "").strip())
+    return s
+
+def legacy_parse_district(address: str) -> str:
+    if not address:
+        return "Unknown"
+    addr = legacy_normalize_area_text(address)
+    parts = [legacy_normalize_area_text(p) for p in addr.split(",") if legacy_normalize_area_text(p)]
+    for p in parts:
+        if re.match(r"^(Quận)\s+", p, flags=re.IGNORECASE):
+            tail = p[4:].strip()
+            return "Quận " + tail
+        if re.match(r"^(Huyện)\s+", p, flags=re.IGNORECASE):
+            tail = p[5:].strip()
+            return "Huyện " + tail
+    if re.search(r"\bthủ\s*đức\b", addr, flags=re.IGNORECASE):
+        return "TP. Thủ Đức"
+    for p in parts:
+        m = re.match(r"^Q\.?\s*(.+)$", p, flags=re.IGNORECASE)
+        if m:
+            tail = legacy_normalize_area_text(m.group(1))
+            return "Quận " + tail
+    return "Unknown"
+
+# ================== DỮ LIỆU GIẢ LẬP ==================
+STREETS = ["Nguyễn Huệ", "Lê Lợi", "Pasteur", "Hai Bà Trưng", "Cách Mạng Tháng 8", "Võ Văn Tần",
+           "Phan Xích Long", "Quang Trung", "Nguyễn Thị Minh Khai", "Võ Văn Ngân", "Lê Văn Việt"]
+WARDS = ["P. Bến Nghé", "Phường 5", "P. 12", "Phường Tân Định", "P. Linh Trung", ""]
+DISTRICT_FORMS = [
+    "Quận {n}", "quận {n}", "Q.{n}", "Q. {n}", "Q{n}",
+    "Quận Bình Thạnh", "Quận  Tân Phú", "Q. Gò Vấp", "Quận Phú Nhuận",
+    "Huyện Củ Chi", "Huyện Bình Chánh", "huyện Nhà Bè",
+    "TP. Thủ Đức", "Thủ Đức", "Tp Thủ  Đức",
+]
+CITY = ["TP. HCM", "Hồ Chí Minh", "TP.HCM", ""]
+
+def make_address(rnd: random.Random) -> str:
+    r = rnd.random()
+    if r < 0.02:
+        return rnd.choice(["", "   ", "Đang cập nhật"])
+    street = f"{rnd.randint(1, 999)} {rnd.choice(STREETS)}"
+    district = rnd.choice(DISTRICT_FORMS).format(n=rnd.randint(1, 12))
+    pieces = [street, rnd.choice(WARDS), district, rnd.choice(CITY)]
+    if r < 0.06:
+        pieces.remove(district)            # thiếu quận
+    sep = rnd.choice([", ", ",", " , ", ",  "])
+    return sep.join(pieces)
+
+def make_addresses(n, n_unique, seed=SEED):
+    rnd = random.Random(seed)
+    pool = [make_address(rnd) for _ in range(n_unique)]
+    return [rnd.choice(pool) for _ in range(n)]
+
+# ================== ĐO ==================
+def timed(label, fn):
+    t0 = time.perf_counter()
+    out = fn()
+    sec = time.perf_counter() - t0
+    return label, sec, out
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_ADDRESSES
+    print(f" Sinh {n:,} địa chỉ ({N_UNIQUE:,} địa chỉ khác nhau)...")
+    addresses = make_addresses(n, min(N_UNIQUE, n))
+    series = pd.Series(addresses)
+
+    runs = []
+    runs.append(timed("cũ: apply từng dòng", lambda: series.apply(legacy_parse_district).tolist()))
+    runs.append(timed("mới: regex biên dịch, không cache",
+                      lambda: [parse_district.__wrapped__(a) for a in addresses]))
+    parse_district.cache_clear()
+    runs.append(timed("mới: + LRU cache", lambda: series.apply(parse_district).tolist()))
+    cache = parse_district.cache_info()
+    runs.append(timed("mới: vector hoá str.extract", lambda: parse_district_series(series).tolist()))
+
+    base_label, base_sec, expected = runs[0]
+    print("\n" + "=" * 72)
+    print(f"{'Cách tính':<38}{'Giây':>9}{'Địa chỉ/s':>14}{'x nhanh':>9}")
+    print("-" * 72)
+    for label, sec, out in runs:
+        print(f"{label:<38}{sec:>9.2f}{n / sec:>14,.0f}{base_sec / sec:>9.1f}")
+    print("-" * 72)
+    print(f" LRU: hit={cache.hits:,} miss={cache.misses:,} (maxsize={cache.maxsize:,})")
+
+    ok = True
+    for label, _, out in runs[1:]:
+        diff = [i for i, (a, b) in enumerate(zip(expected, out)) if a != b]
+        if diff:
+            ok = False
+            i = diff[0]
+            print(f" KHÁC bản cũ ({label}): {len(diff):,} dòng, vd {addresses[i]!r}: {expected[i]!r} vs {out[i]!r}")
+    if ok:
+        print(" Kết quả giống hệt bản cũ trên toàn bộ dữ liệu")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# ================== BENCHMARK PARSER OFFLINE (KHÔNG CẦN MẠNG KHI ĐO) ==================
+# Chạy từ thư mục gốc repo:
+#   python bench/bench_parsers.py record listing=<url> detail=<url> comments=<url> profile=<url>
+#       -> (cần mạng) lưu trang Foody thật vào bench/pages/parsers/ (bấm "Xem thêm" RECORD_MORE lần
+#          ở trang danh sách / bình luận để DOM cỡ thật), commit các file này
+#   python bench/bench_parsers.py          -> đo, so với baseline nếu có
+#   python bench/bench_parsers.py --save   -> đo rồi lưu làm baseline mới (commit cùng trang đã lưu)
+#   python bench/bench_parsers.py --fixtures -> ép dùng trang giả lập (bench/fixture_pages.py)
+# Có đủ 4 trang thật -> đo trên trang thật, baseline bench/parsers_baseline.json; parser ra 0 record
+# trên trang thật = selector không còn khớp Foody (selector drift) -> báo lỗi kể cả khi chưa có baseline.
+# Chưa có trang thật -> dùng trang giả lập (viết theo đúng selector đang đo, KHÔNG phát hiện được drift,
+# số đo không phản ánh DOM thật), baseline riêng bench/parsers_baseline_fixtures.json
+# (bản commit sẵn chỉ có số record; chạy --fixtures --save trên máy có browser để thêm round trip + tốc độ).
+# Hàm parse lấy thẳng từ các script (bench/script_loader.py). Với mỗi parser báo: record/s và số round trip
+# WebDriver (lệnh HTTP tới geckodriver/chromedriver) mỗi trang.
+import os
+import sys
+import json
+import hashlib
+import tempfile
+import statistics
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from selenium.webdriver.common.by import By
+from foody_common.listing import collect_new_cards
+from foody_common.waits import prepare_growth_wait, wait_for_growth
+from foody_common.ratelimit import AdaptiveRateLimiter
+from pages import serve_pages, save_rendered_page
+from fixture_pages import write_fixture_pages, PAGES as FIXTURE_PAGES
+from script_loader import load_functions, NoSleepTime
+from bench_driver_profile import make_driver
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REAL_PAGES_DIR = os.path.join(BENCH_DIR, "pages", "parsers")
+BASELINE_FILE = os.path.join(BENCH_DIR, "parsers_baseline.json")
+FIXTURE_BASELINE_FILE = os.path.join(BENCH_DIR, "parsers_baseline_fixtures.json")
+RECORD_MORE = 20      # số lần bấm "Xem thêm" trước khi lưu trang danh sách / bình luận
+WAIT_GROW_TIMEOUT = 20
+# trang -> (item, nút "Xem thêm") giống selector của script cào tương ứng
+MORE_SELECTORS = {
+    "listing.html": ("div.content-item", "a.fd-btn-more, #scrollLoadingPage a"),
+    "comments.html": ("li.review-item", "div.pn-loadmore a.fd-btn-more"),
+}
+ROUNDS = 3            # lấy median
+# hàm mở trang qua limiter.get (crawl_user_profile...): server local, không giới hạn để chỉ đo parse
+BENCH_LIMITER = AdaptiveRateLimiter(start_rate=1000, max_rate=1000, burst=1000, adaptive=False)
+TOLERANCE = 0.25      # chậm hơn baseline quá 25% -> báo hồi quy (round trip phải khớp tuyệt đối)
+
+class RoundTripCounter:
+    """Đếm số lệnh WebDriver: mọi find_element/text/get_attribute/execute_script đều đi qua driver.execute."""
+
+    def __init__(self, driver):
+        self.n = 0
+        orig = driver.execute
+
+        def counted(*args, **kwargs):
+            self.n += 1
+            return orig(*args, **kwargs)
+
+        driver.execute = counted
+
+# ================== CÁC PARSER CẦN ĐO ==================
+# (tên, script, các hàm cần lấy, trang, hàm chạy -> số record, parser tự driver.get hay không)
+def _run_get_restaurant_items(ns, driver, url):
+    return len(ns["get_restaurant_items"]())
+
+def _run_collect_new_cards(ns, driver, url):
+    collected = {}
+    collect_new_cards(driver, collected)
+    return len(collected)
+
+def _run_parse_one_review(ns, driver, url):
+    lis = driver.find_elements(By.CSS_SELECTOR, "li.review-item")
+    return len([ns["parse_one_review"](li, url) for li in lis])
+
+def _run_parse_all_reviews_js(ns, driver, url):
+    return len(ns["parse_all_reviews_js"](driver, url))
+
+def _run_scrape_the_loai_quan(ns, driver, url):
+    return 1 if ns["scrape_the_loai_quan"](driver) else 0
+
+def _run_scrape_scores(ns, driver, url):
+    return 1 if ns["scrape_scores"](driver)["diem_tb_tieu_chi"] is not None else 0
+
+def _run_crawl_restaurant_and_foods(ns, driver, url):
+    res_doc, foods = ns["crawl_restaurant_and_foods"](driver, url)
+    return len(foods)
+
+def _run_parse_review_item(ns, driver, url):
+    restaurant = {"id": "1", "name": "Quán ăn số 1", "url": url}
+    items = driver.find_elements(By.CSS_SELECTOR, ".review-item")
+    return len([ns["parse_review_item"](driver, it, restaurant) for it in items])
+
+def _run_crawl_user_profile(ns, driver, url):
+    return 1 if ns["crawl_user_profile"](driver, url) else 0
+
+PARSERS = [
+    ("get_restaurant_items", "restaurants/crawl_all_restaurants.py", ["get_restaurant_items"],
+     "listing.html", _run_get_restaurant_items, False),
+    ("collect_new_cards", None, [], "listing.html", _run_collect_new_cards, False),
+    ("parse_one_review", "Reviews/review_user_all.py", ["parse_one_review"],
+     "comments.html", _run_parse_one_review, False),
+    ("parse_all_reviews_js", "Reviews/review_user_all.py", ["parse_all_reviews_js"],
+     "comments.html", _run_parse_all_reviews_js, False),
+    ("scrape_the_loai_quan", "Reviews/review_restaurants_all.py", ["scrape_the_loai_quan"],
+     "detail.html", _run_scrape_the_loai_quan, False),
+    ("scrape_scores", "Reviews/review_restaurants_all.py", ["scrape_scores"],
+     "detail.html", _run_scrape_scores, False),
+    ("crawl_restaurant_and_foods", "python/test.py", ["crawl_restaurant_and_foods"],
+     "detail.html", _run_crawl_restaurant_and_foods, True),
+    ("parse_review_item (Cào dữ liệu)", "python/Cào dữ liệu.py", ["parse_review_item"],
+     "comments.html", _run_parse_review_item, False),
+    ("parse_review_item (test1)", "python/test1.py", ["parse_review_item"],
+     "comments.html", _run_parse_review_item, False),
+    ("crawl_user_profile", "python/Cào dữ liệu.py", ["crawl_user_profile"],
+     "profile.html", _run_crawl_user_profile, True),
+]
+
+def bench_parser(driver, counter, spec, base_url):
+    label, script, names, page, run, loads_page = spec
+    ns = {}
+    if script:
+        ns = load_functions(os.path.join(ROOT, script), names,
+                            inject={"driver": driver, "time": NoSleepTime(), "limiter": BENCH_LIMITER})
+    url = base_url + page
+    secs, trips, records = [], [], 0
+    for _ in range(ROUNDS):
+        if not loads_page:
+            driver.get(url)
+        counter.n = 0
+        t0 = time.perf_counter()
+        records = run(ns, driver, url)
+        secs.append(time.perf_counter() - t0)
+        trips.append(counter.n)
+    sec = statistics.median(secs)
+    return {
+        "parser": label, "page": page, "records": records,
+        "seconds": sec, "records_per_sec": records / sec if sec > 0 else 0.0,
+        "round_trips": int(statistics.median(trips)),
+    }
+
+def load_more(driver, page):
+    """Bấm "Xem thêm" tối đa RECORD_MORE lần để trang lưu lại có DOM cỡ như lúc cào thật."""
+    if page not in MORE_SELECTORS:
+        return
+    item_sel, more_sel = MORE_SELECTORS[page]
+    prepare_growth_wait(driver)
+    last = len(driver.find_elements(By.CSS_SELECTOR, item_sel))
+    for _ in range(RECORD_MORE):
+        btns = driver.find_elements(By.CSS_SELECTOR, more_sel)
+        if not btns:
+            break
+        driver.execute_script("arguments[0].click();", btns[0])
+        res = wait_for_growth(driver, item_sel, last, WAIT_GROW_TIMEOUT, more_selector=more_sel)
+        if res["status"] != "grown":
+            break
+        last = res["count"]
+    print(f"   {page}: {last} {item_sel}")
+
+def record(args):
+    from foody_common.session import SessionStore
+
+    urls = dict(a.split("=", 1) for a in args if "=" in a)
+    unknown = set(urls) - {name[:-5] for name in FIXTURE_PAGES}
+    if unknown or not urls:
+        print(" Dùng: record listing=<url> detail=<url> comments=<url> profile=<url>")
+        return
+    driver = make_driver(lean=False)
+    try:
+        # trang thành viên / bình luận có thể cần đăng nhập -> dùng phiên đã lưu nếu có
+        SessionStore().apply(driver)
+        for kind, url in urls.items():
+            page = kind + ".html"
+            driver.get(url)
+            load_more(driver, page)
+            path = save_rendered_page(driver, url, os.path.join(REAL_PAGES_DIR, page), strip_scripts=True)
+            print(" Đã lưu:", path)
+    finally:
+        driver.quit()
+
+def real_pages_ready():
+    return all(os.path.exists(os.path.join(REAL_PAGES_DIR, name)) for name in FIXTURE_PAGES)
+
+def pages_sha(root):
+    h = hashlib.sha256()
+    for name in sorted(FIXTURE_PAGES):
+        with open(os.path.join(root, name), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+def compare(results, baseline, same_pages=True):
+    # số đo nào trong baseline là null (chưa đo được, vd baseline chỉ có số record) -> bỏ qua số đó
+    flagged = []
+    for r in results:
+        b = baseline.get(r["parser"])
+        if not b:
+            continue
+        if b.get("round_trips") is not None and r["round_trips"] != b["round_trips"] and same_pages:
+            flagged.append(f"{r['parser']}: round trip {b['round_trips']} -> {r['round_trips']}")
+        if b.get("records") is not None and r["records"] != b["records"] and same_pages:
+            flagged.append(f"{r['parser']}: số record {b['records']} -> {r['records']}")
+        if b.get("records_per_sec") and r["records_per_sec"] < b["records_per_sec"] * (1 - TOLERANCE):
+            flagged.append(f"{r['parser']}: {b['records_per_sec']:.0f} -> {r['records_per_sec']:.0f} record/s")
+    return flagged
+
+def run_bench(root):
+    server, base_url = serve_pages(root)
+    driver = make_driver(lean=True)
+    counter = RoundTripCounter(driver)
+    try:
+        return [bench_parser(driver, counter, spec, base_url) for spec in PARSERS]
+    finally:
+        driver.quit()
+        server.shutdown()
+
+def main():
+    argv = sys.argv[1:]
+    if argv and argv[0] == "record":
+        record(argv[1:])
+        return
+    save = "--save" in argv
+    real = real_pages_ready() and "--fixtures" not in argv
+
+    if real:
+        source, baseline_file = "trang thật " + REAL_PAGES_DIR, BASELINE_FILE
+        sha = pages_sha(REAL_PAGES_DIR)
+        results = run_bench(REAL_PAGES_DIR)
+    else:
+        source, baseline_file = "trang giả lập (không phát hiện được selector drift)", FIXTURE_BASELINE_FILE
+        with tempfile.TemporaryDirectory() as root:
+            write_fixture_pages(root)
+            sha = pages_sha(root)
+            results = run_bench(root)
+
+    print(f" Nguồn: {source}")
+    print("=" * 92)
+    print(f"{'Parser':<34}{'Trang':<15}{'Record':>8}{'Giây':>9}{'Record/s':>11}{'Round trip':>12}")
+    print("-" * 92)
+    for r in results:
+        print(f"{r['parser']:<34}{r['page']:<15}{r['records']:>8}{r['seconds']:>9.3f}"
+              f"{r['records_per_sec']:>11,.0f}{r['round_trips']:>12}")
+    print("-" * 92)
+
+    flagged = []
+    if real:
+        # trang thật mà parser không đọc được gì -> selector đã lệch so với Foody
+        flagged += [f"{r['parser']}: 0 record trên {r['page']} thật (selector drift?)" for r in results if not r["records"]]
+
+    if save:
+        data = {r["parser"]: r for r in results}
+        data["_meta"] = {"source": "real" if real else "fixtures", "pages_sha": sha,
+                         "run_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+        with open(baseline_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(" Đã lưu baseline:", baseline_file)
+    elif os.path.exists(baseline_file):
+        with open(baseline_file, encoding="utf-8") as f:
+            baseline = json.load(f)
+        same_pages = (baseline.get("_meta") or {}).get("pages_sha") == sha
+        if not same_pages:
+            print(" Trang đã lưu khác lúc lấy baseline -> chỉ so tốc độ, không so số record / round trip")
+        flagged += compare(results, baseline, same_pages)
+
+    if flagged:
+        print(" HỒI QUY:")
+        for msg in flagged:
+            print("  -", msg)
+        sys.exit(1)
+    if not save and os.path.exists(baseline_file):
+        print(" Không có hồi quy so với baseline")
+
+if __name__ == "__main__":
+    main()
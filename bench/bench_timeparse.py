@@ -0,0 +1,99 @@
+# ================== BENCHMARK: ĐỌC THỜI GIAN REVIEW ==================
+# Chạy từ thư mục gốc repo:
+#   python bench/bench_timeparse.py            -> so khớp + đo trên 200.000 chuỗi
+#   python bench/bench_timeparse.py 50000      -> số lượng tuỳ chọn
+# 1) Với mỗi mốc "bây giờ" cố định, mọi chuỗi trong bench/fixtures/review_times.txt phải cho cùng kết quả
+#    như dateparser.parse(languages=["vi"], TIMEZONE Asia/Ho_Chi_Minh) -> đúng cấu hình to_iso cũ.
+# 2) Đo tốc độ trên chuỗi giả lập theo tỉ lệ gần với dữ liệu thật (đa số dd/mm/yyyy HH:MM).
+import os
+import sys
+import time
+import random
+from datetime import datetime
+
+import dateparser
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from foody_common.timeparse import parse_vi_datetime, _classify
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "review_times.txt")
+N_TEXTS = 200_000
+N_DATEPARSER = 5_000    # dateparser rất chậm -> đo trên mẫu nhỏ rồi quy ra chuỗi/s
+SEED = 42
+
+# mốc giữa tháng, cuối tháng (lùi tháng bị cắt ngày), năm nhuận, sát nửa đêm
+BASES = [
+    datetime(2025, 3, 15, 10, 30, 45, 123456),
+    datetime(2025, 3, 31, 23, 59, 59),
+    datetime(2024, 2, 29, 0, 0, 1),
+    datetime(2025, 1, 1, 0, 0, 0),
+]
+
+def load_fixture(path=FIXTURE):
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip() and not line.startswith("#")]
+
+def old_parse(text, now):
+    return dateparser.parse(text, languages=["vi"],
+                            settings={"TIMEZONE": "Asia/Ho_Chi_Minh", "RELATIVE_BASE": now})
+
+def check_fixture(texts):
+    bad = 0
+    for now in BASES:
+        for t in texts:
+            a = old_parse(t, now)
+            b = parse_vi_datetime(t, now=now)
+            if a != b:
+                bad += 1
+                print(f" KHÁC [{now}] {t!r}: dateparser={a} nhanh={b}")
+    fast = sum(1 for t in texts if _classify(" ".join(t.split()).lower()) is not None)
+    print(f" Fixture: {len(texts)} chuỗi x {len(BASES)} mốc, {bad} khác dateparser; "
+          f"{fast}/{len(texts)} chuỗi đi đường nhanh")
+    return bad == 0
+
+def make_texts(n, seed=SEED):
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        r = rnd.random()
+        if r < 0.80:
+            out.append(f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/{rnd.randint(2015, 2025)} "
+                       f"{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}")
+        elif r < 0.95:
+            unit = rnd.choice(["phút", "giờ", "ngày", "tuần", "tháng", "năm"])
+            out.append(f"{rnd.randint(1, 30)} {unit} trước")
+        else:
+            out.append(rnd.choice(["hôm qua", "hôm nay", f"Hôm qua {rnd.randint(0, 23)}:{rnd.randint(0, 59):02d}"]))
+    return out
+
+def rate(fn, texts, now):
+    t0 = time.perf_counter()
+    for t in texts:
+        fn(t, now)
+    return len(texts) / (time.perf_counter() - t0)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_TEXTS
+    ok = check_fixture(load_fixture())
+
+    texts = make_texts(n)
+    now = BASES[0]
+    r_old = rate(old_parse, texts[:N_DATEPARSER], now)
+    _classify.cache_clear()
+    r_cold = rate(lambda t, b: parse_vi_datetime(t, now=b), texts, now)
+    r_warm = rate(lambda t, b: parse_vi_datetime(t, now=b), texts, now)
+    info = _classify.cache_info()
+
+    print("\n" + "=" * 60)
+    print(f"{'Cách đọc':<34}{'Chuỗi/s':>14}{'x nhanh':>10}")
+    print("-" * 60)
+    print(f"{'dateparser (to_iso cũ)':<34}{r_old:>14,.0f}{1.0:>10.1f}")
+    print(f"{'nhanh, cache rỗng':<34}{r_cold:>14,.0f}{r_cold / r_old:>10.1f}")
+    print(f"{'nhanh, cache đầy':<34}{r_warm:>14,.0f}{r_warm / r_old:>10.1f}")
+    print("-" * 60)
+    print(f" Cache: hit={info.hits:,} miss={info.misses:,} size={info.currsize:,}/{info.maxsize:,}")
+    if not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
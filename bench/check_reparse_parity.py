@@ -0,0 +1,141 @@
+# ================== KIỂM TRA PARSER SELENIUM VÀ PARSER CACHE HTML CHO CÙNG RECORD ==================
+# Chạy từ thư mục gốc repo:
+#   python bench/check_reparse_parity.py              -> trang thật bench/pages/parsers/ nếu đủ, không thì trang giả lập
+#   python bench/check_reparse_parity.py --fixtures   -> ép dùng trang giả lập (bench/fixture_pages.py)
+# Cùng 1 trang: mở bằng browser rồi chạy parser Selenium trong script (lấy qua bench/script_loader.py),
+# đồng thời parse file HTML đó bằng foody_common/reparse.py, so từng record (text đã gộp khoảng trắng).
+# Selector 2 phía cùng lấy từ foody_common/page_selectors.py; lệch ở đây = logic parse 2 bên đã khác nhau
+# (vd 1 bên thêm field / đổi cách lấy text) -> dựng lại Mongo từ cache sẽ ra dữ liệu khác lúc cào.
+# Có lệch -> in vài record đầu tiên bị lệch và thoát mã 1.
+import os
+import sys
+import tempfile
+
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from selenium.webdriver.common.by import By
+from foody_common.listing import collect_new_cards
+from foody_common.reviews import norm_text
+from foody_common.page_selectors import REVIEW_ITEM
+from foody_common import reparse
+from pages import serve_pages
+from fixture_pages import write_fixture_pages
+from script_loader import load_functions, NoSleepTime
+from bench_driver_profile import make_driver
+from bench_parsers import ROOT, REAL_PAGES_DIR, real_pages_ready
+
+SHOW_DIFFS = 5        # số record lệch in ra mỗi cặp parser
+COMMENT_KEYS = ["review_id", "user_name", "user_rating", "review_text", "media_urls", "review_time"]
+LISTING_KEYS = ["restaurant_url", "restaurant_name", "address", "district"]
+
+def _norm(v):
+    return norm_text(v) if isinstance(v, str) else v
+
+def _pick(rec, keys):
+    return {k: _norm(rec.get(k)) for k in keys}
+
+def _soup(root, page):
+    with open(os.path.join(root, page), encoding="utf-8") as f:
+        return BeautifulSoup(f.read(), reparse.HTML_PARSER)
+
+def _page_url(soup, served_url):
+    # trang thật được lưu kèm <base href> của Foody -> browser urljoin theo đó, reparse cũng phải vậy
+    base = soup.find("base", href=True)
+    return base["href"] if base is not None else served_url
+
+def _diff(label, selenium_recs, reparse_recs, key):
+    """So 2 list record theo khóa `key`. Trả về list dòng mô tả chỗ lệch."""
+    a = {r[key]: r for r in selenium_recs}
+    b = {r[key]: r for r in reparse_recs}
+    out = []
+    if len(a) != len(b):
+        out.append(f"{label}: Selenium {len(a)} record, reparse {len(b)} record")
+    for k in list(dict.fromkeys(list(a) + list(b))):
+        if a.get(k) != b.get(k):
+            out.append(f"{label} [{k}]:\n      selenium {a.get(k)}\n      reparse  {b.get(k)}")
+    return out
+
+# ================== TỪNG LOẠI TRANG ==================
+def check_comments(driver, root, base_url):
+    ns = load_functions(os.path.join(ROOT, "Reviews/review_user_all.py"), ["parse_one_review", "parse_all_reviews_js"],
+                        inject={"driver": driver, "time": NoSleepTime()})
+    soup = _soup(root, "comments.html")
+    url = _page_url(soup, base_url + "comments.html")
+    driver.get(base_url + "comments.html")
+    by_element = [_pick(ns["parse_one_review"](li, url), COMMENT_KEYS)
+                  for li in driver.find_elements(By.CSS_SELECTOR, REVIEW_ITEM)]
+    by_js = [_pick(r, COMMENT_KEYS) for r in ns["parse_all_reviews_js"](driver, url)]
+    cached = [_pick(r, COMMENT_KEYS) for r in
+              reparse.parse_comments_html(soup, {"url": url, "fetched_at": None, "meta": {}})]
+    return (len(cached),
+            _diff("parse_one_review vs reparse", by_element, cached, "review_id")
+            + _diff("parse_all_reviews_js vs reparse", by_js, cached, "review_id"))
+
+def check_restaurant(driver, root, base_url):
+    ns = load_functions(os.path.join(ROOT, "Reviews/review_restaurants_all.py"), ["scrape_the_loai_quan", "scrape_scores"],
+                        inject={"driver": driver, "time": NoSleepTime()})
+    soup = _soup(root, "detail.html")
+    driver.get(base_url + "detail.html")
+    selenium_rec = {"the_loai_quan": _norm(ns["scrape_the_loai_quan"](driver)), **ns["scrape_scores"](driver)}
+    cached = {"the_loai_quan": _norm(reparse.parse_the_loai_quan(soup)), **reparse.parse_scores(soup)}
+    diffs = []
+    for k in dict.fromkeys(list(selenium_rec) + list(cached)):
+        if selenium_rec.get(k) != cached.get(k):
+            diffs.append(f"scrape_* vs reparse [{k}]: selenium {selenium_rec.get(k)!r} | reparse {cached.get(k)!r}")
+    return 1, diffs
+
+def check_listing(driver, root, base_url):
+    ns = load_functions(os.path.join(ROOT, "restaurants/crawl_all_restaurants.py"), ["get_restaurant_items"],
+                        inject={"driver": driver, "time": NoSleepTime()})
+    soup = _soup(root, "listing.html")
+    url = _page_url(soup, base_url + "listing.html")
+    driver.get(base_url + "listing.html")
+    by_element = [_pick(r, LISTING_KEYS) for r in ns["get_restaurant_items"]()]
+    collected = {}
+    collect_new_cards(driver, collected)
+    by_js = [_pick(r, LISTING_KEYS) for r in collected.values()]
+    cached = [_pick(r, LISTING_KEYS) for r in reparse.parse_listing_html(soup, {"url": url, "meta": {}})]
+    return (len(cached),
+            _diff("get_restaurant_items vs reparse", by_element, cached, "restaurant_url")
+            + _diff("collect_new_cards vs reparse", by_js, cached, "restaurant_url"))
+
+CHECKS = [
+    ("comments", check_comments),
+    ("restaurant", check_restaurant),
+    ("listing", check_listing),
+]
+
+def run_checks(root):
+    server, base_url = serve_pages(root)
+    driver = make_driver(lean=True)
+    try:
+        return [(kind, *fn(driver, root, base_url)) for kind, fn in CHECKS]
+    finally:
+        driver.quit()
+        server.shutdown()
+
+def main():
+    real = real_pages_ready() and "--fixtures" not in sys.argv[1:]
+    if real:
+        print(" Nguồn: trang thật", REAL_PAGES_DIR)
+        results = run_checks(REAL_PAGES_DIR)
+    else:
+        print(" Nguồn: trang giả lập")
+        with tempfile.TemporaryDirectory() as root:
+            write_fixture_pages(root)
+            results = run_checks(root)
+
+    bad = 0
+    for kind, n, diffs in results:
+        status = "khớp" if not diffs else f"LỆCH {len(diffs)}"
+        print(f" {kind:<12}{n:>6} record  {status}")
+        for line in diffs[:SHOW_DIFFS]:
+            print("   -", line)
+        bad += len(diffs)
+    if bad:
+        sys.exit(1)
+    print(" Parser Selenium và reparse cho cùng record trên mọi trang")
+
+if __name__ == "__main__":
+    main()
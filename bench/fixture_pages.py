@@ -0,0 +1,112 @@
+# ================== TRANG FOODY GIẢ LẬP CHO BENCHMARK PARSER ==================
+# Sinh HTML tĩnh theo đúng các selector các script đang dùng (danh sách quán, trang quán,
+# trang bình luận, trang thành viên). Không cần mạng, nội dung cố định theo SEED -> số record
+# và số round trip mỗi lần chạy như nhau, so được giữa các commit.
+# Trang thật lưu bằng bench/bench_driver_profile.py record ... vẫn nằm riêng trong bench/pages.
+import os
+import random
+from html import escape
+
+SEED = 42
+N_CARDS = 200       # card trên trang danh sách
+N_DISHES = 60       # món trên trang quán
+N_REVIEWS = 100     # bình luận trên trang bình luận
+N_RECENT = 20       # review gần đây trên trang thành viên
+
+STREETS = ["Nguyễn Huệ", "Lê Lợi", "Pasteur", "Hai Bà Trưng", "Võ Văn Tần", "Phan Xích Long"]
+DISTRICTS = ["Quận 1", "Quận 3", "Quận 10", "Quận Bình Thạnh", "Quận Phú Nhuận", "Huyện Củ Chi", "TP. Thủ Đức"]
+WORDS = ["ngon", "rẻ", "quán", "sạch", "phục vụ", "nhanh", "không gian", "đẹp", "món", "nướng", "lẩu", "ổn"]
+
+def _page(title, body):
+    return f"""<!DOCTYPE html>
+<html lang="vi"><head><meta charset="utf-8"><title>{escape(title)}</title></head>
+<body>
+{body}
+</body></html>
+"""
+
+def _sentence(rnd, n_words):
+    return " ".join(rnd.choice(WORDS) for _ in range(n_words)).capitalize() + "."
+
+def listing_html(rnd, n=N_CARDS):
+    cards = []
+    for i in range(n):
+        addr = f"{rnd.randint(1, 300)} {rnd.choice(STREETS)}, P. {rnd.randint(1, 15)}, {rnd.choice(DISTRICTS)}, TP. HCM"
+        cards.append(f"""<div class="content-item">
+  <div class="avatar"><a href="/ho-chi-minh/quan-an-{i}"><img src="/img/{i}.jpg"></a></div>
+  <div class="title"><a class="ng-binding" href="/ho-chi-minh/quan-an-{i}">Quán ăn số {i}</a></div>
+  <div class="desc">{escape(addr)}</div>
+</div>""")
+    more = '<div id="scrollLoadingPage"><a class="fd-btn-more">Xem thêm</a></div>'
+    return _page("Danh sách quán", '<div class="row-view-right">\n' + "\n".join(cards) + "\n</div>\n" + more)
+
+def detail_html(rnd, n=N_DISHES):
+    rows = "".join(
+        f"<tr><td>{label}</td><td><b>{rnd.uniform(5, 10):.1f}</b></td></tr>"
+        for label in ["Vị trí", "Giá cả", "Chất lượng", "Phục vụ", "Không gian"]
+    )
+    dishes = "\n".join(f'<div class="menu-item-name">Món đặc biệt {i}</div>' for i in range(n))
+    footer = "\n".join(f'<a class="txt-menu-item">{t}</a>' for t in ["Giới thiệu", "Điều khoản", "Liên hệ", "Tuyển dụng"])
+    body = f"""<h1 class="main-info-title">Quán ăn số 1</h1>
+<div class="res-common-add"><span>12 Nguyễn Huệ, P. Bến Nghé, Quận 1, TP. HCM</span></div>
+<div class="category">
+  <div class="category-items"><a>Quán ăn</a><a>Ăn vặt/vỉa hè</a></div>
+  <div class="category-cuisines"><a>Món Việt</a><a>Món Bắc</a></div>
+</div>
+<div class="micro-home-point"><div class="micro-home-static"><table><tbody>{rows}</tbody></table></div></div>
+<div class="menu">{dishes}</div>
+<div class="footer">{footer}</div>"""
+    return _page("Quán ăn số 1", body)
+
+def _review_li(rnd, i):
+    rid = 3_900_000 + i
+    when = f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/{rnd.randint(2019, 2025)} {rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}"
+    photos = "".join(
+        f'<li><img src="https://image.foody.vn/res/g{rid}/{k}.jpg" data-original="https://image.foody.vn/res/g{rid}/{k}.jpg"></li>'
+        for k in range(rnd.randint(0, 3))
+    )
+    video = f'<a class="foody-video" data-video-url="/video/{rid}.mp4">video</a>' if rnd.random() < 0.1 else ""
+    # gộp class/selector của các script (Reviews/ và python/) để mỗi parser đều có dữ liệu mà đọc
+    return f"""<li class="review-item" data-id="{rid}">
+  <div class="review-user">
+    <div class="user-name"><a class="ru-username username" href="/thanh-vien/user{i}">Thành viên {i}</a></div>
+    <span class="ru-time time review-date" title="{when}">{when}</span>
+  </div>
+  <div class="review-points point" data-review="review_{rid}"><span class="ng-binding">{rnd.uniform(3, 10):.1f}</span></div>
+  <div class="rating" data-rating="{rnd.randint(1, 5)}"></div>
+  <div class="review-des rd-des"><div>{escape(_sentence(rnd, rnd.randint(10, 60)))}</div></div>
+  <ul class="review-photos">{photos}</ul>{video}
+  <span class="like-count">{rnd.randint(0, 50)}</span>
+</li>"""
+
+def comments_html(rnd, n=N_REVIEWS):
+    items = "\n".join(_review_li(rnd, i) for i in range(n))
+    return _page("Bình luận", f'<ul class="review-list">\n{items}\n</ul>')
+
+def profile_html(rnd, n=N_RECENT):
+    items = "\n".join(f"""<div class="review-item" data-id="{5_000_000 + i}">
+  <a class="place-name">Quán ăn số {rnd.randint(1, 500)}</a>
+  <div class="rating" data-rating="{rnd.randint(1, 5)}"></div>
+  <span class="time">{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/2024 {rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}</span>
+</div>""" for i in range(n))
+    body = f"""<div class="profile-name">Thành viên 7</div>
+<div class="join-date">05/11/2019</div>
+<div class="total-review">{n * 6} bài viết</div>
+{items}"""
+    return _page("Thành viên 7", body)
+
+PAGES = {
+    "listing.html": listing_html,
+    "detail.html": detail_html,
+    "comments.html": comments_html,
+    "profile.html": profile_html,
+}
+
+def write_fixture_pages(out_dir, seed=SEED):
+    """Ghi các trang giả lập vào out_dir, trả về list tên file."""
+    os.makedirs(out_dir, exist_ok=True)
+    rnd = random.Random(seed)
+    for name, fn in PAGES.items():
+        with open(os.path.join(out_dir, name), "w", encoding="utf-8") as f:
+            f.write(fn(rnd))
+    return list(PAGES)
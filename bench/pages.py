@@ -0,0 +1,58 @@
+# ================== TRANG FOODY ĐÃ LƯU + SERVER TĨNH CHO BENCHMARK ==================
+import os
+import re
+import time
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def serve_pages(root, port=0):
+    """
+    Phục vụ thư mục `root` qua http://127.0.0.1 trong 1 thread nền.
+    Trả về (server, base_url). Xong thì gọi server.shutdown().
+    """
+    handler = partial(QuietHandler, directory=root)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+def page_file_name(url: str) -> str:
+    slug = re.sub(r"[^a-zA-Z0-9]+", "-", url.split("://", 1)[-1]).strip("-")
+    return (slug[:100] or "page") + ".html"
+
+def list_pages(root):
+    if not os.path.isdir(root):
+        return []
+    return sorted(f for f in os.listdir(root) if f.endswith(".html"))
+
+def save_rendered_page(driver, url, path, strip_scripts=False):
+    """
+    Lưu page_source (DOM đã render) của trang đang mở vào path.
+    Chèn <base href> để css/js/ảnh tương đối vẫn trỏ về foody khi mở lại từ localhost.
+    strip_scripts=True: bỏ thẻ <script> -> mở lại không chạy Angular render chồng lên DOM đã lưu
+    (trang cho benchmark parser cần DOM đứng yên).
+    """
+    html = driver.page_source
+    if strip_scripts:
+        html = re.sub(r"<script\b[^>]*>.*?</script\s*>", "", html, flags=re.IGNORECASE | re.DOTALL)
+    html = re.sub(r"<head([^>]*)>", lambda m: f'<head{m.group(1)}><base href="{url}">', html, count=1, flags=re.IGNORECASE)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+    return path
+
+def record_pages(driver, urls, out_dir, settle_seconds=3):
+    """Mở từng URL bằng driver và lưu DOM đã render vào out_dir (tên file theo URL)."""
+    os.makedirs(out_dir, exist_ok=True)
+    saved = []
+    for url in urls:
+        driver.get(url)
+        time.sleep(settle_seconds)
+        path = save_rendered_page(driver, url, os.path.join(out_dir, page_file_name(url)))
+        saved.append(path)
+        print(" Đã lưu:", path)
+    return saved
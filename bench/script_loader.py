@@ -0,0 +1,78 @@
+# ================== LẤY HÀM TỪ SCRIPT MÀ KHÔNG CHẠY SCRIPT ==================
+# Các script crawl chạy thẳng từ trên xuống (mở Firefox, hỏi mật khẩu, kết nối Mongo...)
+# nên không import được. Ở đây đọc AST của file, chỉ lấy các hàm cần đo + những gì chúng dùng tới
+# (hàm khác, hằng số, import) rồi exec riêng -> benchmark gọi đúng code đang có trong repo.
+import ast
+import time
+import types
+
+class NoSleepTime(types.ModuleType):
+    """Module `time` thay thế: sleep() không ngủ, chỉ đếm -> đo thuần thời gian parse."""
+
+    def __init__(self):
+        super().__init__("time")
+        self.__dict__.update({k: getattr(time, k) for k in dir(time) if not k.startswith("__")})
+        self.slept = 0.0
+
+    def sleep(self, seconds):
+        self.slept += seconds
+
+def _bound_names(node):
+    if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+        return [node.name]
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return [(a.asname or a.name).split(".")[0] for a in node.names]
+    if isinstance(node, ast.Assign):
+        return [t.id for t in node.targets if isinstance(t, ast.Name)]
+    return []
+
+def _is_literal(node):
+    try:
+        ast.literal_eval(node)
+        return True
+    except ValueError:
+        return False
+
+def _used_names(node):
+    return {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}
+
+def load_functions(path, names, inject=None):
+    """
+    Trả về namespace (dict) chứa các hàm `names` lấy từ file `path`.
+    inject: tên -> object đặt sẵn vào namespace (vd driver global, time giả). Tên đã inject
+    thì không lấy từ script. Gán không phải literal (driver = webdriver.Firefox(...)) bị bỏ qua.
+    """
+    inject = dict(inject or {})
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    providers = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and not _is_literal(node.value):
+            continue
+        for n in _bound_names(node):
+            providers[n] = node   # định nghĩa sau cùng thắng, giống khi chạy script
+
+    picked, todo = [], list(names)
+    seen = set(inject)
+    while todo:
+        n = todo.pop()
+        if n in seen:
+            continue
+        seen.add(n)
+        node = providers.get(n)
+        if node is None:
+            if n in names:
+                raise NameError(f"Không thấy {n} trong {path}")
+            continue   # builtin hoặc biến cục bộ
+        if node not in picked:
+            picked.append(node)
+            if not isinstance(node, (ast.Import, ast.ImportFrom)):
+                todo.extend(_used_names(node))
+
+    # giữ thứ tự trong file: import/hằng số trước, hàm sau
+    picked.sort(key=lambda nd: nd.lineno)
+    module = ast.Module(body=picked, type_ignores=[])
+    ns = {"__name__": "bench_loaded", "__file__": path, **inject}
+    exec(compile(module, path, "exec"), ns)
+    return ns
@@ -0,0 +1 @@
+# Các hàm dùng chung cho các script cào Foody (Reviews/, restaurants/, python/)
@@ -0,0 +1,144 @@
+# ================== CHECKPOINT + CÀO TIẾP TRANG DANH SÁCH QUÁN ==================
+# Collection crawl_checkpoints, 1 document / trang danh sách (_id = key, vd "restaurants_all|<url>"):
+#   clicks, cards, more_url (request "Xem thêm" gần nhất có page=N, do net tracker trong waits.py ghi lại),
+#   page, done, started_at, updated_at
+# Card đã gom được ghi Mongo cùng lúc lưu checkpoint -> script chết giữa chừng chỉ mất phần từ checkpoint cuối.
+# Cào tiếp: gọi thẳng more_url từ trang sau page đã lưu (fetch trong browser, dùng cookie đăng nhập),
+# không phải mở lại trang và bấm "Xem thêm" lại từ đầu. Request đó không trả JSON danh sách quán
+# -> trả về None, script quay về bấm lại (card cũ đã nằm trong Mongo nên không mất gì).
+import json
+import re
+from datetime import datetime
+from urllib.parse import urljoin
+
+from pymongo.errors import DuplicateKeyError
+
+from foody_common.waits import LAST_PAGED_URL_JS
+
+CHECKPOINT_COL = "crawl_checkpoints"
+PAGE_PARAM_RE = re.compile(r"([?&]page=)(\d+)", re.I)
+
+# khóa chứa list quán / link / tên / địa chỉ trong JSON (thử lần lượt)
+ITEMS_KEYS = ("Items", "items", "Data", "data", "Result", "result")
+URL_KEYS = ("DetailUrl", "Url", "url", "detailUrl", "BranchUrl")
+NAME_KEYS = ("Name", "name", "Title", "title")
+ADDR_KEYS = ("Address", "address", "Addr")
+
+FETCH_TEXT_JS = """
+var url = arguments[0], callback = arguments[arguments.length - 1];
+fetch(url, {credentials: 'include', headers: {'X-Requested-With': 'XMLHttpRequest', 'Accept': 'application/json, text/plain, */*'}})
+    .then(function (r) { return r.text().then(function (t) { callback({status: r.status, text: t}); }); })
+    .catch(function (e) { callback({status: 0, text: String(e)}); });
+"""
+
+def page_of(url):
+    m = PAGE_PARAM_RE.search(url or "")
+    return int(m.group(2)) if m else None
+
+def with_page(url, page):
+    return PAGE_PARAM_RE.sub(lambda m: m.group(1) + str(page), url, count=1)
+
+def last_paged_url(driver):
+    try:
+        return driver.execute_script(LAST_PAGED_URL_JS)
+    except Exception:
+        return None
+
+def _find_items(data, depth=0):
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and depth < 3:
+        for k in ITEMS_KEYS:
+            if k in data:
+                found = _find_items(data[k], depth + 1)
+                if found is not None:
+                    return found
+    return None
+
+def _pick(d, keys):
+    for k in keys:
+        v = d.get(k)
+        if v:
+            return str(v).strip()
+    return ""
+
+def parse_listing_json(text, base_url):
+    """
+    Nội dung request "Xem thêm" -> list {href, name, addr} (cùng shape COLLECT_NEW_CARDS_JS,
+    đưa thẳng vào listing.add_card_rows). None nếu không phải JSON list quán.
+    """
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    items = _find_items(data)
+    if items is None:
+        return None
+    rows = []
+    for it in items:
+        if not isinstance(it, dict):
+            continue
+        href = _pick(it, URL_KEYS)
+        if not href:
+            continue
+        rows.append({"href": urljoin(base_url, href), "name": _pick(it, NAME_KEYS), "addr": _pick(it, ADDR_KEYS)})
+    if items and not rows:
+        return None   # có item nhưng không nhận ra khóa nào -> coi như không dùng được
+    return rows
+
+def fetch_listing_page(driver, url):
+    """1 trang của request "Xem thêm" -> list row, None nếu không parse được. Lỗi HTTP -> RuntimeError."""
+    driver.set_script_timeout(60)
+    res = driver.execute_async_script(FETCH_TEXT_JS, url) or {}
+    status = res.get("status")
+    if status != 200:
+        raise RuntimeError(f"HTTP {status}: {(res.get('text') or '')[:80]}")
+    return parse_listing_json(res.get("text") or "", url)
+
+class ListingCheckpoint:
+    """
+    ckpt = ListingCheckpoint(db[CHECKPOINT_COL], key)
+    state = ckpt.load()                         # None nếu chưa có / lần trước đã chạy xong
+    ckpt.save(clicks, n_cards, more_url)        # sau khi đã ghi card vào Mongo; không ghi đè checkpoint đi xa hơn
+    ckpt.finish(clicks, n_cards)                # tải hết danh sách -> lần sau bắt đầu lại từ đầu
+    """
+
+    def __init__(self, col, key):
+        self.col = col
+        self.key = key
+
+    def load(self):
+        doc = self.col.find_one({"_id": self.key})
+        if not doc or doc.get("done"):
+            return None
+        return doc
+
+    def save(self, clicks, cards, more_url=None):
+        """
+        clicks / cards / more_url / page ghi cùng 1 lệnh, chỉ khi clicks >= số đã lưu:
+        bấm lại từ đầu sau crash không làm lùi tiến độ, và page luôn đi cùng đúng số lần bấm của nó.
+        more_url None (chưa bắt được request) -> xoá more_url cũ, lần sau bấm lại thay vì nhảy tới page cũ.
+        """
+        now = datetime.now()
+        try:
+            self.col.update_one(
+                {"_id": self.key, "$or": [{"clicks": {"$lte": clicks}}, {"clicks": {"$exists": False}}]},
+                {
+                    "$set": {"clicks": clicks, "cards": cards, "more_url": more_url, "page": page_of(more_url),
+                             "updated_at": now, "done": False},
+                    "$setOnInsert": {"started_at": now},
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            pass   # checkpoint đã lưu đi xa hơn -> giữ nguyên
+
+    def finish(self, clicks, cards):
+        self.col.update_one(
+            {"_id": self.key},
+            {"$set": {"done": True, "clicks": clicks, "cards": cards, "updated_at": datetime.now()}},
+            upsert=True,
+        )
+
+    def reset(self):
+        self.col.delete_one({"_id": self.key})
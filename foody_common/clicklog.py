@@ -0,0 +1,57 @@
+# ================== ĐO THỜI GIAN TỪNG LẦN BẤM "XEM THÊM" ==================
+# Mỗi lần bấm ghi: chờ item mới (wait_for_growth), gom card (harvest), số node DOM, tổng item đã gom.
+# DOM phình -> các lần bấm cuối chậm dần; bật PRUNE_DOM thì hai cột thời gian phải gần như phẳng.
+# So nhanh bằng summary() (trung vị 10% lần bấm đầu vs 10% cuối), chi tiết xem file CSV.
+import csv
+import os
+import statistics
+from datetime import datetime
+
+COLS = ["run_at", "label", "click", "wait_s", "harvest_s", "total_s", "dom_nodes", "items"]
+
+class ClickLatencyLog:
+    """
+    log = ClickLatencyLog(label="prune")
+    log.record(click, res["waited"], harvest_s, dom_nodes(driver), len(collected))
+    print(log.summary()); log.append_csv("click_latency.csv")
+    """
+
+    def __init__(self, label=""):
+        self.label = label
+        self.run_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.rows = []
+
+    def record(self, click, wait_s, harvest_s, dom_nodes=None, items=None):
+        self.rows.append({
+            "click": click,
+            "wait_s": round(wait_s, 3),
+            "harvest_s": round(harvest_s, 3),
+            "total_s": round(wait_s + harvest_s, 3),
+            "dom_nodes": dom_nodes,
+            "items": items,
+        })
+
+    def _median(self, rows, key):
+        vals = [r[key] for r in rows if r[key] is not None]
+        return statistics.median(vals) if vals else None
+
+    def summary(self, frac=0.1) -> str:
+        if not self.rows:
+            return "chưa có lần bấm nào"
+        k = max(1, int(len(self.rows) * frac))
+        head, tail = self.rows[:k], self.rows[-k:]
+        t0, t1 = self._median(head, "total_s"), self._median(tail, "total_s")
+        n0, n1 = self._median(head, "dom_nodes"), self._median(tail, "dom_nodes")
+        ratio = f" (x{t1 / t0:.2f})" if t0 else ""
+        nodes = f" | DOM {n0:.0f} -> {n1:.0f} node" if n0 is not None and n1 is not None else ""
+        return f"{len(self.rows)} lần bấm | {k} lần đầu {t0:.2f}s -> {k} lần cuối {t1:.2f}s{ratio}{nodes}"
+
+    def append_csv(self, path):
+        """Ghi thêm các dòng của lần chạy này (tạo header nếu file mới), phân biệt bằng run_at + label."""
+        new_file = not os.path.exists(path)
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            if new_file:
+                w.writerow(COLS)
+            for r in self.rows:
+                w.writerow([self.run_at, self.label] + [r[c] for c in COLS[2:]])
@@ -0,0 +1,93 @@
+# ================== TÁCH QUẬN / HUYỆN TỪ ĐỊA CHỈ ==================
+# Một engine dùng chung cho mọi script:
+#   parse_district(address)        -> 1 địa chỉ (regex biên dịch sẵn + LRU cache)
+#   parse_district_series(series)  -> cả cột pandas (str.extract, không apply từng dòng)
+# Hai đường cho kết quả GIỐNG NHAU (kể cả các trường hợp lạ của bản cũ),
+# bench/bench_parse_district.py kiểm tra điều này trên 1 triệu địa chỉ.
+import re
+from functools import lru_cache
+
+DISTRICT_CACHE_SIZE = 65536   # địa chỉ lặp lại nhiều (cùng quán / cùng đường) -> cache theo chuỗi
+
+_WS_RE = re.compile(r"\s+")
+_QUAN_HUYEN_RE = re.compile(r"^(quận|huyện)\s+(.+)$", re.IGNORECASE)
+_THU_DUC_RE = re.compile(r"\bthủ\s*đức\b", re.IGNORECASE)
+_Q_SHORT_RE = re.compile(r"^Q\.?\s*(.+)$", re.IGNORECASE)
+
+# Bản cho cả cột: chạy trên địa chỉ đã gom khoảng trắng, mỗi "mảnh" nằm giữa 2 dấu phẩy.
+# Tail không được bắt đầu/kết thúc bằng khoảng trắng -> giống p.strip() của bản từng dòng.
+_SERIES_QUAN_HUYEN = r"(?i)(?:^|,)\s*(quận|huyện)\s+([^,\s](?:[^,]*[^,\s])?)\s*(?=,|$)"
+_SERIES_Q_SHORT = r"(?i)(?:^|,)\s*Q\.?\s*([^,\s](?:[^,]*[^,\s])?)\s*(?=,|$)"
+
+def normalize_area_text(s: str) -> str:
+    return _WS_RE.sub(" ", (s or "").strip())
+
+def _kind_prefix(kind: str) -> str:
+    return "Quận " if kind.lower() == "quận" else "Huyện "
+
+@lru_cache(maxsize=DISTRICT_CACHE_SIZE)
+def parse_district(address: str) -> str:
+    """
+    Tách khu vực từ địa chỉ:
+    - Quận + số (Quận 1..12...)
+    - Quận + chữ (Quận Tân Phú, Quận Bình Thạnh...)
+    - Huyện + chữ (Huyện Củ Chi...)
+    - TP. Thủ Đức (hoặc Thủ Đức)
+    Nếu không thấy -> Unknown (kể cả None / NaN của pandas / giá trị không phải chuỗi, giống bản Series)
+    """
+    if not address or not isinstance(address, str):
+        return "Unknown"
+
+    addr = normalize_area_text(address)
+
+    # Tách theo dấu phẩy -> thường có mảnh "Quận ...", "Huyện ..." (addr đã gom khoảng trắng, chỉ cần strip)
+    parts = [p for p in (x.strip() for x in addr.split(",")) if p]
+
+    # Ưu tiên mảnh bắt đầu bằng Quận/Huyện
+    for p in parts:
+        m = _QUAN_HUYEN_RE.match(p)
+        if m:
+            return _kind_prefix(m.group(1)) + m.group(2)
+
+    # Thủ Đức (có thể đứng riêng hoặc kèm TP.)
+    if _THU_DUC_RE.search(addr):
+        return "TP. Thủ Đức"
+
+    # Fallback kiểu Q.1 / Q1 / Q. Tan Phu
+    for p in parts:
+        m = _Q_SHORT_RE.match(p)
+        if m:
+            return "Quận " + m.group(1).strip()
+
+    return "Unknown"
+
+def parse_district_series(addresses):
+    """
+    Bản vector hoá của parse_district cho cả cột pandas (Series địa chỉ) -> Series district.
+    Thứ tự ưu tiên giữ nguyên: mảnh Quận/Huyện -> Thủ Đức -> Q./Q viết tắt -> Unknown.
+    """
+    import pandas as pd
+
+    # dtype object -> pandas dùng module re của Python (pandas 3 mặc định cột chuỗi pyarrow, regex kiểu RE2:
+    # \s, \b chỉ hiểu ASCII, lệch với bản từng dòng khi gặp \xa0 / chữ có dấu)
+    addr = addresses.astype(object)
+    addr = addr.where(addr.notna(), "")
+    addr = addr.str.replace(r"\s+", " ", regex=True).str.strip()
+
+    out = pd.Series("Unknown", index=addr.index, dtype=object)
+
+    qh = addr.str.extract(_SERIES_QUAN_HUYEN)
+    has_qh = qh[0].notna()
+    out[has_qh] = qh.loc[has_qh, 0].map(_kind_prefix) + qh.loc[has_qh, 1]
+
+    rest = ~has_qh & (addr != "")
+    thu_duc = rest & addr.str.contains(_THU_DUC_RE, regex=True)
+    out[thu_duc] = "TP. Thủ Đức"
+
+    rest &= ~thu_duc
+    if rest.any():
+        q = addr[rest].str.extract(_SERIES_Q_SHORT)[0]
+        q = q[q.notna()]
+        out[q.index] = "Quận " + q
+
+    return out
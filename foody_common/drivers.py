@@ -0,0 +1,55 @@
+# ================== PROFILE BROWSER "LEAN" ==================
+# Chỉ cần DOM + vài attribute -> chặn ảnh, media, font, host ngoài foody và chạy headless.
+import base64
+
+# host được phép tải (kèm subdomain), còn lại bị chặn qua PAC
+LEAN_ALLOWED_HOSTS = ("foody.vn", "localhost", "127.0.0.1")
+
+# Chrome: chặn thêm theo đuôi file qua CDP (Network.setBlockedURLs)
+LEAN_BLOCKED_URL_PATTERNS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ogg",
+]
+
+def lean_pac_url(allowed_hosts=LEAN_ALLOWED_HOSTS) -> str:
+    """
+    PAC script dạng data: URL. Host trong allowed_hosts đi thẳng,
+    host khác bị đẩy sang proxy 127.0.0.1:9 (không có gì lắng nghe) -> fail ngay, không chờ.
+    """
+    cond = " || ".join(f'host == "{h}" || dnsDomainIs(host, ".{h}")' for h in allowed_hosts)
+    pac = (
+        "function FindProxyForURL(url, host) {"
+        f" if ({cond}) return 'DIRECT';"
+        " return 'PROXY 127.0.0.1:9'; }"
+    )
+    return "data:application/x-ns-proxy-autoconfig;base64," + base64.b64encode(pac.encode("utf-8")).decode("ascii")
+
+def apply_lean_firefox(options, allowed_hosts=LEAN_ALLOWED_HOSTS):
+    """Gắn cấu hình lean vào webdriver.firefox.options.Options trước khi tạo driver."""
+    options.add_argument("-headless")
+    options.set_preference("permissions.default.image", 2)           # không tải ảnh
+    options.set_preference("gfx.downloadable_fonts.enabled", False)  # không tải web font
+    options.set_preference("browser.display.use_document_fonts", 0)
+    options.set_preference("media.autoplay.default", 5)              # chặn autoplay audio/video
+    options.set_preference("media.mediasource.enabled", False)
+    options.set_preference("privacy.trackingprotection.enabled", True)
+    options.set_preference("network.proxy.type", 2)                  # dùng PAC
+    options.set_preference("network.proxy.autoconfig_url", lean_pac_url(allowed_hosts))
+    return options
+
+def apply_lean_chrome(opts, allowed_hosts=LEAN_ALLOWED_HOSTS):
+    """Gắn cấu hình lean vào chrome Options. Sau khi tạo driver gọi thêm enable_lean_chrome_cdp."""
+    opts.add_argument("--headless=new")
+    opts.add_argument("--blink-settings=imagesEnabled=false")
+    opts.add_argument("--mute-audio")
+    opts.add_argument("--autoplay-policy=user-gesture-required")
+    opts.add_argument(f"--proxy-pac-url={lean_pac_url(allowed_hosts)}")
+    opts.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return opts
+
+def enable_lean_chrome_cdp(driver):
+    """Chặn font / media / ảnh theo đuôi file (Chrome DevTools Protocol)."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URL_PATTERNS})
+    return driver
@@ -0,0 +1,164 @@
+# ================== EXPORT EXCEL DẠNG STREAM (openpyxl write-only) ==================
+# Đọc cursor Mongo đã sort theo district, ghi từng dòng vào sheet ALL + sheet của district
+# -> không dựng DataFrame / list toàn bộ collection, RAM gần như không đổi theo số dòng.
+import os
+import re
+import shutil
+from datetime import datetime
+
+from openpyxl import Workbook
+
+def default_sheet_name(name) -> str:
+    # Excel: tên sheet <= 31 ký tự, không chứa : \ / ? * [ ]
+    name = re.sub(r'[:\\/?*\[\]]', ' ', str(name or "")).strip()
+    name = " ".join(name.split())
+    return name[:31] if name else "Unknown"
+
+def unique_sheet_name(name, used):
+    # tránh trùng tên sheet sau khi cắt 31 ký tự (giống cách làm ở review_user_all.py)
+    sheet = name
+    i = 2
+    while sheet in used:
+        suffix = f"_{i}"
+        sheet = (name[:31 - len(suffix)] + suffix) if len(name) + len(suffix) > 31 else name + suffix
+        i += 1
+    used.add(sheet)
+    return sheet
+
+def export_xlsx_streaming(col, out_path, columns, sort_keys, sheet_name_fn=None,
+                          query=None, group_field="district", batch_size=2000, all_sheet_name="ALL"):
+    """
+    Ghi `col` ra `out_path`: sheet ALL + mỗi giá trị `group_field` 1 sheet.
+    - columns      : thứ tự cột ghi ra (thiếu field thì để trống)
+    - sort_keys    : list field sort tăng dần, phải bắt đầu bằng group_field để các dòng cùng nhóm liền nhau
+    - sheet_name_fn: hàm làm sạch tên sheet của từng script (None -> default_sheet_name)
+    - group_field=None: chỉ ghi 1 sheet `all_sheet_name`
+    Trả về số dòng đã ghi.
+    """
+    if group_field and (not sort_keys or sort_keys[0] != group_field):
+        raise ValueError(f"sort_keys phải bắt đầu bằng '{group_field}'")
+    sheet_name_fn = sheet_name_fn or default_sheet_name
+
+    wb = Workbook(write_only=True)
+    ws_all = wb.create_sheet(all_sheet_name)
+    ws_all.append(list(columns))
+    used = {all_sheet_name}
+
+    projection = {"_id": 0}
+    for c in columns:
+        projection[c] = 1
+    if group_field:
+        projection[group_field] = 1
+
+    cursor = col.find(query or {}, projection, batch_size=batch_size)
+    if sort_keys:
+        cursor = cursor.sort([(k, 1) for k in sort_keys]).allow_disk_use(True)
+
+    n = 0
+    current_group = object()
+    ws_group = None
+    for doc in cursor:
+        row = [doc.get(c) for c in columns]
+        ws_all.append(row)
+        if group_field:
+            g = doc.get(group_field)
+            if g != current_group:
+                current_group = g
+                ws_group = wb.create_sheet(unique_sheet_name(sheet_name_fn(g), used))
+                ws_group.append(list(columns))
+            ws_group.append(row)
+        n += 1
+
+    wb.save(out_path)
+    return n
+
+# ================== EXPORT PARQUET CHIA THEO DISTRICT ==================
+# Dùng pyarrow (chỉ import khi gọi). Dữ liệu được dựng theo cột từng lô cursor,
+# không có list dict của cả collection.
+def _coerce(v, pa_type, pa):
+    if v is None:
+        return None
+    if pa.types.is_floating(pa_type):
+        try:
+            return float(v)
+        except (TypeError, ValueError):
+            return None
+    if pa.types.is_timestamp(pa_type):
+        return v if isinstance(v, datetime) else None
+    return str(v)
+
+def export_parquet_streaming(col, out_dir, columns, column_types=None, query=None,
+                             partition_field="district", batch_size=5000):
+    """
+    Ghi `col` ra thư mục Parquet chia theo `partition_field` kiểu hive (out_dir/district=.../*.parquet).
+    - columns     : các cột ghi ra (partition_field tự thêm nếu thiếu)
+    - column_types: {"user_rating": "float", "crawl_time": "timestamp"}; cột khác là string
+    Trả về số dòng đã ghi.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as pads
+
+    type_map = {"float": pa.float64(), "timestamp": pa.timestamp("us"), "string": pa.string()}
+    fields = list(columns)
+    if partition_field and partition_field not in fields:
+        fields.append(partition_field)
+    types = column_types or {}
+    schema = pa.schema([(c, type_map[types.get(c, "string")]) for c in fields])
+
+    projection = {"_id": 0}
+    for c in fields:
+        projection[c] = 1
+
+    counter = {"rows": 0}
+
+    def record_batches():
+        cols = {c: [] for c in fields}
+        n = 0
+        for doc in col.find(query or {}, projection, batch_size=batch_size):
+            for f in schema:
+                cols[f.name].append(_coerce(doc.get(f.name), f.type, pa))
+            n += 1
+            if n >= batch_size:
+                yield pa.RecordBatch.from_arrays([pa.array(cols[f.name], type=f.type) for f in schema], schema=schema)
+                counter["rows"] += n
+                cols = {c: [] for c in fields}
+                n = 0
+        if n:
+            yield pa.RecordBatch.from_arrays([pa.array(cols[f.name], type=f.type) for f in schema], schema=schema)
+            counter["rows"] += n
+
+    # xoá partition của lần export trước (chỉ các thư mục district=..., không đụng file khác)
+    if partition_field and os.path.isdir(out_dir):
+        for name in os.listdir(out_dir):
+            path = os.path.join(out_dir, name)
+            if name.startswith(partition_field + "=") and os.path.isdir(path):
+                shutil.rmtree(path)
+
+    partitioning = None
+    if partition_field:
+        partitioning = pads.partitioning(pa.schema([schema.field(partition_field)]), flavor="hive")
+
+    pads.write_dataset(
+        record_batches(), out_dir, schema=schema, format="parquet",
+        partitioning=partitioning,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return counter["rows"]
+
+def read_parquet_table(path, columns):
+    """
+    Đọc file/thư mục Parquet (kể cả thư mục chia district=...) thành DataFrame.
+    Cột partition đọc dạng chuỗi (không dictionary) để district null vẫn đọc được.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as pads
+
+    partitioning = pads.HivePartitioning.discover(infer_dictionary=False, schema=None)
+    dataset = pads.dataset(path, format="parquet", partitioning=partitioning)
+    missing = [c for c in columns if c not in dataset.schema.names]
+    if missing:
+        raise ValueError(f"Thiếu cột {missing} trong {path}")
+    table = dataset.to_table(columns=columns)
+    # partition toàn số (vd district=1) sẽ bị đoán là int -> đưa hết về chuỗi cho giống đọc Excel
+    table = table.cast(pa.schema([pa.field(f.name, pa.string()) if pa.types.is_integer(f.type) else f for f in table.schema]))
+    return table.to_pandas()
@@ -0,0 +1,94 @@
+# ================== CACHE HTML THÔ THEO NỘI DUNG (CONTENT-ADDRESSED) ==================
+# Crawler (tùy chọn) lưu page_source cuối cùng của mỗi trang đã cào:
+#   objects/ab/abcdef....html.gz   nội dung gzip, tên file = sha256 của HTML -> trang không đổi chỉ lưu 1 bản
+#   index.jsonl                    mỗi dòng {url, kind, sha, fetched_at, meta} (meta: tên quán, quận...)
+# Đổi selector trong parser -> chạy `python -m foody_common.reparse` dựng lại Mongo từ cache, không cần mở browser.
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(ROOT, "html_cache")
+GZIP_LEVEL = 6
+
+class HtmlCache:
+    """
+    cache = HtmlCache()
+    cache.put(url, driver.page_source, kind="comments", meta={...})   # trả về sha
+    for entry in cache.entries(kind="comments"): html = cache.read(entry["sha"])
+    Ghi được từ nhiều thread (khóa) và nhiều tiến trình (mỗi dòng index ghi bằng 1 lệnh append).
+    """
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        self.objects = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, "index.jsonl")
+        self._lock = threading.Lock()
+        os.makedirs(self.objects, exist_ok=True)
+
+    def _path(self, sha):
+        return os.path.join(self.objects, sha[:2], sha + ".html.gz")
+
+    def put(self, url, html, kind, meta=None) -> str:
+        data = (html or "").encode("utf-8")
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=GZIP_LEVEL) as f:
+                f.write(data)
+            os.replace(tmp, path)
+        line = json.dumps({
+            "url": url,
+            "kind": kind,
+            "sha": sha,
+            "fetched_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "meta": meta or {},
+        }, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        return sha
+
+    def read(self, sha) -> str:
+        with gzip.open(self._path(sha), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def entries(self, kind=None, latest_only=True):
+        """
+        Các dòng index (lọc theo kind). latest_only=True -> mỗi (kind, url) chỉ lấy lần cào gần nhất.
+        """
+        if not os.path.exists(self.index_path):
+            return []
+        rows = []
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue   # dòng ghi dở khi tiến trình bị ngắt
+                if kind and e.get("kind") != kind:
+                    continue
+                rows.append(e)
+        if not latest_only:
+            return rows
+        latest = {}
+        for e in rows:
+            latest[(e["kind"], e["url"])] = e   # index ghi theo thời gian -> dòng sau mới hơn
+        return list(latest.values())
+
+    def stats(self) -> dict:
+        n_obj, size = 0, 0
+        for d, _, files in os.walk(self.objects):
+            for fn in files:
+                if fn.endswith(".html.gz"):
+                    n_obj += 1
+                    size += os.path.getsize(os.path.join(d, fn))
+        return {"objects": n_obj, "bytes": size, "entries": len(self.entries(latest_only=False))}
@@ -0,0 +1,134 @@
+# ================== THU THẬP CARD QUÁN TRÊN TRANG DANH SÁCH ==================
+from urllib.parse import urljoin
+
+from foody_common.district import parse_district
+from foody_common.page_selectors import LISTING_JS_SELECTORS
+
+# Hàng đợi phần tử mới theo selector (window.__fdQueues[sel]): cài 1 lần cho mỗi trang,
+# quét toàn trang đúng 1 lần lúc cài, sau đó MutationObserver đẩy phần tử vừa được gắn vào DOM vào hàng đợi.
+# Mỗi lần poll chỉ lấy hết hàng đợi -> tốn theo số phần tử MỚI, không quét lại cả danh sách đang lớn dần.
+# Phần tử chưa bind xong (Angular render chậm, chưa có href) được trả lại hàng đợi qua fdRetry cho lần poll sau.
+# Trang mới (reload / browser khởi động lại) không còn window.__fdQueues -> tự cài lại.
+NEW_NODES_QUEUE_JS = """
+function fdTake(sel) {
+    var qs = window.__fdQueues = window.__fdQueues || {};
+    var q = qs[sel];
+    if (!q) {
+        q = qs[sel] = {items: Array.prototype.slice.call(document.querySelectorAll(sel)), retry: []};
+        new MutationObserver(function (muts) {
+            for (var i = 0; i < muts.length; i++) {
+                var added = muts[i].addedNodes;
+                for (var j = 0; j < added.length; j++) {
+                    var node = added[j];
+                    if (node.nodeType !== 1) continue;
+                    if (node.matches(sel)) q.items.push(node);
+                    var inner = node.querySelectorAll(sel);
+                    for (var k = 0; k < inner.length; k++) q.items.push(inner[k]);
+                }
+            }
+        }).observe(document.body || document.documentElement, {childList: true, subtree: true});
+    }
+    var out = q.retry.concat(q.items);
+    q.items = [];
+    q.retry = [];
+    return out;
+}
+function fdRetry(sel, el) { window.__fdQueues[sel].retry.push(el); }
+"""
+
+# Chỉ lấy card mới (hàng đợi trên), đánh dấu data-fd-seen để card bị báo lại (vd bị chèn lại) không lấy 2 lần.
+# prune=true (PRUNE_DOM): gom xong thì xoá hết nội dung bên trong card đó (cùng round trip).
+# Giữ lại thẻ card rỗng làm mốc cho ng-repeat chèn lô sau và để wait_for_growth vẫn đếm được số card.
+# Selector qua arguments[1] (LISTING_JS_SELECTORS, dùng chung với foody_common/reparse.py).
+COLLECT_NEW_CARDS_JS = NEW_NODES_QUEUE_JS + """
+var prune = arguments[0] || false, SEL = arguments[1], sel = SEL.card;
+var cards = fdTake(sel);
+var out = [];
+for (var i = 0; i < cards.length; i++) {
+    var card = cards[i];
+    if (card.hasAttribute('data-fd-seen') || !card.isConnected) continue;
+    var a = null;
+    for (var k = 0; k < SEL.links.length && !a; k++) a = card.querySelector(SEL.links[k]);
+    var href = a ? (a.href || a.getAttribute('href') || '') : '';
+    if (!href) { fdRetry(sel, card); continue; }
+    var desc = card.querySelector(SEL.addr);
+    card.setAttribute('data-fd-seen', '1');
+    out.push({href: href, name: a.innerText || '', addr: desc ? (desc.innerText || '') : ''});
+    if (prune) {
+        while (card.firstChild) card.removeChild(card.firstChild);
+    }
+}
+return out;
+"""
+
+# Như trên cho trang chỉ cần link (item = thẻ a). Card chứa link = closest(cardSel), không có thì chính thẻ a.
+# Xoá card thì số item giảm -> trả về cả số item còn lại để làm mốc cho wait_for_growth.
+COLLECT_NEW_LINKS_JS = NEW_NODES_QUEUE_JS + """
+var itemSel = arguments[0], cardSel = arguments[1], prune = arguments[2] || false;
+var items = fdTake(itemSel);
+var out = [];
+for (var i = 0; i < items.length; i++) {
+    var a = items[i];
+    if (!a.isConnected) continue;
+    var card = (cardSel && a.closest(cardSel)) || a;
+    if (card.hasAttribute('data-fd-seen')) continue;
+    var href = a.href || a.getAttribute('href') || '';
+    if (!href) { fdRetry(itemSel, a); continue; }
+    card.setAttribute('data-fd-seen', '1');
+    out.push(href);
+    if (prune) {
+        while (card.firstChild) card.removeChild(card.firstChild);
+    }
+}
+return {hrefs: out, remaining: document.querySelectorAll(itemSel).length};
+"""
+
+def collect_new_cards(driver, collected, default_district=None, prune=False):
+    """
+    Thu thập card mới xuất hiện từ lần gọi trước vào dict `collected` (restaurant_url -> item).
+    default_district: dùng khi địa chỉ không tách được quận (vd đang lọc theo 1 quận).
+    prune=True: xoá nội dung các card vừa gom khỏi DOM -> trang không phình theo số lần bấm "Xem thêm".
+    Trả về số card mới.
+    """
+    rows = driver.execute_script(COLLECT_NEW_CARDS_JS, prune, LISTING_JS_SELECTORS) or []
+    return add_card_rows(rows, driver.current_url, collected, default_district)
+
+def add_card_rows(rows, base_url, collected, default_district=None):
+    """
+    rows: list {href, name, addr} (từ COLLECT_NEW_CARDS_JS hoặc JSON của request "Xem thêm")
+    -> item vào dict `collected`. Trả về số row.
+    """
+    for r in rows:
+        href = (r.get("href") or "").strip()
+        if href.startswith("/"):
+            href = urljoin(base_url, href)
+        if not href:
+            continue
+        addr = (r.get("addr") or "").strip()
+        district = parse_district(addr)
+        if district == "Unknown" and default_district:
+            district = default_district
+        collected[href] = {
+            "restaurant_url": href,
+            "restaurant_name": (r.get("name") or "").strip(),
+            "address": addr,
+            "district": district,
+            "source": "foody.vn"
+        }
+    return len(rows)
+
+def collect_new_links(driver, item_selector, collected, card_selector=None, prune=False):
+    """
+    Gom href của các item (thẻ a) mới vào set `collected`.
+    Trả về (số link mới, số item còn trong DOM) - số sau dùng làm last_count cho wait_for_growth.
+    """
+    res = driver.execute_script(COLLECT_NEW_LINKS_JS, item_selector, card_selector or "", prune) or {}
+    new = 0
+    for href in res.get("hrefs") or []:
+        href = (href or "").strip()
+        if href.startswith("/"):
+            href = urljoin(driver.current_url, href)
+        if href and href not in collected:
+            collected.add(href)
+            new += 1
+    return new, int(res.get("remaining") or 0)
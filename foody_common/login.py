@@ -0,0 +1,38 @@
+# ================== ĐĂNG NHẬP id.foody.vn ==================
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+LOGIN_URL = "https://id.foody.vn/account/login?returnUrl=https://www.foody.vn/"
+
+def login_id_foody(driver, email, password, timeout=25) -> bool:
+    """
+    Đăng nhập qua form id.foody.vn rồi chờ redirect về foody.vn.
+    Trả về True nếu đã về foody.vn.
+    """
+    wait = WebDriverWait(driver, timeout)
+    driver.get(LOGIN_URL)
+
+    email_box = wait.until(EC.presence_of_element_located((By.ID, "Email")))
+    email_box.clear()
+    email_box.send_keys(email)
+
+    pass_box = wait.until(EC.presence_of_element_located((By.ID, "Password")))
+    pass_box.clear()
+    pass_box.send_keys(password)
+
+    login_btn = wait.until(EC.element_to_be_clickable((By.ID, "bt_submit")))
+    driver.execute_script("arguments[0].click();", login_btn)
+
+    # ====== CHỜ REDIRECT VỀ FOODY ======
+    try:
+        wait.until(lambda d: ("foody.vn" in d.current_url) and ("id.foody.vn" not in d.current_url))
+    except TimeoutException:
+        print(" Không thấy redirect rõ ràng về foody.vn (mạng yếu hoặc login chưa hoàn tất).")
+        print("URL hiện tại:", driver.current_url)
+        return False
+
+    time.sleep(2)
+    return True
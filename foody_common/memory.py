@@ -0,0 +1,40 @@
+# ================== ĐO BỘ NHỚ PYTHON + BROWSER ==================
+# RSS lấy qua psutil (chỉ import khi gọi; không cài thì trả None, vẫn còn số node DOM).
+# Browser = tiến trình geckodriver/chromedriver của driver + mọi tiến trình con (Firefox content process...).
+
+MB = 1024 * 1024
+DOM_NODES_JS = "return document.getElementsByTagName('*').length;"
+
+def python_rss_mb():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / MB
+
+def browser_rss_mb(driver):
+    try:
+        import psutil
+        root = psutil.Process(driver.service.process.pid)
+        procs = [root] + root.children(recursive=True)
+    except Exception:
+        return None
+    total = 0
+    for p in procs:
+        try:
+            total += p.memory_info().rss
+        except Exception:
+            continue   # tiến trình con vừa thoát
+    return total / MB
+
+def dom_nodes(driver):
+    try:
+        return int(driver.execute_script(DOM_NODES_JS) or 0)
+    except Exception:
+        return None
+
+def memory_snapshot(driver) -> dict:
+    return {"dom_nodes": dom_nodes(driver), "browser_mb": browser_rss_mb(driver), "python_mb": python_rss_mb()}
+
+def fmt_mb(v) -> str:
+    return f"{v:.0f}MB" if v is not None else "n/a"
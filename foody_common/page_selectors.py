@@ -0,0 +1,43 @@
+# ================== SELECTOR CSS DÙNG CHUNG: SELENIUM + PARSE LẠI TỪ CACHE HTML ==================
+# Parser Selenium (find_element trong các script, EXTRACT_REVIEWS_JS, COLLECT_NEW_CARDS_JS) và parser
+# BeautifulSoup trong foody_common/reparse.py đều đọc selector ở đây -> Foody đổi giao diện chỉ sửa 1 chỗ.
+# Đoạn JS nhận selector qua tham số execute_script (dict *_JS_SELECTORS), không ghi cứng trong chuỗi JS.
+# Kiểm tra 2 phía còn cho cùng record: python bench/check_reparse_parity.py
+
+# ---------- trang bình luận (/binh-luan) ----------
+REVIEW_ITEM = "li.review-item"
+REVIEW_POINTS = "div.review-points"                  # data-review = review_id
+REVIEW_USER = "a.ru-username"
+REVIEW_RATING = "div.review-points span.ng-binding"
+REVIEW_TIME = "span.ru-time"                         # title = thời gian đầy đủ, không có thì lấy text
+REVIEW_TEXT = "div.review-des"
+REVIEW_PHOTOS = "ul.review-photos img"
+REVIEW_VIDEOS = "a.foody-video"                      # data-video-url
+PHOTO_ATTRS = ["data-original", "data-src", "src"]   # thử lần lượt
+
+# ---------- trang quán ----------
+CATEGORY_BOX = "div.category"
+CATEGORY_LINKS = ["div.category div.category-items a", "div.category div.category-cuisines a"]
+# không ghi tbody: browser tự chèn tbody, lxml thì không -> "table tr" khớp ở cả 2 phía
+SCORE_ROWS = "div.micro-home-point div.micro-home-static table tr"
+# (nhãn có dấu / không dấu trong cột đầu, field) - khớp nhãn đầu tiên thì dừng
+SCORE_LABELS = [
+    (("vị trí", "vi tri"), "tieu_chi_1_vi_tri"),
+    (("giá cả", "gia ca"), "tieu_chi_2_gia_ca"),
+    (("chất lượng", "chat luong"), "tieu_chi_3_chat_luong"),
+    (("phục vụ", "phuc vu"), "tieu_chi_4_phuc_vu"),
+    (("không gian", "khong gian"), "tieu_chi_5_khong_gian"),
+]
+
+# ---------- trang danh sách quán ----------
+LISTING_CARD = "div.content-item"
+LISTING_LINKS = ["div.title a", "a.ng-binding"]      # link + tên quán, thử lần lượt
+LISTING_ADDR = "div.desc"
+
+# ---------- truyền vào JS ----------
+REVIEW_JS_SELECTORS = {
+    "item": REVIEW_ITEM, "points": REVIEW_POINTS, "user": REVIEW_USER, "rating": REVIEW_RATING,
+    "time": REVIEW_TIME, "text": REVIEW_TEXT, "photos": REVIEW_PHOTOS, "videos": REVIEW_VIDEOS,
+    "photo_attrs": PHOTO_ATTRS,
+}
+LISTING_JS_SELECTORS = {"card": LISTING_CARD, "links": LISTING_LINKS, "addr": LISTING_ADDR}
@@ -0,0 +1,211 @@
+# ================== GIỚI HẠN TỐC ĐỘ THÍCH NGHI THEO HOST (TOKEN BUCKET + AIMD) ==================
+# Thay cho các time.sleep cố định (tiny_sleep, sleep(2) sau driver.get, sleep(1.2) sau khi sang trang...).
+# Mỗi host 1 token bucket: mỗi request lấy 1 token, token hồi lại `rate` cái / giây (tối đa `burst`).
+# Sau mỗi request báo lại kết quả:
+#   - trang tải nhanh (<= TARGET_LATENCY) -> tăng rate thêm ADD_STEP (tăng cộng)
+#   - trang tải chậm / lỗi                -> nhân rate với SLOW_FACTOR / ERROR_FACTOR (giảm nhân)
+#   - bị chặn (captcha, 429, 403...)      -> về MIN_RATE và nghỉ BLOCK_COOLDOWN giây
+# -> chạy nhanh nhất site chịu được, không phải lúc nào cũng chờ mức tệ nhất.
+# Dùng chung được giữa các thread (review_user_all chạy nhiều worker cùng 1 limiter).
+import csv
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+
+START_RATE = 0.7        # request / giây lúc đầu (~ sleep 1.4s như trước)
+MIN_RATE = 0.1
+MAX_RATE = 4.0
+BURST = 2               # số request được đi liền nhau khi bucket đầy
+TARGET_LATENCY = 3.0    # giây; chậm hơn mức này coi như site đang quá tải
+ADD_STEP = 0.05         # tăng cộng sau mỗi request tốt
+SLOW_FACTOR = 0.8
+ERROR_FACTOR = 0.5
+BLOCK_COOLDOWN = 60     # giây nghỉ khi bị chặn
+LATENCY_ALPHA = 0.2     # làm mượt latency trung bình (EWMA)
+
+# dấu hiệu trang chặn / quá tải (so với title + đầu body, chữ thường)
+BLOCK_MARKERS = (
+    "captcha", "too many requests", "error 429", "access denied", "403 forbidden",
+    "truy cập bị từ chối", "bạn đã truy cập quá nhiều",
+)
+
+BLOCK_CHECK_JS = """
+var t = (document.title || '') + ' ' + ((document.body && document.body.innerText) || '').slice(0, 2000);
+return t.toLowerCase();
+"""
+
+def host_of(url: str) -> str:
+    return (urlparse(url).hostname or url or "").lower()
+
+def looks_blocked(driver) -> bool:
+    """1 round trip: title + 2000 ký tự đầu của body có dấu hiệu bị chặn không."""
+    try:
+        text = driver.execute_script(BLOCK_CHECK_JS) or ""
+    except Exception:
+        return False
+    return any(m in text for m in BLOCK_MARKERS)
+
+class _Host:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.blocks = 0
+        self.avg_latency = None
+        self.waited = 0.0
+
+class AdaptiveRateLimiter:
+    """
+    limiter = AdaptiveRateLimiter()
+    limiter.get(driver, url)                  # chờ token -> driver.get -> đo latency -> chỉnh rate
+    with limiter.request(url):                # request không phải driver.get (bấm "Xem thêm", sang trang)
+        bấm nút; chờ nội dung mới
+    limiter.snapshot()                        # metric theo host: rate hiện tại, latency, lỗi, số giây đã chờ
+    adaptive=False -> rate cố định = start_rate (giống sleep cố định cũ, để so sánh).
+    """
+
+    def __init__(self, start_rate=START_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE, burst=BURST,
+                 target_latency=TARGET_LATENCY, adaptive=True):
+        self.start_rate = start_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.target_latency = target_latency
+        self.adaptive = adaptive
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url):
+        h = host_of(url)
+        st = self._hosts.get(h)
+        if st is None:
+            st = self._hosts[h] = _Host(self.start_rate, self.burst)
+        return st
+
+    def acquire(self, url) -> float:
+        """Lấy 1 token cho host của url, chờ nếu hết. Trả về số giây đã chờ."""
+        with self._lock:
+            st = self._host(url)
+            now = time.monotonic()
+            st.tokens = min(self.burst, st.tokens + (now - st.updated) * st.rate)
+            st.updated = now
+            # giữ chỗ trước rồi mới ngủ (token có thể âm) -> các thread xếp hàng đúng nhịp
+            st.tokens -= 1
+            wait = max(0.0, -st.tokens / st.rate, st.paused_until - now)
+            st.waited += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def report(self, url, latency=None, ok=True, blocked=False):
+        """Báo kết quả request vừa xong để chỉnh rate (AIMD)."""
+        with self._lock:
+            st = self._host(url)
+            st.requests += 1
+            if latency is not None:
+                st.avg_latency = latency if st.avg_latency is None else \
+                    LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * st.avg_latency
+            if blocked:
+                st.blocks += 1
+            elif not ok:
+                st.errors += 1
+            if not self.adaptive:
+                return
+            if blocked:
+                st.rate = self.min_rate
+                st.tokens = min(st.tokens, 0.0)
+                st.paused_until = time.monotonic() + BLOCK_COOLDOWN
+            elif not ok:
+                st.rate = max(self.min_rate, st.rate * ERROR_FACTOR)
+            elif latency is not None and latency > self.target_latency:
+                st.rate = max(self.min_rate, st.rate * SLOW_FACTOR)
+            else:
+                st.rate = min(self.max_rate, st.rate + ADD_STEP)
+
+    @contextmanager
+    def request(self, url):
+        """Chờ token, đo thời gian khối lệnh bên trong; exception -> báo lỗi rồi ném lại."""
+        self.acquire(url)
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.report(url, time.perf_counter() - t0, ok=False)
+            raise
+        self.report(url, time.perf_counter() - t0)
+
+    def get(self, driver, url, check_block=True) -> float:
+        """driver.get có giới hạn tốc độ. Trả về latency (giây). Trang bị chặn vẫn trả về bình thường."""
+        self.acquire(url)
+        t0 = time.perf_counter()
+        try:
+            driver.get(url)
+        except Exception:
+            self.report(url, time.perf_counter() - t0, ok=False)
+            raise
+        latency = time.perf_counter() - t0
+        blocked = check_block and looks_blocked(driver)
+        if blocked:
+            print(f"  [rate] {host_of(url)} có dấu hiệu chặn -> giảm tốc, nghỉ {BLOCK_COOLDOWN}s")
+        self.report(url, latency, blocked=blocked)
+        return latency
+
+    def rate(self, url) -> float:
+        with self._lock:
+            return self._host(url).rate
+
+    def snapshot(self) -> dict:
+        """host -> {rate, avg_latency, requests, errors, blocks, waited_seconds}"""
+        with self._lock:
+            return {
+                h: {
+                    "rate": round(st.rate, 3),
+                    "avg_latency": round(st.avg_latency, 3) if st.avg_latency is not None else None,
+                    "requests": st.requests,
+                    "errors": st.errors,
+                    "blocks": st.blocks,
+                    "waited_seconds": round(st.waited, 1),
+                }
+                for h, st in self._hosts.items()
+            }
+
+    def summary(self) -> str:
+        return " | ".join(
+            f"{h}: {m['rate']:.2f} req/s, latency {m['avg_latency'] or 0:.2f}s, lỗi {m['errors']}, chặn {m['blocks']}"
+            for h, m in self.snapshot().items()
+        )
+
+    def append_metrics_csv(self, path, label=""):
+        """Ghi thêm 1 dòng / host vào CSV (tạo header nếu file mới) để theo dõi rate giữa các lần chạy."""
+        cols = ["time", "label", "host", "rate", "avg_latency", "requests", "errors", "blocks", "waited_seconds"]
+        new_file = not os.path.exists(path)
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            if new_file:
+                w.writerow(cols)
+            for h, m in self.snapshot().items():
+                w.writerow([now, label, h] + [m[c] for c in cols[3:]])
+
+def click_and_wait(driver, limiter, url, button, old_el, timeout=10) -> bool:
+    """
+    Sang trang bằng nút (JS click) có giới hạn tốc độ, thay cho click + sleep(1.2..4) cố định:
+    chờ old_el (vd item đầu trang hiện tại) bị thay ra khỏi DOM. latency = thời gian tới lúc đó.
+    Trả về False nếu hết timeout mà trang không đổi (coi như hết trang, limiter ghi nhận lỗi).
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    try:
+        with limiter.request(url):
+            driver.execute_script("arguments[0].click();", button)
+            WebDriverWait(driver, timeout).until(EC.staleness_of(old_el))
+        return True
+    except Exception:
+        return False
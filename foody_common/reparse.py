@@ -0,0 +1,239 @@
+# ================== DỰNG LẠI MONGO TỪ CACHE HTML (KHÔNG CẦN BROWSER) ==================
+# Chạy từ thư mục gốc repo:
+#   python -m foody_common.reparse                       -> parse lại mọi loại trang trong html_cache/
+#   python -m foody_common.reparse --kind comments -w 8  -> chỉ trang bình luận, 8 tiến trình
+#   python -m foody_common.reparse --dry-run             -> chỉ parse + đếm, không ghi Mongo
+# Các hàm parse dưới đây dùng BeautifulSoup (lxml), selector lấy chung từ foody_common/page_selectors.py
+# với parser Selenium tương ứng:
+#   comments   <- Reviews/review_user_all.py           parse_one_review / EXTRACT_REVIEWS_JS
+#   restaurant <- Reviews/review_restaurants_all.py    scrape_the_loai_quan + scrape_scores
+#   listing    <- restaurants/crawl_all_restaurants.py get_restaurant_items / collect_new_cards
+# Sửa selector ở page_selectors.py rồi chạy bench/check_reparse_parity.py để chắc 2 phía vẫn cho cùng record.
+# Tiến trình con đọc + parse, tiến trình chính gom lại ghi bulk_write theo lô.
+import argparse
+import re
+import sys
+import time
+from multiprocessing import Pool
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from pymongo import MongoClient
+
+from foody_common.district import parse_district
+from foody_common.htmlcache import HtmlCache, CACHE_DIR
+from foody_common.page_selectors import (
+    REVIEW_ITEM, REVIEW_POINTS, REVIEW_USER, REVIEW_RATING, REVIEW_TIME, REVIEW_TEXT, REVIEW_PHOTOS,
+    REVIEW_VIDEOS, PHOTO_ATTRS, CATEGORY_BOX, CATEGORY_LINKS, SCORE_ROWS, SCORE_LABELS,
+    LISTING_CARD, LISTING_LINKS, LISTING_ADDR,
+)
+from foody_common.reviews import parse_rating, build_review_record
+from foody_common.sinks import BulkUpsertSink
+
+HTML_PARSER = "lxml"
+MONGO_URI = "mongodb://localhost:27017/"
+BULK_SIZE = 1000
+
+# kind -> (database, collection, khóa upsert) giống script cào tương ứng
+TARGETS = {
+    "comments": ("review_quan_db", "review_user_all", "review_id"),
+    "restaurant": ("review_quan_db", "review_restaurants_all", "restaurant_url"),
+    "listing": ("foody_db", "restaurants_all", "restaurant_url"),
+}
+
+# ================== HELPER ==================
+def _text(el) -> str:
+    # gần với innerText/.text của Selenium sau khi norm_text gộp khoảng trắng
+    return el.get_text(" ", strip=True) if el is not None else ""
+
+def _pick_attr(el, names, base_url):
+    # như pickAttr/get_attribute: src trả về URL tuyệt đối
+    for n in names:
+        v = el.get(n)
+        if v:
+            return urljoin(base_url, v) if n == "src" else v
+    return ""
+
+def safe_float(x):
+    try:
+        if x is None:
+            return None
+        s = str(x).strip().replace(",", ".")
+        m = re.search(r"(\d+(\.\d+)?)", s)
+        return float(m.group(1)) if m else None
+    except:
+        return None
+
+# ================== PARSER THEO LOẠI TRANG ==================
+def parse_comments_html(soup, entry):
+    """Trang /binh-luan -> list doc review_user_all (cùng shape writer của review_user_all.py)."""
+    page_url = entry["url"]          # comment_url: giống lúc cào, dùng cho hash_ id và urljoin video
+    meta = entry.get("meta") or {}
+    docs = []
+    for li in soup.select(REVIEW_ITEM):
+        rp = li.select_one(REVIEW_POINTS)
+        rating_el = li.select_one(REVIEW_RATING)
+        rt = li.select_one(REVIEW_TIME)
+        rec = build_review_record(
+            page_url,
+            rp.get("data-review", "") if rp is not None else "",
+            _text(li.select_one(REVIEW_USER)),
+            parse_rating(_text(rating_el)) if rating_el is not None else None,
+            (rt.get("title") or _text(rt)) if rt is not None else None,
+            _text(li.select_one(REVIEW_TEXT)),
+            [_pick_attr(im, PHOTO_ATTRS, page_url) for im in li.select(REVIEW_PHOTOS)],
+            [a.get("data-video-url") or "" for a in li.select(REVIEW_VIDEOS)],
+        )
+        rec.update({
+            "restaurant_url": meta.get("restaurant_url"),
+            "restaurant_name": meta.get("restaurant_name"),
+            "district": meta.get("district"),
+            "scraped_at": entry["fetched_at"],
+            "source": "foody.vn",
+        })
+        docs.append(rec)
+    return docs
+
+def parse_the_loai_quan(soup):
+    parts = [t for sel in CATEGORY_LINKS for t in (_text(a) for a in soup.select(sel)) if t]
+    if not parts:
+        box = soup.select_one(CATEGORY_BOX)
+        t = re.sub(r"\s+", " ", _text(box)).strip()
+        if t:
+            parts.append(t)
+    return " - ".join(dict.fromkeys(parts)) or None
+
+def parse_scores(soup):
+    result = {field: None for _, field in SCORE_LABELS}
+    result["diem_tb_tieu_chi"] = None
+    for tr in soup.select(SCORE_ROWS):
+        tds = tr.find_all("td")
+        if len(tds) < 2:
+            continue
+        label = _text(tds[0]).lower()
+        b = tds[-1].find("b")
+        val = safe_float(_text(b) if b is not None else _text(tds[-1]))
+        for keys, field in SCORE_LABELS:
+            if any(k in label for k in keys):
+                result[field] = val
+                break
+    scores = [result[field] for _, field in SCORE_LABELS]
+    if all(x is not None for x in scores):
+        result["diem_tb_tieu_chi"] = round(sum(scores) / 5, 2)
+    return result
+
+def parse_restaurant_html(soup, entry):
+    """Trang quán -> 1 doc review_restaurants_all (thể loại + 5 tiêu chí)."""
+    meta = entry.get("meta") or {}
+    rec = {
+        "restaurant_url": entry["url"],
+        "restaurant_name": meta.get("restaurant_name"),
+        "address": meta.get("address"),
+        "district": meta.get("district"),
+        "the_loai_quan": parse_the_loai_quan(soup),
+        "scraped_at": entry["fetched_at"],
+    }
+    rec.update(parse_scores(soup))
+    return [rec]
+
+def parse_listing_html(soup, entry):
+    """Trang danh sách đã bấm "Xem thêm" hết -> list doc restaurants_all."""
+    page_url = entry["url"]
+    default_district = (entry.get("meta") or {}).get("district")
+    docs = {}
+    for card in soup.select(LISTING_CARD):
+        a = next((x for x in (card.select_one(sel) for sel in LISTING_LINKS) if x is not None), None)
+        if a is None or not a.get("href"):
+            continue
+        href = urljoin(page_url, a["href"].strip())
+        addr = _text(card.select_one(LISTING_ADDR))
+        district = parse_district(addr)
+        if district == "Unknown" and default_district:
+            district = default_district
+        docs[href] = {
+            "restaurant_url": href,
+            "restaurant_name": _text(a),
+            "address": addr,
+            "district": district,
+            "source": "foody.vn",
+        }
+    return list(docs.values())
+
+PARSERS = {
+    "comments": parse_comments_html,
+    "restaurant": parse_restaurant_html,
+    "listing": parse_listing_html,
+}
+
+# ================== CHẠY SONG SONG ==================
+_cache = None
+
+def _init_worker(cache_dir):
+    global _cache
+    _cache = HtmlCache(cache_dir)
+
+def _parse_entry(entry):
+    """Chạy trong tiến trình con: (kind, url, docs, lỗi)."""
+    try:
+        soup = BeautifulSoup(_cache.read(entry["sha"]), HTML_PARSER)
+        return entry["kind"], entry["url"], PARSERS[entry["kind"]](soup, entry), None
+    except Exception as e:
+        return entry["kind"], entry["url"], [], f"{type(e).__name__}: {e}"
+
+def reparse(cache_dir=CACHE_DIR, kinds=None, workers=4, mongo_uri=MONGO_URI, dry_run=False, limit=0):
+    """Parse lại các trang mới nhất trong cache rồi upsert vào Mongo. Trả về dict thống kê theo kind."""
+    kinds = kinds or list(PARSERS)
+    cache = HtmlCache(cache_dir)
+    entries = [e for e in cache.entries() if e.get("kind") in kinds]
+    if limit:
+        entries = entries[:limit]
+
+    client = None if dry_run else MongoClient(mongo_uri)
+    sinks = {}
+    stats = {k: {"pages": 0, "docs": 0, "errors": 0} for k in kinds}
+    t0 = time.perf_counter()
+    with Pool(processes=max(1, workers), initializer=_init_worker, initargs=(cache_dir,)) as pool:
+        for kind, url, docs, err in pool.imap_unordered(_parse_entry, entries, chunksize=8):
+            st = stats[kind]
+            st["pages"] += 1
+            st["docs"] += len(docs)
+            if err:
+                st["errors"] += 1
+                print(f"  Lỗi {kind} {url}: {err[:120]}")
+            if client is None or not docs:
+                continue
+            if kind not in sinks:
+                db_name, col_name, _ = TARGETS[kind]
+                sinks[kind] = BulkUpsertSink(client[db_name][col_name], batch_size=BULK_SIZE)
+            key = TARGETS[kind][2]
+            for d in docs:
+                if d.get(key):
+                    sinks[kind].add({key: d[key]}, {"$set": d})
+    for kind, sink in sinks.items():
+        sink.close()
+        stats[kind].update(inserted=sink.inserted, updated=sink.updated, skipped=sink.skipped)
+    if client is not None:
+        client.close()
+    stats["_seconds"] = time.perf_counter() - t0
+    return stats
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Dựng lại Mongo từ cache HTML, không cần browser")
+    ap.add_argument("--cache", default=CACHE_DIR)
+    ap.add_argument("--kind", action="append", choices=list(PARSERS), help="lặp lại để chọn nhiều loại (mặc định: tất cả)")
+    ap.add_argument("-w", "--workers", type=int, default=4)
+    ap.add_argument("--mongo", default=MONGO_URI)
+    ap.add_argument("--limit", type=int, default=0, help="chỉ parse N trang đầu (thử selector)")
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args(argv)
+
+    stats = reparse(args.cache, args.kind, args.workers, args.mongo, args.dry_run, args.limit)
+    seconds = stats.pop("_seconds")
+    for kind, st in stats.items():
+        extra = "" if args.dry_run else \
+            f" | insert {st.get('inserted', 0)} | update {st.get('updated', 0)} | lỗi ghi {st.get('skipped', 0)}"
+        print(f" {kind}: {st['pages']} trang -> {st['docs']} doc, lỗi parse {st['errors']}{extra}")
+    print(f" Xong trong {seconds:.1f}s ({args.workers} tiến trình)")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+# ================== CHUẨN HOÁ 1 REVIEW (DÙNG CHUNG CRAWL ONLINE + PARSE LẠI OFFLINE) ==================
+# review_user_all.py (Selenium) và foody_common/reparse.py (HTML trong cache) cùng dựng record ở đây
+# -> review_id dạng hash_ khi thiếu id tính giống hệt nhau, upsert lại không sinh bản trùng.
+import hashlib
+import re
+from urllib.parse import urljoin
+
+def norm_text(s: str) -> str:
+    s = (s or "").strip()
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+def make_hash_id(*parts) -> str:
+    raw = "||".join([norm_text(p) for p in parts if p is not None])
+    return hashlib.md5(raw.encode("utf-8", errors="ignore")).hexdigest()
+
+def parse_rating(t):
+    try:
+        t = norm_text(t).replace(",", ".")
+        return float(t) if t else None
+    except:
+        return None
+
+def build_review_record(restaurant_url, review_id, user_name, user_rating, review_time, review_text, imgs, vids):
+    # chuẩn hoá chung cho mọi cách lấy dữ liệu (element / js / HTML trong cache)
+    review_time = norm_text(review_time or "")
+    if not review_time:
+        review_time = None
+    review_text = norm_text(review_text)
+    # media_urls: lưu URL của  ảnh & video 
+    media = []
+    for src in imgs:
+        src = (src or "").strip()
+        if src:
+            media.append(src)
+    for u in vids:
+        u = (u or "").strip()
+        if u:
+            media.append(urljoin(restaurant_url, u))
+
+    media_urls = "|".join(list(dict.fromkeys(media)))  # mỗi link cách nhau dấu |
+
+    # fallback review_id nếu thiếu
+    if not review_id:
+        review_id = "hash_" + make_hash_id(restaurant_url, user_name, str(user_rating), review_time or "", review_text)
+
+    return {
+        "review_id": review_id,
+        "user_name": norm_text(user_name),
+        "user_rating": user_rating,
+        "review_text": review_text,
+        "media_urls": media_urls,
+        "review_time": review_time
+    }
@@ -0,0 +1,122 @@
+# ================== LỊCH CÀO LẠI THEO TỐC ĐỘ CÓ REVIEW MỚI ==================
+# Collection crawl_schedule, 1 document / quán (_id = restaurant_url):
+#   velocity (review mới / ngày), interval_hours, last_crawled_at, next_crawl_at, restaurant_name, district
+# velocity ước lượng từ review_time trong review_user_all (số review trong VELOCITY_WINDOW_DAYS ngày gần nhất),
+# sau mỗi lần cào được làm mượt bằng số review mới thực tế (EWMA).
+# Quán "nóng" -> cào lại sau vài giờ, quán "nguội" -> vài tuần. Crawler lấy hàng đợi due_restaurants()
+# theo số review mới kỳ vọng, nên với cùng 1 ngân sách quán sẽ gom được nhiều review mới nhất.
+from datetime import datetime, timedelta
+
+SCHEDULE_COL = "crawl_schedule"
+REVIEWS_COL = "review_user_all"
+
+VELOCITY_WINDOW_DAYS = 90       # nhìn lại bao nhiêu ngày để ước lượng tốc độ
+TARGET_NEW_PER_VISIT = 5        # muốn mỗi lần ghé có khoảng chừng này review mới
+MIN_INTERVAL_HOURS = 6
+MAX_INTERVAL_HOURS = 24 * 30
+EWMA_ALPHA = 0.3                # trọng số của lần cào gần nhất khi cập nhật velocity
+RETRY_AFTER_HOURS = 1           # cào lỗi -> thử lại sau
+
+def interval_hours(velocity: float) -> float:
+    if not velocity or velocity <= 0:
+        return MAX_INTERVAL_HOURS
+    hours = TARGET_NEW_PER_VISIT / velocity * 24
+    return max(MIN_INTERVAL_HOURS, min(MAX_INTERVAL_HOURS, hours))
+
+def review_velocities(db, now=None, reviews_col=REVIEWS_COL):
+    """restaurant_url -> số review / ngày trong VELOCITY_WINDOW_DAYS ngày gần nhất (theo review_time)."""
+    now = now or datetime.now()
+    since = now - timedelta(days=VELOCITY_WINDOW_DAYS)
+    pipeline = [
+        {"$match": {"restaurant_url": {"$ne": None}, "review_time": {"$type": "string"}}},
+        {"$project": {
+            "restaurant_url": 1,
+            "t": {"$dateFromString": {
+                "dateString": "$review_time", "format": "%d/%m/%Y %H:%M",
+                "onError": None, "onNull": None
+            }}
+        }},
+        {"$match": {"t": {"$gte": since, "$lte": now}}},
+        {"$group": {"_id": "$restaurant_url", "recent": {"$sum": 1}}}
+    ]
+    return {d["_id"]: d["recent"] / VELOCITY_WINDOW_DAYS
+            for d in db[reviews_col].aggregate(pipeline, allowDiskUse=True)}
+
+def sync_schedule(db, restaurants, now=None, schedule_col=SCHEDULE_COL, reviews_col=REVIEWS_COL):
+    """
+    restaurants: list (restaurant_url, restaurant_name, district) từ file link quán.
+    Quán mới -> due ngay. Quán đã có -> cập nhật velocity từ lịch sử review (nếu đọc được), giữ last_crawled_at,
+    next_crawl_at = last_crawled_at + interval mới.
+    Trả về số quán trong lịch.
+    """
+    from pymongo import UpdateOne
+
+    now = now or datetime.now()
+    col = db[schedule_col]
+    col.create_index("next_crawl_at")
+    velocities = review_velocities(db, now, reviews_col)
+    existing = {d["_id"]: d for d in col.find({}, {"last_crawled_at": 1, "velocity": 1})}
+
+    ops = []
+    for url, name, district in restaurants:
+        old = existing.get(url) or {}
+        # review_time không đọc được (không có trong velocities) -> giữ velocity EWMA từ các lần cào trước
+        v = velocities.get(url, old.get("velocity") or 0.0)
+        hours = interval_hours(v)
+        last = old.get("last_crawled_at")
+        ops.append(UpdateOne({"_id": url}, {"$set": {
+            "restaurant_name": name,
+            "district": district,
+            "velocity": v,
+            "interval_hours": hours,
+            "next_crawl_at": last + timedelta(hours=hours) if last else now,
+        }, "$setOnInsert": {"last_crawled_at": None}}, upsert=True))
+        if len(ops) >= 1000:
+            col.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        col.bulk_write(ops, ordered=False)
+    return col.count_documents({})
+
+def due_restaurants(db, budget, now=None, schedule_col=SCHEDULE_COL):
+    """
+    Các quán đến hạn (next_crawl_at <= now), ưu tiên số review mới kỳ vọng
+    = velocity * số ngày từ lần cào trước; quán chưa cào bao giờ lên đầu.
+    budget <= 0 -> lấy hết.
+    """
+    now = now or datetime.now()
+    pipeline = [
+        {"$match": {"next_crawl_at": {"$lte": now}}},
+        {"$addFields": {"expected_new": {"$cond": [
+            {"$eq": [{"$ifNull": ["$last_crawled_at", None]}, None]},
+            float("inf"),
+            {"$multiply": ["$velocity", {"$divide": [{"$subtract": [now, "$last_crawled_at"]}, 86400000]}]}
+        ]}}},
+        {"$sort": {"expected_new": -1, "next_crawl_at": 1}},
+    ]
+    if budget and budget > 0:
+        pipeline.append({"$limit": budget})
+    return list(db[schedule_col].aggregate(pipeline, allowDiskUse=True))
+
+def mark_crawled(db, restaurant_url, new_reviews, ok=True, now=None, schedule_col=SCHEDULE_COL):
+    """Sau khi cào 1 quán: cập nhật velocity bằng số review mới thực tế, đặt next_crawl_at."""
+    now = now or datetime.now()
+    col = db[schedule_col]
+    if not ok:
+        col.update_one({"_id": restaurant_url}, {"$set": {"next_crawl_at": now + timedelta(hours=RETRY_AFTER_HOURS)}})
+        return
+
+    doc = col.find_one({"_id": restaurant_url}, {"velocity": 1, "last_crawled_at": 1}) or {}
+    v = doc.get("velocity") or 0.0
+    last = doc.get("last_crawled_at")
+    if last:
+        days = max((now - last).total_seconds() / 86400, 1 / 24)
+        v = EWMA_ALPHA * (new_reviews / days) + (1 - EWMA_ALPHA) * v
+    hours = interval_hours(v)
+    col.update_one({"_id": restaurant_url}, {"$set": {
+        "velocity": v,
+        "interval_hours": hours,
+        "last_crawled_at": now,
+        "last_new_reviews": new_reviews,
+        "next_crawl_at": now + timedelta(hours=hours),
+    }}, upsert=True)
@@ -0,0 +1,168 @@
+# ================== PHIÊN ĐĂNG NHẬP DÙNG LẠI GIỮA CÁC LẦN CHẠY / WORKER ==================
+# Đăng nhập 1 lần, lưu cookie ra file (SESSION_FILE). Lần chạy sau / worker khác / browser vừa khởi động lại
+# chỉ cần nạp cookie, không phải gõ lại mật khẩu và chờ id.foody.vn redirect.
+# Chỉ đăng nhập lại khi phiên hết hạn: file quá SESSION_MAX_AGE_HOURS, cookie đã quá expiry,
+# hoặc nạp cookie xong mà trang chủ vẫn hiện nút "Đăng nhập".
+# Nhiều worker / tiến trình cùng lúc: file khóa (.lock) -> chỉ 1 nơi đăng nhập, nơi khác chờ rồi dùng lại cookie.
+# File chứa cookie đăng nhập -> đã có trong .gitignore, không commit.
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SESSION_FILE = os.path.join(ROOT, ".foody_session.json")
+SESSION_MAX_AGE_HOURS = 72
+HOME_URL = "https://www.foody.vn/"
+LOCK_TIMEOUT = 180      # giây; khóa cũ hơn mức này coi như tiến trình giữ khóa đã chết
+
+# còn link "Đăng nhập" hiển thị -> chưa đăng nhập; có link đăng xuất -> đã đăng nhập
+LOGGED_IN_JS = """
+if (document.querySelector('a[href*="logout"], a[href*="LogOff"], a[href*="dang-xuat"]')) return true;
+var links = document.querySelectorAll('a[href*="/account/login"]');
+for (var i = 0; i < links.length; i++) {
+    var a = links[i];
+    if (a.offsetWidth || a.offsetHeight || a.getClientRects().length) return false;
+}
+return true;
+"""
+
+def is_logged_in(driver, home_url=HOME_URL) -> bool:
+    driver.get(home_url)
+    try:
+        return bool(driver.execute_script(LOGGED_IN_JS))
+    except Exception:
+        return False
+
+def add_cookies(driver, cookies):
+    """Nạp cookie vào driver; add_cookie chỉ nhận cookie của domain đang mở nên mở trang từng domain trước."""
+    by_domain = {}
+    for c in cookies:
+        by_domain.setdefault((c.get("domain") or "").lstrip("."), []).append(c)
+    for domain, items in by_domain.items():
+        if not domain:
+            continue
+        driver.get(f"https://{domain}/")
+        for c in items:
+            c = {k: v for k, v in c.items() if k != "sameSite" or v in ("Strict", "Lax", "None")}
+            try:
+                driver.add_cookie(c)
+            except Exception:
+                pass
+
+class SessionStore:
+    """
+    sessions = SessionStore()
+    sessions.ensure_login(driver, lambda d: login_id_foody(d, email, password))
+    -> nạp cookie đã lưu nếu còn hạn; hết hạn mới gọi hàm đăng nhập rồi lưu cookie mới.
+    Hàm đăng nhập nhận driver, trả về True/False; có thể tự hỏi email/mật khẩu bên trong
+    để chỉ hỏi khi thật sự cần đăng nhập. Trả về dict (vd {"email": ...}) thay cho True
+    -> lưu kèm cookie, lần dùng lại phiên đọc bằng sessions.load_meta().
+    """
+
+    def __init__(self, path=SESSION_FILE, max_age_hours=SESSION_MAX_AGE_HOURS, home_url=HOME_URL):
+        self.path = path
+        self.max_age = timedelta(hours=max_age_hours)
+        self.home_url = home_url
+        self.lock_path = path + ".lock"
+
+    # ---------- file cookie ----------
+    def load(self):
+        """List cookie còn hạn, hoặc None nếu chưa có file / file quá cũ / mọi cookie đã hết hạn."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            saved_at = datetime.fromisoformat(data["saved_at"])
+        except (OSError, ValueError, KeyError):
+            return None
+        if datetime.now() - saved_at > self.max_age:
+            return None
+        now = time.time()
+        cookies = [c for c in data.get("cookies") or [] if not c.get("expiry") or c["expiry"] > now]
+        return cookies or None
+
+    def load_meta(self) -> dict:
+        """Thông tin lưu kèm cookie lúc đăng nhập (vd email), {} nếu không có."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f).get("meta") or {}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def save(self, driver, meta=None):
+        cookies = driver.get_cookies()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": datetime.now().isoformat(timespec="seconds"), "cookies": cookies,
+                       "meta": meta or {}}, f)
+        os.replace(tmp, self.path)   # ghi nguyên khối, nơi khác không đọc phải file dở
+
+    def invalidate(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def apply(self, driver, cookies=None) -> bool:
+        """Nạp cookie đã lưu vào driver. False nếu không có gì để nạp."""
+        cookies = cookies if cookies is not None else self.load()
+        if not cookies:
+            return False
+        add_cookies(driver, cookies)
+        return True
+
+    def is_valid(self, driver, cookies=None) -> bool:
+        """Nạp cookie đã lưu rồi mở trang chủ kiểm tra -> True nếu phiên còn đăng nhập được (không đăng nhập lại)."""
+        cookies = cookies if cookies is not None else self.load()
+        return bool(cookies) and self.apply(driver, cookies) and is_logged_in(driver, self.home_url)
+
+    # ---------- khóa giữa các worker / tiến trình ----------
+    def _acquire_lock(self):
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.lock_path) > LOCK_TIMEOUT:
+                        os.remove(self.lock_path)
+                        continue
+                except OSError:
+                    continue
+                time.sleep(1)
+
+    def _release_lock(self):
+        try:
+            os.remove(self.lock_path)
+        except OSError:
+            pass
+
+    # ---------- dùng lại hoặc đăng nhập ----------
+    def ensure_login(self, driver, login_fn) -> bool:
+        """
+        Trả về True nếu driver đang ở trạng thái đăng nhập (trang chủ foody).
+        Thứ tự: cookie đã lưu -> (khóa) cookie nơi khác vừa lưu -> đăng nhập thật bằng login_fn.
+        """
+        tried = self.load()
+        if self.is_valid(driver, tried):
+            print(" Dùng lại phiên đăng nhập đã lưu")
+            return True
+
+        self._acquire_lock()
+        try:
+            # trong lúc chờ khóa, worker khác có thể đã đăng nhập xong và lưu cookie mới
+            cookies = self.load()
+            if cookies and cookies != tried and self.is_valid(driver, cookies):
+                print(" Dùng lại phiên đăng nhập vừa được lưu")
+                return True
+            # không xoá file cookie trước: login_fn không đăng nhập được (vd không có mật khẩu)
+            # thì file cũ vẫn còn cho nơi khác; đăng nhập được mới ghi đè
+            ok = login_fn(driver)
+            if ok:
+                self.save(driver, ok if isinstance(ok, dict) else None)
+                print(" Đã đăng nhập và lưu phiên:", self.path)
+            return bool(ok)
+        finally:
+            self._release_lock()
@@ -0,0 +1,60 @@
+# ================== GHI MONGO THEO LÔ (bulk_write) ==================
+import time
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+class BulkUpsertSink:
+    """
+    Gom các UpdateOne(upsert=True) rồi ghi 1 lần bằng bulk_write(ordered=False)
+    khi đủ `batch_size` op hoặc đã quá `flush_seconds` giây từ lần ghi trước.
+    Nhớ gọi close() (hoặc dùng `with`) để ghi nốt phần còn lại.
+
+    Đếm giống cách đếm update_one từng dòng trong các script:
+      inserted = số doc upsert mới, updated = số doc khớp filter, skipped = số op lỗi
+    """
+
+    def __init__(self, col, batch_size=500, flush_seconds=5.0):
+        self.col = col
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.ops = []
+        self.last_flush = time.time()
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+
+    def add(self, filter_doc, update_doc):
+        self.ops.append(UpdateOne(filter_doc, update_doc, upsert=True))
+        if len(self.ops) >= self.batch_size:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        if self.ops and time.time() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.time()
+        if not self.ops:
+            return
+        ops, self.ops = self.ops, []
+        try:
+            res = self.col.bulk_write(ops, ordered=False)
+            self.inserted += res.upserted_count
+            self.updated += res.matched_count
+        except BulkWriteError as e:
+            # ordered=False: op lỗi không chặn các op còn lại
+            d = e.details or {}
+            self.inserted += d.get("nUpserted", 0)
+            self.updated += d.get("nMatched", 0)
+            self.skipped += len(d.get("writeErrors", []))
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
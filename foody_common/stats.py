@@ -0,0 +1,110 @@
+# ================== BẢNG restaurant_stats (THỐNG KÊ THEO QUÁN, CẬP NHẬT DẦN) ==================
+# 1 document / quán (_id = restaurant_url):
+#   review_count, rated_count, rating_sum, rating_mean, last_review_time, last_scraped_at,
+#   restaurant_name, district, diem_tb_tieu_chi (lấy từ review_restaurants_all)
+# Mỗi lần refresh chỉ tính lại các quán có review (hoặc dòng review_restaurants_all) scraped_at >= mốc lần trước,
+# rồi $merge đè vào bảng. Mốc lưu trong stats_meta. Báo cáo đọc bảng nhỏ này thay vì group lại toàn bộ review.
+import time
+from datetime import datetime
+
+STATS_COL = "restaurant_stats"
+META_COL = "stats_meta"
+META_ID = "restaurant_stats"
+REVIEWS_COL = "review_user_all"
+RESTAURANTS_COL = "review_restaurants_all"
+URL_CHUNK = 5000    # số quán mỗi lần $match ... $in khi tính lại
+
+def _max_scraped_at(col):
+    doc = col.find_one({"scraped_at": {"$type": "string"}}, {"scraped_at": 1}, sort=[("scraped_at", -1)])
+    return doc["scraped_at"] if doc else None
+
+def _touched_urls(col, since):
+    match = {"restaurant_url": {"$ne": None}}
+    if since:
+        match["scraped_at"] = {"$gte": since}
+    return [d["_id"] for d in col.aggregate([{"$match": match}, {"$group": {"_id": "$restaurant_url"}}],
+                                            allowDiskUse=True)]
+
+def _stats_pipeline(urls, restaurants_col, out_col):
+    match = {"restaurant_url": {"$in": urls}} if urls is not None else {"restaurant_url": {"$ne": None}}
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": "$restaurant_url",
+            "restaurant_name": {"$first": "$restaurant_name"},
+            "district": {"$first": "$district"},
+            "review_count": {"$sum": 1},
+            "rated_count": {"$sum": {"$cond": [{"$ne": [{"$ifNull": ["$user_rating", None]}, None]}, 1, 0]}},
+            # $sum / $avg bỏ qua giá trị không phải số, giống $avg trong các câu Q cũ
+            "rating_sum": {"$sum": "$user_rating"},
+            "rating_mean": {"$avg": "$user_rating"},
+            # review_time dạng "dd/mm/yyyy HH:MM" của Foody; dạng khác -> null, vẫn còn last_scraped_at
+            "last_review_time": {"$max": {"$dateFromString": {
+                "dateString": "$review_time", "format": "%d/%m/%Y %H:%M",
+                "onError": None, "onNull": None
+            }}},
+            "last_scraped_at": {"$max": "$scraped_at"}
+        }},
+        {"$lookup": {
+            "from": restaurants_col,
+            "localField": "_id",
+            "foreignField": "restaurant_url",
+            "as": "r"
+        }},
+        {"$addFields": {
+            "diem_tb_tieu_chi": {"$arrayElemAt": [
+                {"$filter": {"input": "$r.diem_tb_tieu_chi", "cond": {"$ne": ["$$this", None]}}}, 0
+            ]},
+            "updated_at": "$$NOW"
+        }},
+        {"$project": {"r": 0}},
+        {"$merge": {"into": out_col, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+
+def refresh_restaurant_stats(db, full=False, reviews_col=REVIEWS_COL, restaurants_col=RESTAURANTS_COL,
+                             out_col=STATS_COL, meta_col=META_COL):
+    """
+    Cập nhật restaurant_stats từ các review mới/được cào lại kể từ mốc scraped_at lần trước.
+    full=True (hoặc chưa có mốc) -> tính lại tất cả.
+    Trả về dict {mode, restaurants, seconds, watermark}.
+    """
+    t0 = time.perf_counter()
+    reviews = db[reviews_col]
+    restaurants = db[restaurants_col]
+    meta = db[meta_col]
+
+    reviews.create_index("scraped_at")
+    reviews.create_index("restaurant_url")
+    restaurants.create_index("restaurant_url")
+
+    state = meta.find_one({"_id": META_ID}) or {}
+    since_reviews = None if full else state.get("reviews_scraped_at")
+    since_restaurants = None if full else state.get("restaurants_scraped_at")
+
+    # chốt mốc TRƯỚC khi tính: review ghi thêm trong lúc tính có scraped_at >= mốc -> lần sau vẫn được tính
+    new_reviews_mark = _max_scraped_at(reviews)
+    new_restaurants_mark = _max_scraped_at(restaurants)
+
+    if since_reviews is None:
+        mode = "full"
+        reviews.aggregate(_stats_pipeline(None, restaurants_col, out_col), allowDiskUse=True)
+        n = db[out_col].estimated_document_count()
+    else:
+        mode = "incremental"
+        urls = set(_touched_urls(reviews, since_reviews))
+        # điểm tiêu chí đổi (cào lại trang quán) cũng phải cập nhật diem_tb_tieu_chi
+        urls.update(_touched_urls(restaurants, since_restaurants))
+        urls = sorted(urls)
+        for i in range(0, len(urls), URL_CHUNK):
+            reviews.aggregate(_stats_pipeline(urls[i:i + URL_CHUNK], restaurants_col, out_col), allowDiskUse=True)
+        n = len(urls)
+
+    meta.update_one({"_id": META_ID}, {"$set": {
+        "reviews_scraped_at": new_reviews_mark,
+        "restaurants_scraped_at": new_restaurants_mark,
+        "refreshed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "last_mode": mode,
+        "last_restaurants": n,
+    }}, upsert=True)
+
+    return {"mode": mode, "restaurants": n, "seconds": time.perf_counter() - t0, "watermark": new_reviews_mark}
@@ -0,0 +1,218 @@
+# ================== DRIVER TỰ HỒI PHỤC (RETRY + KHỞI ĐỘNG LẠI BROWSER) ==================
+# Firefox/Chrome treo hoặc crash giữa chừng -> trước đây cả script chết hoặc mọi URL sau đều lỗi.
+# SupervisedDriver bọc webdriver:
+#   - timeout cho từng lệnh (tải trang, script, lệnh HTTP tới geckodriver/chromedriver) -> không treo vô hạn
+#   - get() và run() thử lại với backoff tăng dần (2s, 4s, 8s... + jitter)
+#   - lỗi -> kiểm tra sức khỏe session (1 lệnh JS ngắn); session chết -> mở browser mới,
+#     khôi phục cookie (giữ đăng nhập) và mở lại trang đang xem
+# Các thuộc tính khác (find_elements, execute_script, current_url...) chuyển thẳng sang driver thật,
+# nên code cũ dùng `driver.xxx` và WebDriverWait(driver, ...) chạy như trước.
+import random
+import time
+from urllib.parse import urlparse
+
+from foody_common.session import add_cookies
+from selenium.common.exceptions import (
+    InvalidSessionIdException, NoSuchWindowException, TimeoutException, WebDriverException,
+)
+
+PAGE_LOAD_TIMEOUT = 60      # giây cho 1 lần driver.get
+SCRIPT_TIMEOUT = 90         # execute_async_script (vd wait_for_growth tự đặt lại theo nhu cầu)
+COMMAND_TIMEOUT = 150       # 1 lệnh HTTP tới driver; phải > 2 timeout trên, quá mức này coi như browser treo
+HEALTH_TIMEOUT = 10         # lệnh kiểm tra sức khỏe phải trả lời trong chừng này giây
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+MAX_RESTARTS = 20           # quá số lần này thì bỏ cuộc (có thể máy / mạng có vấn đề thật)
+COOKIE_SNAPSHOT_EVERY = 20  # lưu lại cookie sau mỗi ngần này lần get thành công
+
+# lỗi mà thông điệp cho thấy session/browser đã chết dù không phải InvalidSessionIdException
+DEAD_SESSION_MARKERS = (
+    "invalid session id", "session deleted", "no such window", "browsing context has been discarded",
+    "failed to decode response", "connection refused", "max retries exceeded", "read timed out",
+    "tried to run command without establishing a connection", "chrome not reachable", "disconnected",
+)
+
+class RestartLimitError(RuntimeError):
+    """Đã khởi động lại browser MAX_RESTARTS lần -> caller nên dừng hẳn driver này, không thử tiếp việc khác."""
+
+def backoff_delay(attempt, base=BACKOFF_BASE, max_delay=BACKOFF_MAX) -> float:
+    """attempt 1, 2, 3... -> base, 2*base, 4*base... (tối đa max_delay) + jitter 0-25%."""
+    d = min(max_delay, base * (2 ** (attempt - 1)))
+    return d + random.uniform(0, d * 0.25)
+
+def retry(fn, attempts=MAX_ATTEMPTS, retry_on=(Exception,), base=BACKOFF_BASE, label="", on_retry=None):
+    """
+    Gọi fn() tối đa `attempts` lần, giữa các lần chờ backoff_delay. Hết lượt -> ném lại lỗi cuối.
+    on_retry(exc, attempt): gọi trước mỗi lần thử lại (vd dọn trạng thái, khởi động lại driver).
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except retry_on as e:
+            if attempt >= attempts:
+                raise
+            delay = backoff_delay(attempt, base)
+            print(f"  [retry] {label or getattr(fn, '__name__', 'call')} lỗi ({type(e).__name__}: {str(e)[:80]}),"
+                  f" thử lại {attempt + 1}/{attempts} sau {delay:.1f}s")
+            if on_retry:
+                on_retry(e, attempt)
+            time.sleep(delay)
+
+def is_dead_session_error(exc) -> bool:
+    if isinstance(exc, (InvalidSessionIdException, NoSuchWindowException)):
+        return True
+    msg = str(exc).lower()
+    return any(m in msg for m in DEAD_SESSION_MARKERS)
+
+def set_command_timeout(driver, seconds):
+    """Timeout HTTP của từng lệnh WebDriver (mặc định của selenium 120s hoặc không giới hạn)."""
+    ex = driver.command_executor
+    cfg = getattr(ex, "_client_config", None)
+    if cfg is not None:
+        cfg.timeout = seconds
+    elif hasattr(ex, "set_timeout"):
+        ex.set_timeout(seconds)
+
+class SupervisedDriver:
+    """
+    sd = SupervisedDriver(make_raw_driver, name="w1")   # make_raw_driver() -> webdriver mới
+    sd.get(url)                                        # có retry + tự khởi động lại
+    sd.save_cookies()                                  # sau khi đăng nhập (lưu cả trang đang xem)
+    docs = sd.run(crawl_one, url)                      # chạy lại cả đơn vị việc crawl_one(sd, url) khi lỗi
+    sd.recover(exc)                                    # tự xử lý lỗi trong vòng lặp dài: True nếu vừa mở browser mới
+    """
+
+    def __init__(self, factory, name="driver", page_load_timeout=PAGE_LOAD_TIMEOUT,
+                 script_timeout=SCRIPT_TIMEOUT, command_timeout=COMMAND_TIMEOUT, max_restarts=MAX_RESTARTS):
+        self._factory = factory
+        self.name = name
+        self.page_load_timeout = page_load_timeout
+        self.script_timeout = script_timeout
+        self.command_timeout = command_timeout
+        self.max_restarts = max_restarts
+        self._driver = None
+        self._cookies = []
+        self._last_url = None
+        self._gets = 0
+        self.restarts = 0
+        self.retries = 0
+        self._start()
+
+    # ---------- chuyển thẳng sang driver thật ----------
+    def __getattr__(self, attr):
+        # chỉ được gọi khi SupervisedDriver không có thuộc tính attr
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self._driver, attr)
+
+    @property
+    def raw(self):
+        return self._driver
+
+    def _start(self):
+        d = self._factory()
+        d.set_page_load_timeout(self.page_load_timeout)
+        d.set_script_timeout(self.script_timeout)
+        set_command_timeout(d, self.command_timeout)
+        self._driver = d
+
+    # ---------- sức khỏe + khởi động lại ----------
+    def is_alive(self) -> bool:
+        d = self._driver
+        if d is None:
+            return False
+        try:
+            set_command_timeout(d, HEALTH_TIMEOUT)
+            return d.execute_script("return document.readyState") is not None
+        except Exception:
+            return False
+        finally:
+            try:
+                set_command_timeout(d, self.command_timeout)
+            except Exception:
+                pass
+
+    def save_cookies(self):
+        """Lưu cookie + trang đang xem (trang sau redirect, vd về foody.vn sau đăng nhập) để khôi phục khi restart."""
+        try:
+            self._cookies = self._driver.get_cookies()
+            self._last_url = self._driver.current_url
+        except Exception:
+            pass   # giữ bản lưu trước
+
+    def _restore_cookies(self):
+        try:
+            add_cookies(self._driver, self._cookies)
+        except WebDriverException:
+            pass
+
+    def restart(self, reason="", reopen=True):
+        if self.restarts >= self.max_restarts:
+            raise RestartLimitError(f"{self.name}: đã khởi động lại {self.restarts} lần, dừng ({reason})")
+        self.restarts += 1
+        print(f"  [supervisor] {self.name}: khởi động lại browser lần {self.restarts} ({reason[:80]})")
+        old = self._driver
+        self._driver = None
+        if old is not None:
+            try:
+                set_command_timeout(old, HEALTH_TIMEOUT)
+                old.quit()
+            except Exception:
+                pass
+        self._start()
+        self._restore_cookies()
+        if reopen and self._last_url:
+            try:
+                self._driver.get(self._last_url)
+            except WebDriverException:
+                pass
+
+    def recover(self, exc, reopen=True) -> bool:
+        """
+        Gọi trong except của vòng lặp dài: session chết / không phản hồi -> khởi động lại, trả về True
+        (trang đã mở lại từ đầu, caller nên đặt lại trạng thái). Browser vẫn sống -> False.
+        """
+        if is_dead_session_error(exc) or not self.is_alive():
+            self.restart(f"{type(exc).__name__}: {exc}", reopen=reopen)
+            return True
+        return False
+
+    def _on_retry(self, exc, attempt):
+        self.retries += 1
+        # lần thử lại tự mở trang cần thiết -> không mở lại trang cũ
+        self.recover(exc, reopen=False)
+
+    # ---------- lệnh có retry ----------
+    def get(self, url, attempts=MAX_ATTEMPTS):
+        self._last_url = url
+
+        def _get():
+            self._driver.get(url)
+
+        retry(_get, attempts=attempts, retry_on=(WebDriverException,),
+              label=f"{self.name} get {urlparse(url).path[:60]}", on_retry=self._on_retry)
+        self._gets += 1
+        if self._gets % COOKIE_SNAPSHOT_EVERY == 0:
+            self.save_cookies()
+
+    def run(self, fn, *args, attempts=MAX_ATTEMPTS, **kwargs):
+        """
+        fn(self, *args, **kwargs) là 1 đơn vị việc trọn vẹn (vd cào 1 quán) -> lỗi thì chạy lại từ đầu,
+        browser chết thì mở mới trước khi chạy lại. TimeoutException của WebDriverWait cũng được thử lại.
+        Trong fn dùng self.raw.get (hoặc self.get(url, attempts=1)) để chỉ 1 tầng thử lại.
+        """
+        return retry(lambda: fn(self, *args, **kwargs), attempts=attempts,
+                     retry_on=(WebDriverException, TimeoutException),
+                     label=f"{self.name} {getattr(fn, '__name__', 'run')}", on_retry=self._on_retry)
+
+    def stats(self) -> dict:
+        return {"restarts": self.restarts, "retries": self.retries}
+
+    def quit(self):
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+            self._driver = None
@@ -0,0 +1,114 @@
+# ================== ĐỌC THỜI GIAN REVIEW KIỂU FOODY ==================
+# Foody chỉ hiện vài dạng: "12/03/2025 14:05", "5 phút trước", "hôm qua 14:30"...
+# Các dạng này đọc thẳng bằng regex biên dịch sẵn; dạng lạ mới gọi dateparser (chậm vì dò ngôn ngữ).
+# Kết quả khớp dateparser.parse(..., languages=["vi"], settings={"TIMEZONE": "Asia/Ho_Chi_Minh"}):
+# datetime naive theo giờ Việt Nam (bench/bench_timeparse.py so sánh trên bench/fixtures/review_times.txt).
+import re
+import calendar
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
+
+TIME_CACHE_SIZE = 4096                  # số chuỗi thời gian khác nhau giữ lại dạng đã phân tích
+VN_TZ = timezone(timedelta(hours=7))    # Việt Nam không đổi giờ mùa hè -> không cần tzdata
+
+_WS_RE = re.compile(r"\s+")
+_TIME = r"(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?"
+_DATE = r"(\d{1,2})[/-](\d{1,2})[/-](\d{4})"
+_SEP = r"(?:\s*[-,]\s*|\s+lúc\s+|\s+)"
+_DATE_TIME_RE = re.compile(rf"^{_DATE}(?:{_SEP}{_TIME})?$")
+_TIME_DATE_RE = re.compile(rf"^{_TIME}{_SEP}{_DATE}$")
+_AGO_RE = re.compile(r"^(\d+)\s*(giây|phút|giờ|ngày|tuần|tháng|năm)\s*trước$")
+_DAY_RE = re.compile(rf"^hôm (nay|qua)(?:(?:\s+lúc)?\s+{_TIME})?$")
+
+_AGO_DELTA = {
+    "giây": timedelta(seconds=1),
+    "phút": timedelta(minutes=1),
+    "giờ": timedelta(hours=1),
+    "ngày": timedelta(days=1),
+    "tuần": timedelta(weeks=1),
+}
+
+def vn_now() -> datetime:
+    return datetime.now(VN_TZ).replace(tzinfo=None)
+
+def _minus_months(dt: datetime, months: int) -> datetime:
+    # giống relativedelta: ngày 31/3 lùi 1 tháng -> 28/2 (hoặc 29/2)
+    y, m = divmod(dt.year * 12 + dt.month - 1 - months, 12)
+    m += 1
+    return dt.replace(year=y, month=m, day=min(dt.day, calendar.monthrange(y, m)[1]))
+
+def _abs(d, mo, y, h=None, mi=None, s=None):
+    try:
+        return ("abs", datetime(int(y), int(mo), int(d), int(h or 0), int(mi or 0), int(s or 0)))
+    except ValueError:
+        return None   # 31/02, 24:00... -> để dateparser quyết định
+
+@lru_cache(maxsize=TIME_CACHE_SIZE)
+def _classify(text: str):
+    """
+    Phân tích chuỗi (đã gom khoảng trắng, chữ thường) thành dạng không phụ thuộc giờ hiện tại:
+      ("abs", datetime) | ("ago", đơn vị, n) | ("day", số ngày lùi, giờ, phút, giây) | None (không nhận ra)
+    """
+    m = _DATE_TIME_RE.match(text)
+    if m:
+        return _abs(*m.groups())
+    m = _TIME_DATE_RE.match(text)
+    if m:
+        h, mi, s, d, mo, y = m.groups()
+        return _abs(d, mo, y, h, mi, s)
+    m = _AGO_RE.match(text)
+    if m:
+        return ("ago", m.group(2), int(m.group(1)))
+    m = _DAY_RE.match(text)
+    if m:
+        back = 0 if m.group(1) == "nay" else 1
+        if m.group(2) is None:
+            return ("day", back, None, None, None)
+        h, mi, s = int(m.group(2)), int(m.group(3)), int(m.group(4) or 0)
+        if h > 23 or mi > 59 or s > 59:
+            return None
+        return ("day", back, h, mi, s)
+    return None
+
+def _dateparser_fallback(text: str, now: Optional[datetime], languages) -> Optional[datetime]:
+    import dateparser
+    settings = {"TIMEZONE": "Asia/Ho_Chi_Minh", "RETURN_AS_TIMEZONE_AWARE": False, "DATE_ORDER": "DMY"}
+    if now is not None:
+        settings["RELATIVE_BASE"] = now
+    return dateparser.parse(text, languages=list(languages), settings=settings)
+
+def parse_vi_datetime(text: Optional[str], now: Optional[datetime] = None,
+                      languages=("vi",)) -> Optional[datetime]:
+    """
+    Đọc thời gian kiểu Foody -> datetime naive (giờ Việt Nam), không đọc được -> None.
+    now: mốc cho dạng "x phút trước"/"hôm qua" (mặc định giờ hiện tại ở VN).
+    """
+    if not text:
+        return None
+    key = _WS_RE.sub(" ", text.strip()).lower()
+    kind = _classify(key)
+    if kind is None:
+        return _dateparser_fallback(text, now, languages)
+
+    if kind[0] == "abs":
+        return kind[1]
+
+    base = now if now is not None else vn_now()
+    if kind[0] == "ago":
+        _, unit, n = kind
+        if unit == "tháng":
+            return _minus_months(base, n)
+        if unit == "năm":
+            return _minus_months(base, 12 * n)
+        return base - _AGO_DELTA[unit] * n
+
+    _, back, h, mi, s = kind
+    day = base - timedelta(days=back)
+    if h is None:
+        return day
+    return day.replace(hour=h, minute=mi, second=s, microsecond=0)
+
+def to_iso(text: Optional[str], languages=("vi",)) -> Optional[str]:
+    dt = parse_vi_datetime(text, languages=languages)
+    return dt.isoformat() if dt else None
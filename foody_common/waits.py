@@ -0,0 +1,131 @@
+# ================== CHỜ "XEM THÊM" BẰNG MUTATIONOBSERVER ==================
+import math
+import time
+
+# Đếm request XHR/fetch đang chạy để biết trang còn đang tải hay đã hết dữ liệu.
+# Ghi lại URL request gần nhất có tham số page=N (request của "Xem thêm") -> checkpoint dùng để cào tiếp.
+# Cài 1 lần cho mỗi trang (window.__fdNet), gọi lại không cài chồng.
+INSTALL_NET_TRACKER_JS = """
+if (!window.__fdNet) {
+    var net = window.__fdNet = {pending: 0, lastPaged: null};
+    var done = function () { net.pending = Math.max(0, net.pending - 1); };
+    var track = function (url) {
+        url = String(url || '');
+        if (/[?&]page=\\d+/i.test(url)) net.lastPaged = new URL(url, location.href).href;
+    };
+    var X = window.XMLHttpRequest && window.XMLHttpRequest.prototype;
+    if (X) {
+        var open = X.open, send = X.send;
+        X.open = function (method, url) {
+            this.__fdUrl = url;
+            return open.apply(this, arguments);
+        };
+        X.send = function () {
+            net.pending++;
+            track(this.__fdUrl);
+            this.addEventListener('loadend', done);
+            return send.apply(this, arguments);
+        };
+    }
+    if (window.fetch) {
+        var f = window.fetch;
+        window.fetch = function (input) {
+            net.pending++;
+            track(input && input.url ? input.url : input);
+            return f.apply(this, arguments).finally(done);
+        };
+    }
+}
+"""
+
+LAST_PAGED_URL_JS = "return (window.__fdNet && window.__fdNet.lastPaged) || null;"
+
+# Trả kết quả ngay khi có item mới được gắn vào DOM (MutationObserver),
+# hoặc khi nút "Xem thêm" đã biến mất + không còn request + DOM im lặng quiet_ms -> hết dữ liệu.
+WAIT_FOR_GROWTH_JS = INSTALL_NET_TRACKER_JS + """
+var itemSel = arguments[0], moreSel = arguments[1], last = arguments[2],
+    timeoutMs = arguments[3], quietMs = arguments[4], callback = arguments[arguments.length - 1];
+var t0 = Date.now(), lastMut = t0, finished = false, obs = null, timer = null;
+
+function count() { return document.querySelectorAll(itemSel).length; }
+function moreVisible() {
+    if (!moreSel) return true;
+    var els = document.querySelectorAll(moreSel);
+    for (var i = 0; i < els.length; i++) {
+        var el = els[i];
+        if (el.offsetWidth || el.offsetHeight || el.getClientRects().length) return true;
+    }
+    return false;
+}
+function finish(status) {
+    if (finished) return;
+    finished = true;
+    if (obs) obs.disconnect();
+    if (timer) clearInterval(timer);
+    callback({status: status, count: count()});
+}
+function check() {
+    if (finished) return;
+    if (count() > last) return finish('grown');
+    var now = Date.now();
+    if (now - t0 >= timeoutMs) return finish('timeout');
+    if (now - lastMut >= quietMs && window.__fdNet.pending <= 0 && !moreVisible()) return finish('end');
+}
+
+obs = new MutationObserver(function (muts) {
+    lastMut = Date.now();
+    for (var i = 0; i < muts.length; i++) {
+        var added = muts[i].addedNodes;
+        for (var j = 0; j < added.length; j++) {
+            var node = added[j];
+            if (node.nodeType === 1 && (node.matches(itemSel) || node.querySelector(itemSel))) {
+                return check();
+            }
+        }
+    }
+});
+obs.observe(document.body || document.documentElement, {childList: true, subtree: true});
+// interval chỉ để xét timeout / hết dữ liệu, item mới thì observer báo ngay
+timer = setInterval(check, 250);
+check();
+"""
+
+def prepare_growth_wait(driver):
+    """
+    Cài bộ đếm request trước vòng bấm "Xem thêm" đầu tiên,
+    để request của lần bấm đầu cũng được tính.
+    """
+    driver.execute_script(INSTALL_NET_TRACKER_JS)
+
+def wait_for_growth(driver, item_selector, last_count, timeout, more_selector=None, quiet_seconds=3.0):
+    """
+    Chờ số phần tử `item_selector` lớn hơn `last_count` sau khi bấm "Xem thêm".
+    Thay cho vòng `while ...: đếm lại; time.sleep(1)`.
+
+    Trả về dict:
+      status : "grown" (có item mới) | "end" (hết nút + trang đứng yên) | "timeout"
+      count  : số item hiện tại
+      waited : số giây đã chờ
+      saved  : số giây tiết kiệm so với vòng poll sleep(1) cũ
+               (cũ: phát hiện ở giây tròn kế tiếp, hết dữ liệu thì chờ đủ timeout)
+    """
+    driver.set_script_timeout(timeout + 10)
+    t0 = time.time()
+    res = driver.execute_async_script(
+        WAIT_FOR_GROWTH_JS,
+        item_selector,
+        more_selector or "",
+        int(last_count),
+        int(timeout * 1000),
+        int(quiet_seconds * 1000),
+    ) or {}
+    waited = time.time() - t0
+
+    status = res.get("status") or "timeout"
+    old_wait = math.ceil(waited) if status == "grown" else timeout
+    return {
+        "status": status,
+        "count": int(res.get("count") or 0),
+        "waited": waited,
+        "saved": max(0.0, old_wait - waited),
+    }
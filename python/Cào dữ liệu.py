@@ -2,7 +2,6 @@ import time
 import json
 from datetime import datetime
 from typing import List, Dict, Optional
-import dateparser
 
 from pymongo import MongoClient, UpdateOne
 from selenium import webdriver
@@ -12,27 +11,38 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
 from selenium.webdriver.chrome.service import Service
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from foody_common.drivers import apply_lean_chrome, enable_lean_chrome_cdp
+from foody_common.timeparse import to_iso as fast_to_iso
+from foody_common.ratelimit import AdaptiveRateLimiter, click_and_wait
+
 
 MONGO_URI = "mongodb://localhost:27017/"
 DB_NAME = "foody-db"
+LEAN_PROFILE = False  # True = headless + chặn ảnh/font/media/host ngoài foody
 CITY_BASE_URL = "https://www.foody.vn/ho-chi-minh"
+ADAPTIVE_RATE = True  # True = tốc độ tự chỉnh theo latency/lỗi thay cho sleep cố định giữa các quán/trang review
+RATE_START = 0.7      # request / giây lúc đầu
 
 client = MongoClient(MONGO_URI)
 db = client[DB_NAME]
 reviews_col = db["reviews"]
 users_col = db["users"]
+limiter = AdaptiveRateLimiter(start_rate=RATE_START, adaptive=ADAPTIVE_RATE)
 
 def now_date_str():
     return datetime.now().strftime("%Y-%m-%d")
 
 def to_iso(dt_text: Optional[str]) -> Optional[str]:
-    if not dt_text:
-        return None
-    dt = dateparser.parse(dt_text, languages=["vi"], settings={"TIMEZONE": "Asia/Ho_Chi_Minh"})
-    return dt.isoformat() if dt else None
+    # dạng Foody quen thuộc đọc bằng regex, dạng lạ mới gọi dateparser
+    return fast_to_iso(dt_text)
 
-def setup_driver(headless: bool = True) -> webdriver.Chrome:
+def setup_driver(headless: bool = True, lean: bool = LEAN_PROFILE) -> webdriver.Chrome:
     opts = Options()
+    if lean:
+        apply_lean_chrome(opts)
     if headless:
         # Headless mode mới trong Chrome
         opts.add_argument("--headless=new")
@@ -48,6 +58,8 @@ def setup_driver(headless: bool = True) -> webdriver.Chrome:
     # Sử dụng Service thay vì truyền trực tiếp đường dẫn
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=opts)
+    if lean:
+        enable_lean_chrome_cdp(driver)
     driver.set_page_load_timeout(30)
     return driver
 
@@ -75,8 +87,7 @@ def find_all(driver, by, value) -> List:
 
 def list_restaurants_hcm(driver, max_pages: int = 40) -> List[Dict]:
     restaurants = []
-    driver.get(CITY_BASE_URL)
-    time.sleep(2)
+    limiter.get(driver, CITY_BASE_URL)
 
     # Có thể cần vào mục "Địa điểm" hoặc lọc quán ăn
     # Dưới đây dùng selector tương đối; bạn nên kiểm tra DOM thực tế
@@ -92,12 +103,11 @@ def list_restaurants_hcm(driver, max_pages: int = 40) -> List[Dict]:
             except Exception:
                 continue
 
-        # Phân trang
+        # Phân trang: chờ trang cũ bị thay (có giới hạn tốc độ) thay cho sleep(1.5)
         next_btn = find_or_none(driver, By.CSS_SELECTOR, ".pagination a.next, a.next")
-        if next_btn and next_btn.is_enabled():
-            next_btn.click()
-            time.sleep(1.5)
-        else:
+        if not (next_btn and next_btn.is_enabled() and cards):
+            break
+        if not click_and_wait(driver, limiter, CITY_BASE_URL, next_btn, cards[0]):
             break
 
     # dedupe theo URL
@@ -112,8 +122,8 @@ def list_restaurants_hcm(driver, max_pages: int = 40) -> List[Dict]:
 def list_featured_dishes_hcm(driver, max_pages: int = 3) -> List[Dict]:
     featured = []
     # Trang đề cử món ăn (ví dụ)
-    driver.get("https://www.foody.vn/ho-chi-minh/goi-y-mon-ngon")
-    time.sleep(2)
+    featured_url = "https://www.foody.vn/ho-chi-minh/goi-y-mon-ngon"
+    limiter.get(driver, featured_url)
 
     for page_idx in range(max_pages):
         items = find_all(driver, By.CSS_SELECTOR, ".fdc-item, .dish-item, .content-item a")
@@ -128,10 +138,9 @@ def list_featured_dishes_hcm(driver, max_pages: int = 3) -> List[Dict]:
                 continue
 
         next_btn = find_or_none(driver, By.CSS_SELECTOR, ".pagination a.next, a.next")
-        if next_btn and next_btn.is_enabled():
-            next_btn.click()
-            time.sleep(1.5)
-        else:
+        if not (next_btn and next_btn.is_enabled() and items):
+            break
+        if not click_and_wait(driver, limiter, featured_url, next_btn, items[0]):
             break
 
     # dedupe
@@ -247,23 +256,22 @@ def extract_reviews_from_page(driver, restaurant) -> List[Dict]:
     return results
 
 def crawl_reviews_for_restaurant(driver, restaurant, max_pages: int = 10) -> List[Dict]:
-    driver.get(restaurant["url"])
-    time.sleep(2)
+    limiter.get(driver, restaurant["url"])
 
     open_review_tab_if_exists(driver)
     time.sleep(1)
 
     all_reviews = []
     for page_idx in range(max_pages):
+        items = find_all(driver, By.CSS_SELECTOR, ".review-item, .review, .comment-item")
         page_reviews = extract_reviews_from_page(driver, restaurant)
         all_reviews.extend(page_reviews)
 
-        # Phân trang bên trong tab review
+        # Phân trang bên trong tab review: chờ trang cũ bị thay thay cho sleep(1.2)
         next_btn = find_or_none(driver, By.CSS_SELECTOR, ".pagination a.next, a.next")
-        if next_btn and next_btn.is_enabled():
-            driver.execute_script("arguments[0].click();", next_btn)
-            time.sleep(1.2)
-        else:
+        if not (next_btn and next_btn.is_enabled() and items):
+            break
+        if not click_and_wait(driver, limiter, restaurant["url"], next_btn, items[0]):
             break
 
     # Sắp xếp theo comment_time giảm dần
@@ -276,8 +284,7 @@ def crawl_reviews_for_restaurant(driver, restaurant, max_pages: int = 10) -> Lis
 
 def crawl_user_profile(driver, profile_url: str) -> Optional[Dict]:
     try:
-        driver.get(profile_url)
-        time.sleep(1.5)
+        limiter.get(driver, profile_url)
     except WebDriverException:
         return None
 
@@ -374,8 +381,8 @@ def crawl_from_restaurants(start_pages: int = 20, review_pages: int = 50, headle
                     user_doc = crawl_user_profile(driver, profile_url)
                     upsert_user(user_doc)
 
-            # throttle nhẹ
-            time.sleep(1.0)
+            # throttle: limiter tự giãn/nén nhịp ở lần driver.get kế tiếp
+            print(f"   {len(reviews)} reviews | {limiter.rate(r['url']):.2f} req/s")
     finally:
         driver.quit()
 
@@ -395,7 +402,7 @@ def crawl_from_featured_dishes(start_pages: int = 2, review_pages: int = 5, head
                     user_doc = crawl_user_profile(driver, profile_url)
                     upsert_user(user_doc)
 
-            time.sleep(1.0)
+            print(f"   {len(reviews)} reviews | {limiter.rate(d['url']):.2f} req/s")
     finally:
         driver.quit()
 
@@ -1,9 +1,9 @@
 import os
+import sys
 import time
 from datetime import datetime
 from typing import Optional, List, Tuple
 
-import dateparser
 from pymongo import MongoClient, UpdateOne
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -15,15 +15,29 @@ from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from openpyxl import load_workbook
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from foody_common.sinks import BulkUpsertSink
+from foody_common.drivers import apply_lean_chrome, enable_lean_chrome_cdp
+from foody_common.timeparse import to_iso as fast_to_iso
+from foody_common.export import read_parquet_table
+from foody_common.ratelimit import AdaptiveRateLimiter, click_and_wait
+from foody_common.session import SessionStore
+
 # ===================== CONFIG =====================
 MONGO_URI = "mongodb://localhost:27017/"
 DB_NAME = "reviews-db"
 EXCEL_PATH = "restaurants_all_districts_from_home_1.xlsx"  # path tới file Excel
+PARQUET_PATH = None  # vd "restaurants_all_districts_from_home_1.parquet" -> đọc link từ Parquet thay cho Excel
 EXCEL_LINK_HEADER_CANDIDATES = ["link", "Link", "URL", "url", "Đường dẫn", "Link quán", "Restaurant URL"]
 
 MAX_REVIEW_PAGES = 20  # giới hạn số trang review duyệt
+REVIEW_BULK_SIZE = 200        # gom review rồi bulk_write 1 lần
+REVIEW_FLUSH_SECONDS = 5      # hoặc ghi sau mỗi ngần này giây
 HEADLESS = True
+LEAN_PROFILE = False  # True = headless + chặn ảnh/font/media/host ngoài foody
 LANG = "vi-VN"
+ADAPTIVE_RATE = True  # True = tốc độ tự chỉnh theo latency/lỗi thay cho sleep cố định sau mỗi trang
+RATE_START = 0.7      # request / giây lúc đầu
 
 FOODY_BASE = "https://www.foody.vn"
 LOGIN_URL = "https://www.foody.vn/account/login"
@@ -38,23 +52,21 @@ db = client[DB_NAME]
 restaurants_col = db["restaurants"]
 foods_col = db["foods"]
 reviews_col = db["reviews"]
+review_sink = BulkUpsertSink(reviews_col, batch_size=REVIEW_BULK_SIZE, flush_seconds=REVIEW_FLUSH_SECONDS)
+limiter = AdaptiveRateLimiter(start_rate=RATE_START, adaptive=ADAPTIVE_RATE)
 
 # ===================== UTILS =====================
 def now_date_str():
     return datetime.now().strftime("%Y-%m-%d")
 
 def to_iso(text: Optional[str]) -> Optional[str]:
-    if not text:
-        return None
-    dt = dateparser.parse(
-        text,
-        languages=["vi", "en"],
-        settings={"TIMEZONE": "Asia/Ho_Chi_Minh", "RETURN_AS_TIMEZONE_AWARE": False}
-    )
-    return dt.isoformat() if dt else None
+    # dạng Foody quen thuộc đọc bằng regex, dạng lạ mới gọi dateparser (luôn đọc dd/mm)
+    return fast_to_iso(text, languages=("vi", "en"))
 
-def setup_driver(headless=True) -> webdriver.Chrome:
+def setup_driver(headless=True, lean: bool = LEAN_PROFILE) -> webdriver.Chrome:
     opts = Options()
+    if lean:
+        apply_lean_chrome(opts)
     if headless:
         # new headless mode (Chrome >= 109)
         opts.add_argument("--headless=new")
@@ -66,6 +78,8 @@ def setup_driver(headless=True) -> webdriver.Chrome:
 
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=opts)
+    if lean:
+        enable_lean_chrome_cdp(driver)
     driver.set_page_load_timeout(60)
     return driver
 
@@ -90,13 +104,13 @@ def wait_click(driver, selector, timeout=10):
     return el
 
 # ===================== LOGIN =====================
-def login_foody(driver):
+def login_foody(driver) -> bool:
     driver.get(LOGIN_URL)
     try:
         # Chờ form đăng nhập xuất hiện
         WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, "form#form_login, form[action*='login']")))
     except TimeoutException:
-        return
+        return False
 
     # Thử nhiều selector phổ biến cho email/password
     email_selectors = ["input#email", "input[name='email']", "input[type='email']"]
@@ -116,7 +130,7 @@ def login_foody(driver):
             break
 
     if not email_el or not pass_el:
-        return
+        return False
 
     # Điền thông tin đăng nhập
     email_el.clear()
@@ -137,8 +151,12 @@ def login_foody(driver):
         # Nhấn Enter nếu không tìm thấy nút
         pass_el.submit()
 
-    # Chờ chuyển trang/đăng nhập xong (nếu có captcha thì cần thao tác tay)
-    time.sleep(3)
+    # Chờ rời trang login thay cho sleep(3) (nếu có captcha thì cần thao tác tay trong thời gian này)
+    try:
+        WebDriverWait(driver, 30).until(lambda d: "/account/login" not in d.current_url)
+        return True
+    except TimeoutException:
+        return False
 
 # ===================== EXCEL LINKS =====================
 def read_links_from_excel(path: str) -> List[str]:
@@ -170,15 +188,26 @@ def read_links_from_excel(path: str) -> List[str]:
     wb.close()
     return links
 
+def read_links_from_parquet(path: str) -> List[str]:
+    # file Parquet do crawl_all_restaurants.py xuất ra, cột restaurant_url
+    df = read_parquet_table(path, ["restaurant_url"])
+    links = []
+    for val in df["restaurant_url"]:
+        if not val:
+            continue
+        url = str(val).strip()
+        if url.startswith("http"):
+            links.append(url)
+    return links
+
 # ===================== RESTAURANT + FOODS =====================
 def crawl_restaurant_and_foods(driver, url) -> Tuple[dict, List[dict]]:
-    driver.get(url)
+    limiter.get(driver, url)
     # Đảm bảo trang đã tải tiêu đề
     try:
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "h1")))
     except TimeoutException:
         pass
-    time.sleep(1.0)
 
     name = safe_text(find_or_none(driver, By.CSS_SELECTOR, "h1"))
     address = safe_text(find_or_none(driver, By.CSS_SELECTOR, ".res-common-add, .rd-address, .rd-addr"))
@@ -223,23 +252,21 @@ def goto_review_tab(driver):
     return False
 
 def save_review_immediately(doc: dict):
-    # Lưu từng review ngay (tới đâu lưu tới đó) bằng upsert
-    reviews_col.update_one(
+    # Đưa review vào sink, sink tự bulk_write theo lô (đủ số lượng hoặc đủ thời gian)
+    review_sink.add(
         {
             "restaurant_url": doc["restaurant_url"],
             "comment_text": doc["comment_text"],
             "comment_time": doc["comment_time"]
         },
-        {"$set": doc},
-        upsert=True
+        {"$set": doc}
     )
 
 def crawl_reviews_incremental(driver, url, max_pages=MAX_REVIEW_PAGES):
     latest_time = get_latest_review_time(url)
 
     # Vào trang quán
-    driver.get(url)
-    time.sleep(1.2)
+    limiter.get(driver, url)
     goto_review_tab(driver)
 
     # Duyệt từng trang review, giả định trang đầu là mới nhất (giảm dần theo thời gian)
@@ -286,8 +313,9 @@ def crawl_reviews_incremental(driver, url, max_pages=MAX_REVIEW_PAGES):
         next_btn = find_or_none(driver, By.CSS_SELECTOR, "a.next, a[rel='next'], .pagination .next")
         if not next_btn:
             break
-        driver.execute_script("arguments[0].click();", next_btn)
-        time.sleep(1.2)
+        # chờ lô review cũ bị thay thay cho sleep(1.2): vòng sau đọc đúng trang mới
+        if not click_and_wait(driver, limiter, url, next_btn, items[0]):
+            break
 
 # ===================== SAVE RESTAURANT + FOODS =====================
 def save_restaurant_and_foods(res: dict, foods: List[dict]):
@@ -307,11 +335,16 @@ def run():
     driver = setup_driver(headless=HEADLESS)
     try:
         # Đăng nhập trước (nếu cần xem đầy đủ review)
-        login_foody(driver)
+        # cookie đã lưu còn hạn -> bỏ qua đăng nhập
+        SessionStore().ensure_login(driver, login_foody)
 
         # Đọc links từ file Excel (streaming, không cần nạp toàn bộ vào RAM)
-        links = read_links_from_excel(EXCEL_PATH)
-        print(f"Đọc được {len(links)} link từ Excel")
+        if PARQUET_PATH:
+            links = read_links_from_parquet(PARQUET_PATH)
+            print(f"Đọc được {len(links)} link từ Parquet")
+        else:
+            links = read_links_from_excel(EXCEL_PATH)
+            print(f"Đọc được {len(links)} link từ Excel")
 
         for i, url in enumerate(links, start=1):
             print(f"[{i}/{len(links)}] {url}")
@@ -322,12 +355,17 @@ def run():
 
                 # Cào review theo thời gian giảm dần (incremental, tới đâu lưu tới đó)
                 crawl_reviews_incremental(driver, url, MAX_REVIEW_PAGES)
+                review_sink.flush_if_due()
 
             except Exception as e:
                 print(f"   Lỗi: {e}")
                 continue
 
     finally:
+        # ghi nốt review còn trong sink
+        review_sink.close()
+        print(f"Review: insert mới {review_sink.inserted} | update {review_sink.updated} | lỗi {review_sink.skipped}")
+        print(f"Tốc độ: {limiter.summary()}")
         driver.quit()
 
 if __name__ == "__main__":
@@ -1,7 +1,6 @@
 import time
 from datetime import datetime
 from typing import List, Dict, Optional
-import dateparser
 
 from pymongo import MongoClient, UpdateOne
 from selenium import webdriver
@@ -11,9 +10,16 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import NoSuchElementException, WebDriverException
 from selenium.webdriver.chrome.service import Service
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from foody_common.drivers import apply_lean_chrome, enable_lean_chrome_cdp
+from foody_common.timeparse import to_iso as fast_to_iso
+
 # ----------------------------- Cấu hình DB -----------------------------
 MONGO_URI = "mongodb://localhost:27017/"
 DB_NAME = "foody1-db"
+LEAN_PROFILE = False  # True = headless + chặn ảnh/font/media/host ngoài foody
 CITY_BASE_URL = "https://www.foody.vn/ho-chi-minh"
 
 client = MongoClient(MONGO_URI)
@@ -27,13 +33,13 @@ def now_date_str():
     return datetime.now().strftime("%Y-%m-%d")
 
 def to_iso(dt_text: Optional[str]) -> Optional[str]:
-    if not dt_text:
-        return None
-    dt = dateparser.parse(dt_text, languages=["vi"], settings={"TIMEZONE": "Asia/Ho_Chi_Minh"})
-    return dt.isoformat() if dt else None
+    # dạng Foody quen thuộc đọc bằng regex, dạng lạ mới gọi dateparser
+    return fast_to_iso(dt_text)
 
-def setup_driver(headless: bool = True) -> webdriver.Chrome:
+def setup_driver(headless: bool = True, lean: bool = LEAN_PROFILE) -> webdriver.Chrome:
     opts = Options()
+    if lean:
+        apply_lean_chrome(opts)
     if headless:
         opts.add_argument("--headless=new")
     opts.add_argument("--disable-gpu")
@@ -44,6 +50,8 @@ def setup_driver(headless: bool = True) -> webdriver.Chrome:
 
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=opts)
+    if lean:
+        enable_lean_chrome_cdp(driver)
     driver.set_page_load_timeout(30)
     return driver
 
@@ -1,8 +1,6 @@
 import time
 from datetime import datetime
 from typing import List, Dict, Optional
-import dateparser
-import re
 
 from pymongo import MongoClient, UpdateOne
 from selenium import webdriver
@@ -14,23 +12,35 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from foody_common.drivers import apply_lean_chrome, enable_lean_chrome_cdp
+from foody_common.timeparse import to_iso as fast_to_iso
+from foody_common.district import parse_district
+from foody_common.ratelimit import AdaptiveRateLimiter, click_and_wait
+from foody_common.supervisor import retry
+from foody_common.session import SessionStore
+
 # ---------------- MongoDB ----------------
 MONGO_URI = "mongodb://localhost:27017/"
 DB_NAME = "foody2-db"
+LEAN_PROFILE = False  # True = headless + chặn ảnh/font/media/host ngoài foody
+ADAPTIVE_RATE = True  # True = tốc độ tự chỉnh theo latency/lỗi thay cho sleep cố định giữa các trang/quán
+RATE_START = 0.5      # request / giây lúc đầu
 
 client = MongoClient(MONGO_URI)
 db = client[DB_NAME]
 reviews_col = db["reviews"]
+limiter = AdaptiveRateLimiter(start_rate=RATE_START, adaptive=ADAPTIVE_RATE)
 
 # ---------------- Helper ----------------
 def now_date_str():
     return datetime.now().strftime("%Y-%m-%d")
 
 def to_iso(dt_text: Optional[str]) -> Optional[str]:
-    if not dt_text:
-        return None
-    dt = dateparser.parse(dt_text, languages=["vi"], settings={"TIMEZONE": "Asia/Ho_Chi_Minh"})
-    return dt.isoformat() if dt else None
+    # dạng Foody quen thuộc đọc bằng regex, dạng lạ mới gọi dateparser
+    return fast_to_iso(dt_text)
 
 def safe_text(el) -> str:
     try:
@@ -51,8 +61,10 @@ def find_all(driver, by, value) -> List:
         return []
 
 # ---------------- Selenium Setup ----------------
-def setup_driver(headless: bool = True) -> webdriver.Chrome:
+def setup_driver(headless: bool = True, lean: bool = LEAN_PROFILE) -> webdriver.Chrome:
     opts = Options()
+    if lean:
+        apply_lean_chrome(opts)
     if headless:
         opts.add_argument("--headless=new")
     opts.add_argument("--disable-gpu")
@@ -66,51 +78,48 @@ def setup_driver(headless: bool = True) -> webdriver.Chrome:
 
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=opts)
+    if lean:
+        enable_lean_chrome_cdp(driver)
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => false});")
     driver.set_page_load_timeout(60)
     return driver
 
 # ---------------- Login Foody ----------------
-def foody_login(driver, email, password):
+def foody_login(driver, email, password) -> bool:
     login_url = "https://www.foody.vn/account/login"
     driver.get(login_url)
-    time.sleep(3)
     try:
-        driver.find_element(By.ID, "email").send_keys(email)
+        WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.ID, "email"))).send_keys(email)
         driver.find_element(By.ID, "password").send_keys(password)
         driver.find_element(By.XPATH, '//button[contains(text(),"Đăng nhập")]').click()
-        time.sleep(5)
+        # chờ rời trang login thay cho sleep(5) cố định
+        WebDriverWait(driver, 15).until(lambda d: "/account/login" not in d.current_url)
         print("Đăng nhập thành công!")
+        return True
     except Exception as e:
         print("Lỗi khi login:", e)
+        return False
 
 # ---------------- Extract Quận ----------------
 def extract_district_from_address(address: str) -> Optional[str]:
-    if not address:
-        return None
-    match = re.search(r'(Quận\s*[0-9]+|Quận\s*(Bình\s*Thạnh|Tân\s*Bình|Phú\s*Nhuận|Gò\s*Vấp|Bình\s*Tân|Tân\s*Phú)|TP\.\s*Thủ\s*Đức|Huyện\s*[\w\s]+)', address, re.IGNORECASE)
-    if match:
-        district = match.group(0).strip()
-        district = district.replace("q.", "Quận").replace("Q.", "Quận").title()
-        if "tp." in district.lower():
-            district = "TP. Thủ Đức"
-        return district
-    return None
+    # dùng chung engine với crawl_all_restaurants.py; None thay cho "Unknown" như trước
+    district = parse_district(address)
+    return None if district == "Unknown" else district
 
 # ---------------- Cào danh sách quán ----------------
 BASE_URL = "https://www.foody.vn/ho-chi-minh/quan-an"
 
 def list_restaurants_general(driver, max_pages: int = 100) -> List[Dict]:
     restaurants = []
-    for attempt in range(3):
-        try:
-            driver.get(BASE_URL)
-            WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-            break
-        except TimeoutException:
-            print(f"Timeout khi load {BASE_URL}, thử lại {attempt+1}/3")
-            time.sleep(5)
-    else:
+
+    def open_list():
+        driver.get(BASE_URL)
+        WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+
+    try:
+        # 3 lần, chờ 5s, 10s (+ jitter) giữa các lần
+        retry(open_list, attempts=3, retry_on=(TimeoutException,), base=5, label=f"load {BASE_URL}")
+    except TimeoutException:
         print("Không thể load trang danh sách quán.")
         return restaurants
 
@@ -135,10 +144,9 @@ def list_restaurants_general(driver, max_pages: int = 100) -> List[Dict]:
                 continue
 
         next_btn = find_or_none(driver, By.CSS_SELECTOR, "a.nextpage, a[rel='next'], .pager a:last-child")
-        if next_btn and next_btn.is_enabled():
-            driver.execute_script("arguments[0].click();", next_btn)
-            time.sleep(4)
-        else:
+        if not (next_btn and next_btn.is_enabled() and cards):
+            break
+        if not click_and_wait(driver, limiter, BASE_URL, next_btn, cards[0], timeout=15):
             break
 
     # Dedupe
@@ -194,18 +202,22 @@ def extract_reviews_from_page(driver, restaurant) -> List[Dict]:
     return [parse_review_item(driver, it, restaurant) for it in items if parse_review_item(driver, it, restaurant)["comment_text"]]
 
 def crawl_reviews_for_restaurant(driver, restaurant, max_pages: int = 50) -> List[Dict]:
-    driver.get(restaurant["url"])
-    time.sleep(5)
+    limiter.get(driver, restaurant["url"])
     open_review_tab_if_exists(driver)
+    try:
+        WebDriverWait(driver, 5).until(EC.presence_of_element_located(
+            (By.CSS_SELECTOR, ".review-item, .microsite-review-item, li.review")))
+    except TimeoutException:
+        pass
     all_reviews = []
     for _ in range(max_pages):
+        items = find_all(driver, By.CSS_SELECTOR, ".review-item, .microsite-review-item, li.review")
         page_reviews = extract_reviews_from_page(driver, restaurant)
         all_reviews.extend(page_reviews)
         next_btn = find_or_none(driver, By.CSS_SELECTOR, "a.nextpage, a[title='Trang sau']")
-        if next_btn and next_btn.is_enabled():
-            driver.execute_script("arguments[0].click();", next_btn)
-            time.sleep(3)
-        else:
+        if not (next_btn and next_btn.is_enabled() and items):
+            break
+        if not click_and_wait(driver, limiter, restaurant["url"], next_btn, items[0]):
             break
     all_reviews.sort(key=lambda x: x["comment_time"] or "", reverse=True)
     return all_reviews
@@ -234,7 +246,8 @@ def crawl_general_and_auto_district(email, password,
     driver = setup_driver(headless=headless)
     total_reviews = 0
     try:
-        foody_login(driver, email, password)
+        # cookie đã lưu còn hạn -> bỏ qua đăng nhập
+        SessionStore().ensure_login(driver, lambda d: foody_login(d, email, password))
         restaurants = list_restaurants_general(driver, max_pages=max_list_pages)
         from collections import Counter
         districts = [r["district"] for r in restaurants if r["district"]]
@@ -245,10 +258,10 @@ def crawl_general_and_auto_district(email, password,
             reviews = crawl_reviews_for_restaurant(driver, r, max_pages=review_pages_per_restaurant)
             upsert_reviews(reviews)
             total_reviews += len(reviews)
-            print(f" → {len(reviews)} reviews (tổng: {total_reviews})")
-            time.sleep(2)
+            print(f" → {len(reviews)} reviews (tổng: {total_reviews}) | {limiter.rate(r['url']):.2f} req/s")
 
         print(f"Hoàn thành! Tổng {len(restaurants)} quán, {total_reviews} reviews")
+        print(f"Tốc độ: {limiter.summary()}")
     finally:
         driver.quit()
 
@@ -3,29 +3,53 @@ from selenium import webdriver
 from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import WebDriverException
 import time
 import getpass
-import re
+import os
+import sys
 from urllib.parse import urljoin
-import pandas as pd
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from foody_common.waits import prepare_growth_wait, wait_for_growth
+from foody_common.drivers import apply_lean_firefox
+from foody_common.district import parse_district
+from foody_common.listing import collect_new_cards, add_card_rows
+from foody_common.page_selectors import LISTING_CARD, LISTING_LINKS, LISTING_ADDR
+from foody_common.login import login_id_foody
+from foody_common.export import export_xlsx_streaming, export_parquet_streaming
+from foody_common.supervisor import SupervisedDriver, RestartLimitError
+from foody_common.session import SessionStore
+from foody_common.htmlcache import HtmlCache
+from foody_common.sinks import BulkUpsertSink
+from foody_common.clicklog import ClickLatencyLog
+from foody_common.memory import dom_nodes
+from foody_common.ratelimit import AdaptiveRateLimiter
+from foody_common.checkpoint import (
+    ListingCheckpoint, CHECKPOINT_COL, fetch_listing_page, last_paged_url, page_of, with_page,
+)
 
 
 # ================== 2. FIREFOX CONFIG ==================
+LEAN_PROFILE = False   # True = headless + chặn ảnh/font/media/host ngoài foody
+HTML_CACHE_DIR = None  # vd "html_cache" -> lưu HTML trang danh sách sau khi tải hết để parse lại offline
+
 gecko_path = r"C:/Users/User/OneDrive/Desktop/Ma Nguon Mo/DO AN CUOI KY/geckodriver.exe"
 service = Service(gecko_path)
 
 options = webdriver.firefox.options.Options()
 options.binary_location = r"C:/Program Files/Mozilla Firefox/firefox.exe"
 options.headless = False
+if LEAN_PROFILE:
+    apply_lean_firefox(options)
 
-driver = webdriver.Firefox(service=service, options=options)
-wait = WebDriverWait(driver, 25)
+def make_firefox():
+    return webdriver.Firefox(service=service, options=options)
 
-# ================== 3.  LINK LOGIN ==================
-LOGIN_URL = "https://id.foody.vn/account/login?returnUrl=https://www.foody.vn/"
+# browser treo/crash -> tự mở Firefox mới, khôi phục cookie đăng nhập và trang đang xem
+driver = SupervisedDriver(make_firefox, name="firefox")
+wait = WebDriverWait(driver, 25)
 
 # ================== 4. HELPER FUNCTIONS ==================
 def js_click(el):
@@ -56,65 +80,24 @@ def safe_sheet_name(name: str) -> str:
         return "Unknown"
     return name[:31]
 
-def normalize_area_text(s: str) -> str:
-    s = re.sub(r"\s+", " ", (s or "").strip())
-    return s
-
-def parse_district(address: str) -> str:
-    """
-    Tách khu vực từ địa chỉ:
-    - Quận + số (Quận 1..12...)
-    - Quận + chữ (Quận Tân Phú, Quận Bình Thạnh...)
-    - Huyện + chữ (Huyện Củ Chi...)
-    - TP. Thủ Đức (hoặc Thủ Đức)
-    Nếu không thấy -> Unknown
-    """
-    if not address:
-        return "Unknown"
-
-    addr = normalize_area_text(address)
-
-    # Tách theo dấu phẩy -> thường có mảnh "Quận ...", "Huyện ..."
-    parts = [normalize_area_text(p) for p in addr.split(",") if normalize_area_text(p)]
-
-    # Ưu tiên mảnh bắt đầu bằng Quận/Huyện
-    for p in parts:
-        if re.match(r"^(Quận)\s+", p, flags=re.IGNORECASE):
-            # Chuẩn hóa "Quận ..."
-            tail = p[4:].strip()  # bỏ chữ Quận
-            return "Quận " + tail
-        if re.match(r"^(Huyện)\s+", p, flags=re.IGNORECASE):
-            tail = p[5:].strip()  # bỏ chữ Huyện
-            return "Huyện " + tail
-
-    # Thủ Đức (có thể đứng riêng hoặc kèm TP.)
-    if re.search(r"\bthủ\s*đức\b", addr, flags=re.IGNORECASE):
-        return "TP. Thủ Đức"
-
-    # Fallback kiểu Q.1 / Q1 / Q. Tan Phu
-    for p in parts:
-        m = re.match(r"^Q\.?\s*(.+)$", p, flags=re.IGNORECASE)
-        if m:
-            tail = normalize_area_text(m.group(1))
-            # nếu là số -> Quận <số>, nếu là chữ -> Quận <chữ>
-            return "Quận " + tail
-
-    return "Unknown"
-
 def get_restaurant_items():
     """
     Trả về list dict {restaurant_url, restaurant_name, address, district}
-    Lấy theo DOM card kiểu "content-item"
+    Lấy theo DOM card kiểu "content-item" (quét lại toàn bộ trang, mỗi card vài round trip)
     """
     items = []
-    cards = driver.find_elements(By.CSS_SELECTOR, "div.content-item")
+    cards = driver.find_elements(By.CSS_SELECTOR, LISTING_CARD)
     for card in cards:
         try:
-            # link + name thường nằm ở div.title a
-            try:
-                a = card.find_element(By.CSS_SELECTOR, "div.title a")
-            except:
-                a = card.find_element(By.CSS_SELECTOR, "a.ng-binding")
+            # link + name thường nằm ở div.title a, không có thì a.ng-binding
+            a = None
+            for sel in LISTING_LINKS:
+                found = card.find_elements(By.CSS_SELECTOR, sel)
+                if found:
+                    a = found[0]
+                    break
+            if a is None:
+                continue
 
             href = a.get_attribute("href") or ""
             if href.startswith("/"):
@@ -124,7 +107,7 @@ def get_restaurant_items():
 
             addr = ""
             try:
-                addr = card.find_element(By.CSS_SELECTOR, "div.desc").text.strip()
+                addr = card.find_element(By.CSS_SELECTOR, LISTING_ADDR).text.strip()
             except:
                 addr = ""
 
@@ -144,39 +127,99 @@ def get_restaurant_items():
             continue
     return items
 
-def count_unique_urls():
-    urls = set()
-    for it in get_restaurant_items():
-        if it.get("restaurant_url"):
-            urls.add(it["restaurant_url"])
-    return len(urls)
-
-# ================== 5. MỞ LOGIN & ĐĂNG NHẬP ==================
-driver.get(LOGIN_URL)
-time.sleep(3)
-
-email = input("Nhập Email Foody: ").strip()
-password = getpass.getpass("Nhập mật khẩu Foody: ")
-
-email_box = wait.until(EC.presence_of_element_located((By.ID, "Email")))
-email_box.clear()
-email_box.send_keys(email)
+collected_items = {}   # restaurant_url -> item, cộng dồn qua các lần bấm "Xem thêm"
+pending_items = {}     # card đã gom nhưng chưa ghi Mongo (ghi ở checkpoint / mỗi lần bấm khi PRUNE_DOM / cuối section 8)
+
+def card_update(it):
+    return {"$set": {
+        "district": it.get("district", "Unknown"),
+        "restaurant_name": it.get("restaurant_name", ""),
+        "address": it.get("address", ""),
+        "restaurant_url": it["restaurant_url"],
+        "source": it.get("source", "foody.vn")
+    }}
+
+def add_items(fresh):
+    for url, it in fresh.items():
+        if url not in collected_items:
+            pending_items[url] = it
+    collected_items.update(fresh)
+
+def save_pending():
+    """Ghi các card chưa lưu vào Mongo ngay (bulk) -> crash sau đó không mất các card này."""
+    for url, it in pending_items.items():
+        card_sink.add({"restaurant_url": url}, card_update(it))
+    pending_items.clear()
+    card_sink.flush()
 
-pass_box = wait.until(EC.presence_of_element_located((By.ID, "Password")))
-pass_box.clear()
-pass_box.send_keys(password)
-
-login_btn = wait.until(EC.element_to_be_clickable((By.ID, "bt_submit")))
-js_click(login_btn)
-
-# ====== CHỜ REDIRECT VỀ FOODY ======
-try:
-    wait.until(lambda d: ("foody.vn" in d.current_url) and ("id.foody.vn" not in d.current_url))
-except TimeoutException:
-    print(" Không thấy redirect rõ ràng về foody.vn (mạng yếu hoặc login chưa hoàn tất).")
-    print("URL hiện tại:", driver.current_url)
-
-time.sleep(2)
+def count_unique_urls():
+    # PRUNE_DOM: card mới -> ghi Mongo ngay sau mỗi lần bấm, rồi xoá nội dung card khỏi trang
+    fresh = {}
+    collect_new_cards(driver, fresh, prune=PRUNE_DOM)
+    add_items(fresh)
+    if PRUNE_DOM:
+        save_pending()
+    return len(collected_items)
+
+def resume_from_pages(state):
+    """
+    Cào tiếp từ checkpoint bằng chính request "Xem thêm" đã lưu (more_url, page=N trở đi), không bấm lại từ đầu.
+    Trả về số lần bấm tương đương đã đạt (checkpoint + số trang lấy được),
+    None nếu request không dùng được (caller quay về bấm "Xem thêm" như bình thường).
+    """
+    url = state["more_url"]
+    page = state.get("page") or page_of(url)
+    if not page:
+        return None
+    page += 1         # card của trang đã lưu đã nằm trong Mongo
+    clicks = state.get("clicks", 0)
+    fetched = 0
+    last_good = url   # request của trang cuối đã lấy được -> checkpoint khi phải dừng giữa chừng
+    print(f" Cào tiếp từ trang {page} (checkpoint {clicks} lần bấm, {state.get('cards', 0)} card)")
+    while clicks < MAX_CLICK:
+        page_url = with_page(url, page)
+        try:
+            with limiter.request(page_url):
+                rows = fetch_listing_page(driver, page_url)
+        except Exception as e:
+            print(f" Lỗi lấy trang {page}: {str(e)[:120]}")
+            rows = None
+        if rows is None:
+            if fetched == 0:
+                return None
+            save_pending()
+            ckpt.save(clicks, state.get("cards", 0) + len(collected_items), last_good)
+            print(" Dừng cào tiếp, phần còn lại lần sau chạy tiếp từ checkpoint")
+            return clicks
+        if not rows:
+            print(f" Hết quán ở trang {page} → DỪNG")
+            break
+        fresh = {}
+        add_card_rows(rows, page_url, fresh)
+        add_items(fresh)
+        fetched += 1
+        clicks += 1
+        last_good = page_url
+        print(f"   Trang {page}: +{len(rows)} card → {len(collected_items)} card mới lần này")
+        if fetched % max(1, CHECKPOINT_EVERY) == 0:
+            save_pending()
+            ckpt.save(clicks, state.get("cards", 0) + len(collected_items), last_good)
+        page += 1
+    save_pending()
+    ckpt.finish(clicks, state.get("cards", 0) + len(collected_items))
+    return clicks
+
+# ================== 5. ĐĂNG NHẬP (DÙNG LẠI PHIÊN ĐÃ LƯU NẾU CÒN HẠN) ==================
+def login_interactive(d):
+    # chỉ hỏi email/mật khẩu khi phiên đã lưu hết hạn
+    email = input("Nhập Email Foody: ").strip()
+    password = getpass.getpass("Nhập mật khẩu Foody: ")
+    return login_id_foody(d, email, password) and {"email": email}
+
+sessions = SessionStore()
+if not sessions.ensure_login(driver, login_interactive):
+    print(" Đăng nhập chưa rõ ràng, vẫn thử tiếp")
+driver.save_cookies()
 print(" Đang ở trang:", driver.current_url)
 
 
@@ -192,123 +235,203 @@ except:
 print(" Đã kết nối MongoDB")
 
 # ================== 7. CLICK 'XEM THÊM' ĐẾN KHI HẾT ==================
+LISTING_URL = "https://www.foody.vn/"   # trang danh sách được bấm "Xem thêm"; cũng là khóa checkpoint
 MAX_CLICK = 500
 WAIT_GROW_TIMEOUT = 50
-
+PRUNE_DOM = False      # True = sau mỗi lần bấm: lưu card mới vào Mongo rồi xoá nội dung card đó khỏi trang
+CLICK_LATENCY_CSV = "click_latency_all.csv"   # thời gian + số node DOM từng lần bấm (None = không ghi)
+CHECKPOINT_EVERY = 20  # sau mỗi ngần này lần bấm: ghi card đã gom + tiến độ vào Mongo (0 = chỉ ghi ở cuối)
+RESUME = True          # lần trước chết giữa chừng -> cào tiếp từ checkpoint thay vì bấm lại từ đầu
+
+card_sink = BulkUpsertSink(col, batch_size=1000)
+click_log = ClickLatencyLog(label="prune" if PRUNE_DOM else "full")
+limiter = AdaptiveRateLimiter()
+# khóa theo URL cố định, không theo current_url (sau đăng nhập có thể khác nhau / kèm query string)
+ckpt = ListingCheckpoint(db[CHECKPOINT_COL], key=f"restaurants_all|{LISTING_URL}")
+state = ckpt.load() if RESUME else None
+if state is None:
+    # chạy mới từ đầu (kể cả checkpoint cũ đã xong) -> xoá để checkpoint chỉ tăng dần trong lần chạy này
+    ckpt.reset()
+
+driver.get(LISTING_URL)
 last_unique = count_unique_urls()
+last_cards = len(driver.find_elements(By.CSS_SELECTOR, LISTING_CARD))
 print(f" Bắt đầu với {last_unique} card(unique url)")
 
-click_count = 0
-while click_count < MAX_CLICK:
-    dismiss_login_popup_if_any()
-
-    btn = None
-    selectors = [
-        "a.fd-btn-more",
-        "#scrollLoadingPage a",
-        "#scrollLoadingPage",
-        "a[rel='next']",
-    ]
-
-    for sel in selectors:
-        els = driver.find_elements(By.CSS_SELECTOR, sel)
-        if els:
-            btn = els[0]
-            break
-
-    if not btn:
-        print(" Không còn nút 'Xem thêm' → DỪNG")
-        break
+selectors = [
+    "a.fd-btn-more",
+    "#scrollLoadingPage a",
+    "#scrollLoadingPage",
+    "a[rel='next']",
+]
+prepare_growth_wait(driver)
 
+click_count = 0
+total_saved = 0.0
+load_complete = False  # tải hết danh sách / đủ MAX_CLICK -> checkpoint đánh dấu xong
+resumed = None
+last_more_url = None   # request "Xem thêm" gần nhất của browser hiện tại (browser mới sau restart không còn)
+if state and state.get("more_url"):
+    resumed = resume_from_pages(state)
+    if resumed is None:
+        print(" Không cào tiếp được bằng request đã lưu → bấm lại 'Xem thêm' từ đầu (card cũ đã có trong Mongo)")
+    else:
+        click_count = resumed
+elif state:
+    print(f" Checkpoint {state.get('clicks', 0)} lần bấm chưa có request 'Xem thêm' → bấm lại từ đầu")
+
+while resumed is None and click_count < MAX_CLICK:
     try:
-        driver.execute_script("arguments[0].scrollIntoView(true);", btn)
-        time.sleep(1)
-        js_click(btn)
-        click_count += 1
-        print(f"Click Xem thêm: {click_count}")
-    except:
-        print(" Click nút 'Xem thêm' lỗi → DỪNG")
-        break
+        dismiss_login_popup_if_any()
+
+        btn = None
+        for sel in selectors:
+            els = driver.find_elements(By.CSS_SELECTOR, sel)
+            if els:
+                btn = els[0]
+                break
+
+        if not btn:
+            print(" Không còn nút 'Xem thêm' → DỪNG")
+            load_complete = True
+            break
 
-    start = time.time()
-    grown = False
-    while time.time() - start < WAIT_GROW_TIMEOUT:
-        current_unique = count_unique_urls()
-        if current_unique > last_unique:
-            print(f"   Tăng: {last_unique} → {current_unique}")
-            last_unique = current_unique
-            grown = True
+        try:
+            driver.execute_script("arguments[0].scrollIntoView(true);", btn)
+            time.sleep(1)
+            js_click(btn)
+            click_count += 1
+            print(f"Click Xem thêm: {click_count}")
+        except WebDriverException:
+            raise
+        except:
+            print(" Click nút 'Xem thêm' lỗi → DỪNG")
             break
-        time.sleep(1)
 
-    if not grown:
+        res = wait_for_growth(driver, LISTING_CARD, last_cards, WAIT_GROW_TIMEOUT,
+                              more_selector=", ".join(selectors))
+    except WebDriverException as e:
+        # browser mới mở lại từ đầu danh sách -> lưu checkpoint rồi cào tiếp bằng request "Xem thêm"
+        try:
+            restarted = driver.recover(e)
+        except RestartLimitError as limit:
+            print(f" {limit} → DỪNG (lưu checkpoint, lần sau chạy tiếp)")
+            break
+        if not restarted:
+            print(f" Lỗi browser: {str(e)[:120]} → DỪNG")
+            break
+        save_pending()
+        ckpt.save(click_count, len(collected_items), last_more_url)
+        if last_more_url:
+            resumed = resume_from_pages({"more_url": last_more_url, "clicks": click_count, "cards": 0})
+            if resumed is not None:
+                click_count = resumed
+                break
+        # không cào tiếp được -> bấm lại từ trang 1, đếm lại số lần bấm
+        # (card cũ đã có trong Mongo, checkpoint không bị ghi lùi)
+        print(" Không cào tiếp được sau khi khởi động lại browser → bấm lại 'Xem thêm' từ đầu")
+        click_count = 0
+        last_cards = len(driver.find_elements(By.CSS_SELECTOR, LISTING_CARD))
+        prepare_growth_wait(driver)
+        continue
+    total_saved += res["saved"]
+
+    if res["status"] == "end":
+        print(f" Hết quán (không còn nút, trang đứng yên sau {res['waited']:.1f}s) → DỪNG")
+        load_complete = True
+        break
+    if res["status"] != "grown":
         print(" Không tăng sau khi chờ đủ -> DỪNG")
         break
 
-print(f" KẾT THÚC LOAD: tổng card(unique url) ≈ {last_unique}")
+    last_cards = res["count"]
+    t_harvest = time.perf_counter()
+    current_unique = count_unique_urls()
+    click_log.record(click_count, res["waited"], time.perf_counter() - t_harvest, dom_nodes(driver), current_unique)
+    print(f"   Tăng: {last_unique} → {current_unique} (chờ {res['waited']:.1f}s, tiết kiệm ~{res['saved']:.1f}s)")
+    last_unique = current_unique
+    last_more_url = last_paged_url(driver) or last_more_url
+
+    if CHECKPOINT_EVERY and click_count % CHECKPOINT_EVERY == 0:
+        save_pending()
+        ckpt.save(click_count, current_unique, last_more_url)
+        print(f"   Checkpoint: {click_count} lần bấm, {current_unique} card đã lưu Mongo")
+
+if resumed is None:
+    if load_complete or click_count >= MAX_CLICK:
+        ckpt.finish(click_count, len(collected_items))
+    else:
+        # dừng giữa chừng (browser lỗi, trang không tăng) -> lần sau cào tiếp từ đây
+        save_pending()
+        ckpt.save(click_count, len(collected_items), last_paged_url(driver) or last_more_url)
+
+print(f" Tiết kiệm ~{total_saved:.1f}s chờ so với poll sleep(1) ({click_count} lần bấm)")
+print(f" Thời gian mỗi lần bấm: {click_log.summary()}")
+if CLICK_LATENCY_CSV:
+    click_log.append_csv(CLICK_LATENCY_CSV)
+print(f" Browser: khởi động lại {driver.restarts} lần, thử lại {driver.retries} lần")
+print(f" KẾT THÚC LOAD: tổng card(unique url) ≈ {len(collected_items)}")
 
 
 # ================== 8. THU THẬP + LƯU MONGO  ==================
-all_items = get_restaurant_items()
-print(f"Tổng số card DOM: {len(all_items)}")
-
-inserted = 0
-updated = 0
-skipped = 0
-
-for it in all_items:
+if resumed is None:
     try:
-        url = (it.get("restaurant_url") or "").strip()
-        if not url:
-            skipped += 1
-            continue
-
-        # upsert: có thì update, chưa có thì insert
-        res = col.update_one(
-            {"restaurant_url": url},
-            {"$set": {
-                "district": it.get("district", "Unknown"),
-                "restaurant_name": it.get("restaurant_name", ""),
-                "address": it.get("address", ""),
-                "restaurant_url": url,
-                "source": it.get("source", "foody.vn")
-            }},
-            upsert=True
-        )
-
-        if res.upserted_id is not None:
-            inserted += 1
-        else:
-            if res.matched_count > 0:
-                updated += 1
-
-    except:
-        skipped += 1
+        count_unique_urls()
+        if HTML_CACHE_DIR and not PRUNE_DOM:
+            # PRUNE_DOM: card đã bị xoá khỏi trang, HTML lúc này không còn gì để parse lại
+            HtmlCache(HTML_CACHE_DIR).put(driver.current_url, driver.page_source, "listing")
+    except WebDriverException as e:
+        # browser đã chết (vd hết lượt khởi động lại) -> vẫn ghi nốt card đã gom ở dưới
+        print(f" Không đọc được trang nữa: {str(e)[:120]}")
+print(f"Tổng số card (unique url): {len(collected_items)}")
+
+# card chưa ghi ở checkpoint nào -> ghi nốt; số insert/update tính cho cả lần chạy
+save_pending()
+card_sink.close()
+inserted, updated, skipped = card_sink.inserted, card_sink.updated, card_sink.skipped
 
 print(f" Insert mới: {inserted}")
 print(f" Update (đã có url): {updated}")
 print(f" Bỏ qua (thiếu url/lỗi): {skipped}")
 
 # ================== 9. EXPORT EXCEL: ALL + MỖI KHU VỰC 1 SHEET ==================
-docs = list(col.find({}, {"_id": 0}))
-df = pd.DataFrame(docs)
-
-if not df.empty:
-    # TÍNH LẠI district TỪ address để sửa Unknown do dữ liệu cũ
-    if "address" in df.columns:
-        df["district"] = df["address"].apply(parse_district)
-
-    # sắp xếp dễ nhìn
-    df = df.sort_values(["district", "restaurant_name"], na_position="last").reset_index(drop=True)
+# TÍNH LẠI district TỪ address để sửa Unknown do dữ liệu cũ (ghi thẳng vào Mongo theo lô)
+fixed = 0
+
+def fix_districts(batch):
+    # parse_district có LRU cache (địa chỉ lặp lại nhiều) -> nhanh hơn dựng Series + str.extract cho lô 2000 dòng;
+    # chỉ ghi lại dòng bị đổi
+    global fixed
+    new_districts = [parse_district(d.get("address")) for d in batch]
+    ops = [UpdateOne({"_id": d["_id"]}, {"$set": {"district": nd}})
+           for d, nd in zip(batch, new_districts) if nd != d.get("district")]
+    if ops:
+        col.bulk_write(ops, ordered=False)
+        fixed += len(ops)
+
+batch = []
+for d in col.find({"address": {"$exists": True}}, {"_id": 1, "address": 1, "district": 1}, batch_size=2000):
+    batch.append(d)
+    if len(batch) >= 2000:
+        fix_districts(batch)
+        batch = []
+if batch:
+    fix_districts(batch)
+print(f" Sửa district cho {fixed} quán")
 
 output_file = "restaurants_all_districts_from_home_1.xlsx"
+OUT_PARQUET_DIR = None   # vd "restaurants_all_districts_from_home_1.parquet" -> ghi thêm Parquet chia theo district
+EXPORT_COLS = ["restaurant_url", "district", "restaurant_name", "address", "source"]
 
-with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
-    df.to_excel(writer, sheet_name="ALL", index=False)
+# sắp xếp dễ nhìn, đọc cursor theo lô + openpyxl write-only -> không nạp cả collection vào RAM
+n_rows = export_xlsx_streaming(
+    col, output_file, EXPORT_COLS,
+    sort_keys=["district", "restaurant_name"],
+    sheet_name_fn=lambda d: safe_sheet_name(str(d)),
+)
 
-    if not df.empty and "district" in df.columns:
-        for district, g in df.groupby("district"):
-            sheet = safe_sheet_name(str(district))
-            g.to_excel(writer, sheet_name=sheet, index=False)
+print(f" Đã export {n_rows} dòng ra file {output_file}")
 
-print(f" Đã export {len(df)} dòng ra file {output_file}")
+if OUT_PARQUET_DIR:
+    n_rows = export_parquet_streaming(col, OUT_PARQUET_DIR, EXPORT_COLS)
+    print(f" Đã export {n_rows} dòng ra Parquet {OUT_PARQUET_DIR}")
@@ -0,0 +1,240 @@
+# ================== 1. IMPORT ==================
+from selenium import webdriver
+from selenium.webdriver.firefox.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from multiprocessing import Pool
+import time
+import getpass
+import os
+import sys
+from pymongo import MongoClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from foody_common.waits import prepare_growth_wait, wait_for_growth
+from foody_common.drivers import apply_lean_firefox
+from foody_common.listing import collect_new_cards
+from foody_common.login import login_id_foody
+from foody_common.session import SessionStore
+from foody_common.sinks import BulkUpsertSink
+from foody_common.export import export_xlsx_streaming
+
+# ================== 2. CẤU HÌNH ==================
+# Mỗi quận 1 phiên Firefox riêng (lọc qua "Bộ lọc"), chạy song song NUM_PROCESSES tiến trình,
+# tất cả cùng upsert vào foody_db.restaurants_all (index unique restaurant_url).
+DISTRICTS = [
+    "Quận 1", "Quận 3", "Quận 4", "Quận 5", "Quận 6", "Quận 7", "Quận 8",
+    "Quận 10", "Quận 11", "Quận 12",
+    "Quận Bình Tân", "Quận Bình Thạnh", "Quận Gò Vấp", "Quận Phú Nhuận",
+    "Quận Tân Bình", "Quận Tân Phú", "TP. Thủ Đức",
+    "Huyện Bình Chánh", "Huyện Cần Giờ", "Huyện Củ Chi", "Huyện Hóc Môn", "Huyện Nhà Bè",
+]
+NUM_PROCESSES = 4        # số Firefox chạy cùng lúc
+MAX_CLICK = 150          # giới hạn an toàn mỗi quận
+WAIT_GROW_TIMEOUT = 20   # chờ DOM tăng tối đa 20s
+LEAN_PROFILE = True      # nhiều Firefox cùng lúc -> nên headless + chặn ảnh/font/media
+
+GECKO_PATH = r"C:/Users/User/OneDrive/Desktop/Ma Nguon Mo/DO AN CUOI KY/geckodriver.exe"
+FIREFOX_BINARY = r"C:/Program Files/Mozilla Firefox/firefox.exe"
+
+MONGO_URI = "mongodb://localhost:27017/"
+BULK_SIZE = 500
+OUTPUT_FILE = None       # vd "restaurants_all_by_district.xlsx" -> export sau khi crawl xong
+
+MORE_SELECTORS = [
+    "a.fd-btn-more",
+    "#scrollLoadingPage a",
+    "#scrollLoadingPage",
+    "a[rel='next']",
+]
+EXPORT_COLS = ["restaurant_url", "district", "restaurant_name", "address", "source"]
+
+
+# ================== 3. HELPER FUNCTIONS ==================
+def make_driver():
+    options = webdriver.firefox.options.Options()
+    options.binary_location = FIREFOX_BINARY
+    options.headless = False
+    if LEAN_PROFILE:
+        apply_lean_firefox(options)
+    driver = webdriver.Firefox(service=Service(GECKO_PATH), options=options)
+    return driver, WebDriverWait(driver, 25)
+
+def js_click(driver, el):
+    driver.execute_script("arguments[0].click();", el)
+
+def dismiss_login_popup_if_any(driver):
+    try:
+        popup_title = driver.find_elements(By.XPATH, "//*[contains(text(),'Đăng nhập hệ thống')]")
+        if popup_title:
+            btns = driver.find_elements(By.XPATH, "//button[contains(.,'Hủy')] | //a[contains(.,'Hủy')]")
+            if btns:
+                js_click(driver, btns[0])
+                time.sleep(1)
+    except:
+        pass
+
+def open_district(driver, wait, district):
+    """Mở Bộ lọc -> chọn đúng 1 quận -> Tìm kiếm (giống crawl_restaurants_quan1.py)."""
+    bo_loc = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "a.ico-nofilter, a.ico-filter")))
+    js_click(driver, bo_loc)
+    time.sleep(3)
+
+    # so khớp nguyên văn: contains('Quận 1') sẽ dính cả Quận 10/11/12
+    label = wait.until(EC.element_to_be_clickable(
+        (By.XPATH, f"//label[normalize-space()='{district}']")
+    ))
+    js_click(driver, label)
+    time.sleep(1)
+
+    btn_search = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "a.fd-btn.blue")))
+    js_click(driver, btn_search)
+    time.sleep(5)
+
+def load_all_cards(driver, district, collected):
+    """Bấm 'Xem thêm' đến khi hết, gom card mới sau mỗi lần tăng. Trả về số lần bấm."""
+    last_cards = len(driver.find_elements(By.CSS_SELECTOR, "div.content-item"))
+    collect_new_cards(driver, collected, default_district=district)
+    prepare_growth_wait(driver)
+
+    click_count = 0
+    while click_count < MAX_CLICK:
+        dismiss_login_popup_if_any(driver)
+
+        btn = None
+        for sel in MORE_SELECTORS:
+            els = driver.find_elements(By.CSS_SELECTOR, sel)
+            if els:
+                btn = els[0]
+                break
+        if not btn:
+            break
+
+        try:
+            driver.execute_script("arguments[0].scrollIntoView(true);", btn)
+            time.sleep(1)
+            js_click(driver, btn)
+            click_count += 1
+        except:
+            break
+
+        res = wait_for_growth(driver, "div.content-item", last_cards, WAIT_GROW_TIMEOUT,
+                              more_selector=", ".join(MORE_SELECTORS))
+        if res["status"] != "grown":
+            break
+        last_cards = res["count"]
+        collect_new_cards(driver, collected, default_district=district)
+
+    collect_new_cards(driver, collected, default_district=district)
+    return click_count
+
+def crawl_district(args):
+    """
+    Chạy trong tiến trình con: 1 Firefox, 1 quận.
+    Trả về dict thống kê {district, cards, clicks, inserted, updated, skipped, seconds, error}.
+    """
+    district, email, password = args
+    t0 = time.time()
+    stats = {"district": district, "cards": 0, "clicks": 0,
+             "inserted": 0, "updated": 0, "skipped": 0, "error": None}
+
+    client = MongoClient(MONGO_URI)
+    col = client["foody_db"]["restaurants_all"]
+    driver = None
+    try:
+        driver, wait = make_driver()
+        # cookie đã lưu -> không đăng nhập lại; phiên hết hạn -> chỉ 1 tiến trình đăng nhập (file khóa),
+        # các tiến trình khác chờ rồi dùng lại cookie vừa lưu
+        if not SessionStore().ensure_login(driver, lambda d: bool(email) and login_id_foody(d, email, password) and {"email": email}):
+            print(f"[{district}] Đăng nhập chưa rõ ràng, vẫn thử tiếp. URL: {driver.current_url}")
+
+        open_district(driver, wait, district)
+
+        collected = {}
+        stats["clicks"] = load_all_cards(driver, district, collected)
+        stats["cards"] = len(collected)
+
+        with BulkUpsertSink(col, batch_size=BULK_SIZE) as sink:
+            for url, it in collected.items():
+                sink.add({"restaurant_url": url}, {"$set": it})
+        stats["inserted"] = sink.inserted
+        stats["updated"] = sink.updated
+        stats["skipped"] = sink.skipped
+    except Exception as e:
+        stats["error"] = str(e)[:200]
+    finally:
+        if driver is not None:
+            try:
+                driver.quit()
+            except:
+                pass
+        client.close()
+
+    stats["seconds"] = time.time() - t0
+    return stats
+
+
+# ================== 4. MAIN ==================
+if __name__ == "__main__":
+    # tiến trình con không hỏi được mật khẩu -> hỏi trước ở đây, nhưng chỉ khi phiên đã lưu không còn dùng được
+    # (file còn hạn chưa chắc cookie còn đăng nhập -> mở 1 Firefox nạp cookie kiểm tra trên trang chủ)
+    sessions = SessionStore()
+    session_ok = False
+    if sessions.load():
+        check_driver, _ = make_driver()
+        try:
+            session_ok = sessions.is_valid(check_driver)
+        finally:
+            check_driver.quit()
+    if session_ok:
+        email, password = None, None
+        print(" Phiên đăng nhập đã lưu vẫn dùng được, không cần nhập mật khẩu")
+    else:
+        email = input("Nhập Email Foody: ").strip()
+        password = getpass.getpass("Nhập mật khẩu Foody: ")
+
+    client = MongoClient(MONGO_URI)
+    col = client["foody_db"]["restaurants_all"]
+    try:
+        col.create_index("restaurant_url", unique=True)
+    except:
+        pass
+    print(" Đã kết nối MongoDB")
+
+    t_start = time.time()
+    results = []
+    tasks = [(d, email, password) for d in DISTRICTS]
+    with Pool(processes=NUM_PROCESSES) as pool:
+        for st in pool.imap_unordered(crawl_district, tasks):
+            results.append(st)
+            note = f" LỖI: {st['error']}" if st["error"] else ""
+            print(f" [{len(results)}/{len(DISTRICTS)}] {st['district']}: {st['cards']} card, "
+                  f"{st['clicks']} lần bấm, {st['seconds']:.1f}s{note}")
+    wall = time.time() - t_start
+
+    # ================== 5. BÁO CÁO THEO QUẬN ==================
+    print("\n" + "=" * 78)
+    print(f"{'Quận/Huyện':<20}{'Card':>8}{'Bấm':>6}{'Mới':>8}{'Update':>8}{'Lỗi':>6}{'Giây':>10}")
+    print("-" * 78)
+    for st in sorted(results, key=lambda x: DISTRICTS.index(x["district"])):
+        print(f"{st['district']:<20}{st['cards']:>8}{st['clicks']:>6}{st['inserted']:>8}"
+              f"{st['updated']:>8}{st['skipped']:>6}{st['seconds']:>10.1f}")
+    print("-" * 78)
+    total_cards = sum(st["cards"] for st in results)
+    busy = sum(st["seconds"] for st in results)
+    print(f"{'TỔNG':<20}{total_cards:>8}{'':>6}{sum(st['inserted'] for st in results):>8}"
+          f"{sum(st['updated'] for st in results):>8}{sum(st['skipped'] for st in results):>6}{wall:>10.1f}")
+    print(f" Thời gian thực {wall:.1f}s, cộng dồn các phiên {busy:.1f}s "
+          f"(song song x{busy / wall if wall else 0:.1f})")
+    failed = [st["district"] for st in results if st["error"]]
+    if failed:
+        print(" Quận lỗi (chạy lại sau):", ", ".join(failed))
+    print(f" restaurants_all hiện có {col.count_documents({})} quán")
+
+    # ================== 6. EXPORT (TUỲ CHỌN) ==================
+    if OUTPUT_FILE:
+        n = export_xlsx_streaming(col, OUTPUT_FILE, EXPORT_COLS, sort_keys=["district", "restaurant_name"])
+        print(f" Đã export {n} dòng: {OUTPUT_FILE}")
+
+    client.close()
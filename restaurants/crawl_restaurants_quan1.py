@@ -7,53 +7,51 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver import ActionChains
 import time
 import getpass
-import pandas as pd
+import os
+import sys
 from pymongo import MongoClient
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from foody_common.waits import prepare_growth_wait, wait_for_growth
+from foody_common.drivers import apply_lean_firefox
+from foody_common.export import export_xlsx_streaming
+from foody_common.login import login_id_foody
+from foody_common.session import SessionStore
+from foody_common.listing import collect_new_links
+from foody_common.clicklog import ClickLatencyLog
+from foody_common.memory import dom_nodes
+
 # ================== 2. FIREFOX CONFIG ==================
+LEAN_PROFILE = False   # True = headless + chặn ảnh/font/media/host ngoài foody
+
 gecko_path = r"C:/Users/User/OneDrive/Desktop/Ma Nguon Mo/DO AN CUOI KY/geckodriver.exe"
 service = Service(gecko_path)
 
 options = webdriver.firefox.options.Options()
 options.binary_location = r"C:/Program Files/Mozilla Firefox/firefox.exe"
 options.headless = False
+if LEAN_PROFILE:
+    apply_lean_firefox(options)
 
 driver = webdriver.Firefox(service=service, options=options)
 wait = WebDriverWait(driver, 25)
 actions = ActionChains(driver)
 
 
-# ================== 3. MỞ FOODY ==================
-driver.get("https://id.foody.vn/account/login?returnUrl=https://www.foody.vn/")
-time.sleep(5)
-
-email = input("Nhập Email Foody: ").strip()
-password = getpass.getpass("Nhập mật khẩu Foody: ")
-
-# --- TÌM Ô EMAIL ---
-email_box = wait.until(
-    EC.presence_of_element_located((By.ID, "Email"))
-)
-email_box.clear()
-email_box.send_keys(email)
-
-# --- TÌM Ô PASSWORD ---
-pass_box = wait.until(
-    EC.presence_of_element_located((By.ID, "Password"))
-)
-pass_box.clear()
-pass_box.send_keys(password)
-
-time.sleep(1)
+# ================== 3. MỞ FOODY + ĐĂNG NHẬP (DÙNG LẠI PHIÊN ĐÃ LƯU NẾU CÒN HẠN) ==================
+def login_interactive(d):
+    # chỉ hỏi email/mật khẩu khi phiên đã lưu hết hạn; email lưu kèm cookie để lần sau vẫn biết ai cào
+    email = input("Nhập Email Foody: ").strip()
+    password = getpass.getpass("Nhập mật khẩu Foody: ")
+    return login_id_foody(d, email, password) and {"email": email}
 
-# --- NÚT ĐĂNG NHẬP ---
-login_btn = wait.until(
-    EC.element_to_be_clickable((By.ID, "bt_submit"))
-)
-login_btn.click()
-time.sleep(5)
-print(" Đã xác nhận đăng nhập xong")
+sessions = SessionStore()
+if sessions.ensure_login(driver, login_interactive):
+    print(" Đã xác nhận đăng nhập xong")
+else:
+    print(" Đăng nhập chưa rõ ràng, vẫn thử tiếp. URL:", driver.current_url)
+email = sessions.load_meta().get("email")   # ghi vào crawler_email (cả khi dùng lại phiên đã lưu)
 
 # ================== KẾT NỐI MONGODB ==================
 client = MongoClient("mongodb://localhost:27017/")
@@ -95,19 +93,55 @@ print(" Đã chuyển sang trang kết quả Quận 1")
 # ================== 7. LOAD HẾT QUÁN (CHỐNG MẠNG YẾU) ==================
 MAX_CLICK = 150          # giới hạn an toàn 
 WAIT_GROW_TIMEOUT = 20   # chờ DOM tăng tối đa 20s
+PRUNE_DOM = False        # True = sau mỗi lần bấm: lưu link mới vào Mongo rồi xoá card đó khỏi trang
+CLICK_LATENCY_CSV = "click_latency_quan1.csv"   # thời gian + số node DOM từng lần bấm (None = không ghi)
+ITEM_SELECTOR = "a[data-bind*='BranchUrl']"
+CARD_SELECTOR = "div.content-item, li"           # khối chứa link quán, xoá cùng lúc khi PRUNE_DOM
 click_count = 0
 
 def get_count():
-    return len(driver.find_elements(By.CSS_SELECTOR, "a[data-bind*='BranchUrl']"))
+    return len(driver.find_elements(By.CSS_SELECTOR, ITEM_SELECTOR))
+
+restaurant_links = set()
+inserted_count = 0
+
+def save_link(link):
+    global inserted_count
+    # kiểm tra trùng trong Mongo
+    if col_restaurants.find_one({"restaurant_url": link}):
+        return
+    doc = {
+        "district": "Quận 1",
+        "restaurant_url": link,
+        "crawl_time": datetime.now(),
+        "crawler_email": email,
+        "source": "foody.vn"
+    }
+    col_restaurants.insert_one(doc)
+    inserted_count += 1
 
-last_count = get_count()
-print(f" Bắt đầu với {last_count} quán")
+def harvest_links():
+    """PRUNE_DOM: link mới -> Mongo ngay, xoá card khỏi trang. Trả về số item còn trong DOM (mốc chờ lần sau)."""
+    fresh = set()
+    _, remaining = collect_new_links(driver, ITEM_SELECTOR, fresh, CARD_SELECTOR, prune=True)
+    for link in fresh - restaurant_links:
+        restaurant_links.add(link)
+        save_link(link)
+    return remaining
+
+click_log = ClickLatencyLog(label="prune" if PRUNE_DOM else "full")
+last_count = harvest_links() if PRUNE_DOM else get_count()
+print(f" Bắt đầu với {len(restaurant_links) if PRUNE_DOM else last_count} quán")
+
+MORE_SELECTOR = "#scrollLoadingPage, a.next, a.btn-load-more"
+prepare_growth_wait(driver)
+total_saved = 0.0
 
 while click_count < MAX_CLICK:
     try:
         btn_more = wait.until(
             EC.presence_of_element_located(
-                (By.CSS_SELECTOR, "#scrollLoadingPage, a.next, a.btn-load-more")
+                (By.CSS_SELECTOR, MORE_SELECTOR)
             )
         )
         driver.execute_script("arguments[0].scrollIntoView(true);", btn_more)
@@ -115,56 +149,63 @@ while click_count < MAX_CLICK:
         driver.execute_script("arguments[0].click();", btn_more)
         click_count += 1
         print(f" Click {click_count}")
-
-        #  CHỜ DOM TĂNG
-        start = time.time()
-        while time.time() - start < WAIT_GROW_TIMEOUT:
-            current_count = get_count()
-            if current_count > last_count:
-                print(f"  Tăng từ {last_count} → {current_count}")
-                last_count = current_count
-                break
-            time.sleep(1)
-        else:
-            print(" Không tăng sau khi chờ đủ → DỪNG")
-            break
     except:
         print(" Không còn nút load → DỪNG")
         break
-print(f" KẾT THÚC: {last_count} quán")
 
-# ================== 8. LƯU LINK QUÁN VÀO MONGO ==================
-restaurant_links = set()
-inserted_count = 0
+    #  CHỜ DOM TĂNG (MutationObserver báo ngay khi có quán mới)
+    res = wait_for_growth(driver, ITEM_SELECTOR, last_count, WAIT_GROW_TIMEOUT,
+                          more_selector=MORE_SELECTOR)
+    total_saved += res["saved"]
+    if res["status"] == "grown":
+        t_harvest = time.perf_counter()
+        if PRUNE_DOM:
+            n_before = len(restaurant_links)
+            last_count = harvest_links()
+            print(f"  Tăng {n_before} → {len(restaurant_links)} quán (chờ {res['waited']:.1f}s, tiết kiệm ~{res['saved']:.1f}s)")
+        else:
+            print(f"  Tăng từ {last_count} → {res['count']} (chờ {res['waited']:.1f}s, tiết kiệm ~{res['saved']:.1f}s)")
+            last_count = res["count"]
+        click_log.record(click_count, res["waited"], time.perf_counter() - t_harvest, dom_nodes(driver),
+                         len(restaurant_links) if PRUNE_DOM else last_count)
+    elif res["status"] == "end":
+        print(" Hết quán (không còn nút load) → DỪNG")
+        break
+    else:
+        print(" Không tăng sau khi chờ đủ → DỪNG")
+        break
+print(f" Tiết kiệm ~{total_saved:.1f}s chờ so với poll sleep(1)")
+print(f" Thời gian mỗi lần bấm: {click_log.summary()}")
+if CLICK_LATENCY_CSV:
+    click_log.append_csv(CLICK_LATENCY_CSV)
+print(f" KẾT THÚC: {len(restaurant_links) if PRUNE_DOM else last_count} quán")
 
-cards = driver.find_elements(By.CSS_SELECTOR, "a[data-bind*='BranchUrl']")
+# ================== 8. LƯU LINK QUÁN VÀO MONGO ==================
+if PRUNE_DOM:
+    # đã lưu sau từng lần bấm, chỉ gom nốt card về muộn
+    harvest_links()
+    cards = []
+else:
+    cards = driver.find_elements(By.CSS_SELECTOR, ITEM_SELECTOR)
 for c in cards:
     link = c.get_attribute("href")
     if not link:
         continue
-    restaurant_links.add(link)
-    # kiểm tra trùng trong Mongo
-    if col_restaurants.find_one({"restaurant_url": link}):
+    if link in restaurant_links:
         continue
-
-    doc = {
-        "district": "Quận 1",
-        "restaurant_url": link,
-        "crawl_time": datetime.now(),
-        "crawler_email": email,
-        "source": "foody.vn"
-    }
-
-    col_restaurants.insert_one(doc)
-    inserted_count += 1
+    restaurant_links.add(link)
+    save_link(link)
 
 print(f" Đã lưu {inserted_count} quán mới vào MongoDB")
 print(f" Tổng số link quán Quận 1 (unique): {len(restaurant_links)}")
 
 # ================== 12. EXPORT EXCEL TỪ MONGO ==================
-docs = list(col_restaurants.find({"district": "Quận 1"}, {"_id": 0}))
-df = pd.DataFrame(docs)
 output_file = "restaurants_quan1.xlsx"
-df.to_excel(output_file, index=False)
+EXPORT_COLS = ["district", "restaurant_url", "crawl_time", "crawler_email", "source"]
+n_rows = export_xlsx_streaming(
+    col_restaurants, output_file, EXPORT_COLS,
+    sort_keys=[], query={"district": "Quận 1"},
+    group_field=None, all_sheet_name="Sheet1",
+)
 
-print(f" Đã export {len(df)} dòng ra file {output_file}")
+print(f" Đã export {n_rows} dòng ra file {output_file}")